@@ -0,0 +1,122 @@
+"""
+Keshlangan JWT autentifikatsiya
+- Har bir so'rovda User qatorini bazadan o'qish o'rniga foydalanuvchi
+  qisqa muddatli (AUTH_USER_CACHE_TIMEOUT) keshdan tiklanadi: barcha maydonlar
+  (role, is_blocked, ...), ruxsat etilgan kurslar va qurilmalar id lari.
+  Parol hash i va 2FA kaliti keshga yozilmaydi (CREDENTIAL_FIELDS) - ular deferred
+- Keshdagi obyekt faqat o'qish uchun: yozadigan joylar foydalanuvchini bazadan
+  qayta oladi yoki update_fields / .update() ishlatadi
+- Kesh kaliti foydalanuvchi versiyasiga bog'langan: User saqlanganda/o'chirilganda,
+  allowed_courses yoki qurilmalar o'zgarganda versiya oshiriladi (accounts.signals) -
+  bloklash, rol o'zgarishi, qurilmani uzish keyingi so'rovdanoq kuchga kiradi.
+  Bu faqat umumiy keshda (REDIS_URL) barcha workerlarga tegishli - aks holda boshqa
+  workerlarda eskirish AUTH_USER_CACHE_TIMEOUT (standart 60 soniya) bilan chegaralanadi
+- Token device_id claim iga ega bo'lsa va bu qurilma uzilgan bo'lsa - token rad etiladi
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User, UserDevice
+
+DEVICE_CLAIM = 'device_id'
+
+# Keshga tushmaydigan maydonlar - kerak bo'lsa bazadan (deferred) o'qiladi
+CREDENTIAL_FIELDS = {'password', 'two_factor_secret'}
+CACHED_FIELDS = [f.attname for f in User._meta.concrete_fields if f.attname not in CREDENTIAL_FIELDS]
+
+
+def _timeout():
+    return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+
+def _version_key(user_id):
+    return f"auth:user:{user_id}:v"
+
+
+def _entry_key(user_id, version):
+    return f"auth:user:{user_id}:{version}"
+
+
+def invalidate_user_auth(user_id):
+    """Foydalanuvchining keshlangan autentifikatsiya yozuvi eskiradi"""
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def build_entry(user_id):
+    """Bazadan yozuv quradi (3 ta so'rov); foydalanuvchi topilmasa None"""
+    fields = User.objects.filter(pk=user_id).values(*CACHED_FIELDS).first()
+    if fields is None:
+        return None
+    return {
+        'fields': fields,
+        'allowed_course_ids': list(
+            User.allowed_courses.through.objects.filter(user_id=user_id)
+            .order_by('course_id').values_list('course_id', flat=True)
+        ),
+        'device_ids': set(UserDevice.objects.filter(user_id=user_id).values_list('device_id', flat=True)),
+    }
+
+
+def get_entry(user_id):
+    version = cache.get(_version_key(user_id), 0)
+    key = _entry_key(user_id, version)
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_entry(user_id)
+        if entry is not None:
+            # Eski versiya kalitiga yoziladi - parallel invalidatsiya yo'qolmaydi
+            cache.set(key, entry, _timeout())
+    return entry
+
+
+def user_from_entry(entry):
+    """
+    Keshdagi maydonlardan User obyekti. Parol va 2FA kaliti deferred, shuning uchun
+    save() ularni hech qachon eski qiymat bilan qayta yozmaydi
+    """
+    fields = entry['fields']
+    user = User.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+    user.allowed_course_ids = list(entry['allowed_course_ids'])
+    user.device_ids = frozenset(entry['device_ids'])
+    return user
+
+
+def allowed_course_ids(user):
+    """Ruxsat etilgan kurslar id lari - autentifikatsiyada keshdan olingan bo'lsa so'rovsiz"""
+    ids = getattr(user, 'allowed_course_ids', None)
+    if ids is None:
+        ids = list(user.allowed_courses.order_by('pk').values_list('pk', flat=True))
+    return ids
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """simplejwt JWTAuthentication - foydalanuvchi keshdan tiklanadi"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Tokenda foydalanuvchi identifikatori yo'q")
+
+        entry = get_entry(user_id)
+        if entry is None:
+            raise AuthenticationFailed('Foydalanuvchi topilmadi', code='user_not_found')
+
+        user = user_from_entry(entry)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('Foydalanuvchi faol emas', code='user_inactive')
+
+        device_id = validated_token.get(DEVICE_CLAIM)
+        if device_id and device_id not in user.device_ids:
+            raise AuthenticationFailed('Qurilma uzilgan. Iltimos, qayta kiring.', code='device_removed')
+
+        return user
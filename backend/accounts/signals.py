@@ -0,0 +1,33 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import User, UserDevice
+from .authentication import invalidate_user_auth
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_auth_changed(sender, instance, **kwargs):
+    """Rol, bloklash va boshqa maydonlar o'zgarganda keshlangan foydalanuvchi eskiradi"""
+    invalidate_user_auth(instance.pk)
+
+
+@receiver(post_save, sender=UserDevice)
+@receiver(post_delete, sender=UserDevice)
+def user_device_changed(sender, instance, **kwargs):
+    """Qurilma uzilganda uning tokenlari keyingi so'rovdanoq rad etiladi"""
+    invalidate_user_auth(instance.user_id)
+
+
+@receiver(m2m_changed, sender=User.allowed_courses.through)
+def user_courses_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """allowed_courses o'zgarganda (user.allowed_courses yoki course.allowed_users orqali)"""
+    if not reverse:
+        if action.startswith('post_'):
+            invalidate_user_auth(instance.pk)
+    elif action == 'pre_clear':
+        # post_clear da pk_set yo'q - foydalanuvchilar oldindan olinadi
+        for user_id in instance.allowed_users.values_list('pk', flat=True):
+            invalidate_user_auth(user_id)
+    elif action.startswith('post_') and pk_set:
+        for user_id in pk_set:
+            invalidate_user_auth(user_id)
@@ -9,7 +9,10 @@ import hmac
 import hashlib
 import time
 import logging
+from django.conf import settings
+from django.utils import timezone
 from analytics.models import SecurityLog
+from analytics.log_writer import writer as security_log_writer
 
 logger = logging.getLogger('accounts')
 
@@ -23,15 +26,23 @@ def get_client_ip(request):
 
 
 def log_security_event(user, action, request=None, metadata=None):
-    """Xavfsizlik hodisasini bazaga yozadi"""
+    """
+    Xavfsizlik hodisasini yozadi. SECURITY_LOG_ASYNC=True bo'lsa yozuv
+    navbatga qo'yiladi va fon threadda paketlab saqlanadi (analytics.log_writer).
+    """
     try:
-        SecurityLog.objects.create(
-            user=user,
+        entry = SecurityLog(
+            user_id=getattr(user, 'pk', None),
             action=action,
             ip_address=get_client_ip(request) if request else None,
             user_agent=request.META.get('HTTP_USER_AGENT', '')[:500] if request else '',
             metadata=metadata or {},
+            created_at=timezone.now(),
         )
+        if getattr(settings, 'SECURITY_LOG_ASYNC', True):
+            security_log_writer.submit(entry)
+        else:
+            entry.save(force_insert=True)
     except Exception as e:
         logger.error(f"Xavfsizlik logini yozishda xato: {e}")
 
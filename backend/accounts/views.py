@@ -20,6 +20,7 @@ from .serializers import (
     AdminUserListSerializer,
 )
 from .permissions import IsAdmin, IsNotBlocked
+from .authentication import DEVICE_CLAIM
 from .utils import log_security_event, get_client_ip
 
 logger = logging.getLogger('accounts')
@@ -73,6 +74,9 @@ class LoginView(APIView):
                 )
 
         refresh = RefreshToken.for_user(user)
+        if user.role != 'admin' and device_id:
+            # Qurilma uzilsa shu qurilmadagi tokenlar rad etiladi (CachedJWTAuthentication)
+            refresh[DEVICE_CLAIM] = device_id
 
         # IP va oxirgi login yangilash
         user.last_login_ip = get_client_ip(request)
@@ -138,8 +142,10 @@ class ProfileView(APIView):
         })
 
     def put(self, request):
+        # request.user keshdan tiklangan - to'liq save() uchun bazadagi joriy holat olinadi
+        user = User.objects.get(pk=request.user.pk)
         serializer = UserUpdateSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True,
         )
@@ -148,7 +154,7 @@ class ProfileView(APIView):
 
         return Response({
             'success': True,
-            'data': UserProfileSerializer(request.user).data,
+            'data': UserProfileSerializer(user).data,
             'message': 'Profil yangilandi',
         })
 
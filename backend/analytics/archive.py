@@ -0,0 +1,119 @@
+"""
+SecurityLog saqlash muddati (retention) va arxiv
+- archive_expired_logs: muddati o'tgan yozuvlarni oylik siqilgan NDJSON
+  fayllarga (YYYY-MM.ndjson.gz) ko'chiradi va jadvaldan o'chiradi.
+  Jadvalda faqat oxirgi SECURITY_LOG_RETENTION_DAYS kunlik yozuvlar qoladi,
+  shuning uchun indekslar hajmi va so'rov tezligi tarix o'sgani bilan o'zgarmaydi.
+- iter_archived_logs: arxivni bazasiz (offline) o'qish va filtrlash
+
+Har bir ishga tushirish oy fayliga yangi gzip a'zosi (member) qo'shadi -
+gzip.open ularni bitta oqim sifatida o'qiydi. Paket avval faylga yoziladi,
+keyin o'chiriladi: uzilish bo'lsa yozuv arxivda ikki marta uchrashi mumkin,
+lekin yo'qolmaydi (o'quvchi id bo'yicha takrorlarni tashlaydi).
+"""
+
+import os
+import glob
+import gzip
+import json
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import SecurityLog
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'user__username', 'action', 'ip_address',
+    'user_agent', 'metadata', 'created_at',
+)
+
+
+def archive_dir():
+    return getattr(settings, 'SECURITY_LOG_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archives', 'security_logs'))
+
+
+def _month_path(directory, created_at):
+    return os.path.join(directory, f"{created_at.astimezone(dt_timezone.utc):%Y-%m}.ndjson.gz")
+
+
+def _to_record(row):
+    record = dict(row)
+    record['username'] = record.pop('user__username')
+    return record
+
+
+def archive_expired_logs(before, directory=None, batch_size=5000, dry_run=False):
+    """
+    created_at < before bo'lgan yozuvlarni arxivlaydi.
+    Qaytaradi: {'archived': int, 'files': [yo'llar]}
+    """
+    directory = directory or archive_dir()
+    expired = SecurityLog.objects.filter(created_at__lt=before)
+    if dry_run:
+        return {'archived': expired.count(), 'files': []}
+
+    os.makedirs(directory, exist_ok=True)
+    archived = 0
+    files = set()
+    while True:
+        # Har doim eng eski paket olinadi - o'chirilgandan keyin keyingisi keladi
+        rows = list(expired.order_by('created_at', 'id').values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            break
+
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(_month_path(directory, row['created_at']), []).append(row)
+        for path, month_rows in by_month.items():
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                for row in month_rows:
+                    f.write(json.dumps(_to_record(row), cls=DjangoJSONEncoder, ensure_ascii=False))
+                    f.write('\n')
+                f.flush()
+                os.fsync(f.fileno())
+            files.add(path)
+
+        with transaction.atomic():
+            SecurityLog.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+
+    return {'archived': archived, 'files': sorted(files)}
+
+
+def iter_archived_logs(directory=None, since=None, until=None, action=None, user_id=None):
+    """
+    Arxivdagi yozuvlarni vaqt tartibida qaytaradi (dict).
+    since/until - datetime; faqat kerakli oy fayllari ochiladi.
+    """
+    directory = directory or archive_dir()
+    # Fayllar UTC oylari bo'yicha nomlangan
+    since_month = since.astimezone(dt_timezone.utc).strftime('%Y-%m') if since else None
+    until_month = until.astimezone(dt_timezone.utc).strftime('%Y-%m') if until else None
+
+    paths = sorted(glob.glob(os.path.join(directory, '*.ndjson.gz')))
+    for path in paths:
+        month = os.path.basename(path).split('.')[0]
+        if since_month and month < since_month:
+            continue
+        if until_month and month > until_month:
+            continue
+        # Takrorlar faqat bitta oy faylida bo'lishi mumkin
+        seen = set()
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record['id'] in seen:
+                    continue
+                seen.add(record['id'])
+                created_at = parse_datetime(record['created_at'])
+                if since and created_at < since:
+                    continue
+                if until and created_at >= until:
+                    continue
+                if action and record['action'] != action:
+                    continue
+                if user_id is not None and record['user_id'] != user_id:
+                    continue
+                yield record
@@ -0,0 +1,138 @@
+"""
+SecurityLog yozuvlarini fon threadda paketlab yozish
+- log_security_event so'rov ichida faqat navbatga qo'yadi (INSERT kutilmaydi)
+- Navbat chegaralangan: to'lib qolsa yangi yozuvlar tashlab yuboriladi va
+  dropped hisoblagichi oshadi (so'rov hech qachon bloklanmaydi)
+- Fon thread SECURITY_LOG_FLUSH_INTERVAL soniyada yoki SECURITY_LOG_BATCH_SIZE
+  ta yozuv yig'ilganda bulk_create qiladi
+- Jarayon to'xtaganda (atexit) navbatdagi hamma yozuvlar yoziladi
+"""
+
+import os
+import atexit
+import logging
+import queue
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import SecurityLog
+
+logger = logging.getLogger('analytics')
+
+# Har shuncha tashlangan yozuvda bir marta ogohlantirish
+DROP_WARNING_EVERY = 100
+
+
+class SecurityLogWriter:
+    """Chegaralangan navbat + bulk_create qiluvchi fon thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.queue = None
+        self.thread = None
+        self.stopped = threading.Event()
+        self.wakeup = threading.Event()
+        self.counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0}
+        atexit.register(self.shutdown)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'SECURITY_LOG_BATCH_SIZE', 200)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'SECURITY_LOG_FLUSH_INTERVAL', 2)
+
+    def _ensure_started(self):
+        # fork dan keyin (gunicorn worker) navbat va thread qaytadan yaratiladi
+        if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+                return
+            if self.pid != os.getpid():
+                self.queue = queue.Queue(maxsize=getattr(settings, 'SECURITY_LOG_QUEUE_SIZE', 10000))
+                self.pid = os.getpid()
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, name='security-log-writer', daemon=True)
+            self.thread.start()
+
+    def submit(self, entry):
+        """SecurityLog obyektini navbatga qo'yadi; navbat to'la bo'lsa tashlaydi"""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.counters['dropped'] += 1
+            if self.counters['dropped'] % DROP_WARNING_EVERY == 1:
+                logger.warning(f"SecurityLog navbati to'la, jami tashlangan: {self.counters['dropped']}")
+            return False
+        self.counters['enqueued'] += 1
+        if self.queue.qsize() >= self.batch_size:
+            # Paket to'ldi - intervalni kutmasdan yoziladi
+            self.wakeup.set()
+        return True
+
+    def _drain(self, limit):
+        batch = []
+        try:
+            while len(batch) < limit:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if self.queue.qsize():
+                close_old_connections()
+                self.flush()
+                close_old_connections()
+
+    def write(self, batch):
+        """Paketni yozadi; paket xato bersa yozuvlar birma-bir yoziladi"""
+        try:
+            SecurityLog.objects.bulk_create(batch)
+            self.counters['written'] += len(batch)
+            return
+        except Exception as e:
+            logger.error(f"SecurityLog bulk_create xatosi: {e}")
+        for entry in batch:
+            try:
+                entry.save(force_insert=True)
+                self.counters['written'] += 1
+            except Exception as e:
+                self.counters['failed'] += 1
+                logger.error(f"Xavfsizlik logini yozishda xato: {e}")
+
+    def flush(self):
+        """Navbatdagi hamma yozuvlarni joriy threadda yozadi"""
+        if self.queue is None or self.pid != os.getpid():
+            return 0
+        total = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return total
+            self.write(batch)
+            total += len(batch)
+
+    def shutdown(self):
+        self.stopped.set()
+        self.wakeup.set()
+        if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+            self.thread.join(timeout=self.interval * 2 + 1)
+        self.flush()
+
+    def stats(self):
+        return {
+            **self.counters,
+            'queued': self.queue.qsize() if self.queue is not None else 0,
+        }
+
+
+writer = SecurityLogWriter()
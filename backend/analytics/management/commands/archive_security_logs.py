@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from analytics.archive import archive_expired_logs, archive_dir
+
+class Command(BaseCommand):
+    help = 'Muddati o\'tgan SecurityLog yozuvlarini siqilgan NDJSON arxivga ko\'chiradi va jadvaldan o\'chiradi'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SECURITY_LOG_RETENTION_DAYS,
+            help='Jadvalda shuncha kunlik yozuvlar qoladi',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dir', default=None, help='Arxiv papkasi (default: SECURITY_LOG_ARCHIVE_DIR)')
+        parser.add_argument('--dry-run', action='store_true', help='Faqat nechta yozuv ko\'chishini ko\'rsatadi')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        result = archive_expired_logs(
+            before,
+            directory=options['dir'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{result['archived']} ta yozuv arxivlanadi ({before:%Y-%m-%d} dan oldingi)")
+            return
+        for path in result['files']:
+            self.stdout.write(f"  {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['archived']} ta yozuv {options['dir'] or archive_dir()} ga arxivlandi"
+        ))
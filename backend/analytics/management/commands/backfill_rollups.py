@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from analytics.rollups import backfill
+
+class Command(BaseCommand):
+    help = (
+        'Kunlik rollup jadvallarini xom jadvallardan qayta hisoblaydi. '
+        'Ko\'rishlar SecurityLog dan olinadi - arxivlangan kunlar uchun 0 bo\'ladi.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Bugundan orqaga shuncha kun')
+        parser.add_argument('--start', help='Boshlanish sanasi (YYYY-MM-DD), --days o\'rniga')
+        parser.add_argument('--end', help='Tugash sanasi (YYYY-MM-DD), default bugun')
+
+    def handle(self, *args, **options):
+        end = parse_date(options['end']) if options['end'] else timezone.localdate()
+        if options['start']:
+            start = parse_date(options['start'])
+        else:
+            start = end - timedelta(days=options['days'] - 1)
+        if not start or not end or start > end:
+            raise CommandError('Noto\'g\'ri sana oralig\'i')
+
+        # Katta oraliqlar oylik bo'laklarda - tranzaksiyalar qisqa bo'ladi
+        total = 0
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=30), end)
+            total += backfill(chunk_start, chunk_end)
+            self.stdout.write(f"  {chunk_start} .. {chunk_end}")
+            chunk_start = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"{total} kunlik rollup qayta hisoblandi"))
@@ -0,0 +1,39 @@
+import json
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime, parse_date
+from django.utils import timezone
+from analytics.archive import iter_archived_logs
+
+def _parse_moment(value):
+    """'2026-01-31' yoki to'liq ISO vaqt"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Noto'g'ri sana: {value}")
+        moment = datetime(day.year, day.month, day.day)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+class Command(BaseCommand):
+    help = 'Arxivlangan SecurityLog yozuvlarini NDJSON ko\'rinishida chiqaradi (bazasiz)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Boshlanish (YYYY-MM-DD yoki ISO vaqt)')
+        parser.add_argument('--until', help='Tugash (kirmaydi)')
+        parser.add_argument('--action', help='Harakat turi (login, video_access, ...)')
+        parser.add_argument('--user-id', type=int)
+        parser.add_argument('--dir', default=None, help='Arxiv papkasi (default: SECURITY_LOG_ARCHIVE_DIR)')
+
+    def handle(self, *args, **options):
+        records = iter_archived_logs(
+            directory=options['dir'],
+            since=_parse_moment(options['since']) if options['since'] else None,
+            until=_parse_moment(options['until']) if options['until'] else None,
+            action=options['action'],
+            user_id=options['user_id'],
+        )
+        for record in records:
+            self.stdout.write(json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_securitylog_created_at_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='securitylog',
+            index=models.Index(fields=['created_at', 'id'], name='security_lo_created_189c12_idx'),
+        ),
+    ]
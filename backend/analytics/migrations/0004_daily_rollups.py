@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_securitylog_created_at_index'),
+        ('courses', '0020_videoupload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Sana')),
+                ('new_users', models.PositiveIntegerField(default=0, verbose_name='Yangi foydalanuvchilar')),
+                ('completions', models.PositiveIntegerField(default=0, verbose_name='Tugatilgan videolar')),
+                ('quiz_submissions', models.PositiveIntegerField(default=0, verbose_name='Topshirilgan testlar')),
+            ],
+            options={
+                'verbose_name': 'Kunlik statistika',
+                'verbose_name_plural': 'Kunlik statistikalar',
+                'db_table': 'analytics_daily_stats',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyActiveUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Sana')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='active_days', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Kunlik faol foydalanuvchi',
+                'verbose_name_plural': 'Kunlik faol foydalanuvchilar',
+                'db_table': 'analytics_daily_active_users',
+                'unique_together': {('date', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyVideoStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Sana')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar")),
+                ('completions', models.PositiveIntegerField(default=0, verbose_name='Tugatishlar')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.video', verbose_name='Video')),
+            ],
+            options={
+                'verbose_name': 'Kunlik video statistikasi',
+                'verbose_name_plural': 'Kunlik video statistikalari',
+                'db_table': 'analytics_daily_video_stats',
+                'ordering': ['-date'],
+                'unique_together': {('date', 'video')},
+            },
+        ),
+    ]
@@ -4,6 +4,7 @@ Xavfsizlik log modeli va Analytics
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class SecurityLog(models.Model):
@@ -48,8 +49,11 @@ class SecurityLog(models.Model):
         blank=True,
         verbose_name='Qo\'shimcha ma\'lumot',
     )
+    # auto_now_add emas: yozuv navbatdan keyinroq saqlanadi, vaqt esa
+    # hodisa sodir bo'lgan paytda qo'yiladi (analytics.log_writer)
     created_at = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name='Vaqt',
     )
 
@@ -61,8 +65,75 @@ class SecurityLog(models.Model):
         indexes = [
             models.Index(fields=['action', '-created_at']),
             models.Index(fields=['user', '-created_at']),
+            # Vaqt oralig'i bo'yicha o'qish va arxivlash (archive_security_logs)
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
         username = self.user.username if self.user else 'Noma\'lum'
         return f"[{self.created_at}] {username}: {self.get_action_display()}"
+
+
+# ===================== KUNLIK ROLLUP JADVALLARI =====================
+# Dashboard xom jadvallarni skanerlamasligi uchun kunlik yig'indilar.
+# Yozish paytida oshiriladi (analytics.rollups), tarix esa
+# python manage.py backfill_rollups bilan qayta hisoblanadi.
+
+class DailyStat(models.Model):
+    """Platforma bo'yicha kunlik ko'rsatkichlar"""
+    date = models.DateField(unique=True, verbose_name='Sana')
+    new_users = models.PositiveIntegerField(default=0, verbose_name='Yangi foydalanuvchilar')
+    completions = models.PositiveIntegerField(default=0, verbose_name='Tugatilgan videolar')
+    quiz_submissions = models.PositiveIntegerField(default=0, verbose_name='Topshirilgan testlar')
+
+    class Meta:
+        db_table = 'analytics_daily_stats'
+        verbose_name = 'Kunlik statistika'
+        verbose_name_plural = 'Kunlik statistikalar'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date}"
+
+
+class DailyVideoStat(models.Model):
+    """Video bo'yicha kunlik ko'rishlar va tugatishlar"""
+    date = models.DateField(verbose_name='Sana')
+    video = models.ForeignKey(
+        'courses.Video',
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='Video',
+    )
+    views = models.PositiveIntegerField(default=0, verbose_name='Ko\'rishlar')
+    completions = models.PositiveIntegerField(default=0, verbose_name='Tugatishlar')
+
+    class Meta:
+        db_table = 'analytics_daily_video_stats'
+        verbose_name = 'Kunlik video statistikasi'
+        verbose_name_plural = 'Kunlik video statistikalari'
+        ordering = ['-date']
+        unique_together = ('date', 'video')
+
+    def __str__(self):
+        return f"{self.date} - video {self.video_id}"
+
+
+class DailyActiveUser(models.Model):
+    """Kun davomida video ko'rgan foydalanuvchi (faol o'quvchilar soni uchun)"""
+    date = models.DateField(verbose_name='Sana')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='active_days',
+        verbose_name='Foydalanuvchi',
+    )
+
+    class Meta:
+        db_table = 'analytics_daily_active_users'
+        verbose_name = 'Kunlik faol foydalanuvchi'
+        verbose_name_plural = 'Kunlik faol foydalanuvchilar'
+        unique_together = ('date', 'user')
+
+    def __str__(self):
+        return f"{self.date} - user {self.user_id}"
@@ -0,0 +1,92 @@
+"""
+Keyset (cursor) paginatsiya
+OFFSET o'rniga oxirgi ko'rilgan qator qiymatlaridan keyin davom etadi:
+  WHERE (created_at, id) < (:c, :id) ORDER BY created_at DESC, id DESC LIMIT n
+Shuning uchun chuqur sahifalar ham birinchi sahifa kabi indeks orqali arzon.
+Cursor - tartiblash maydonlari qiymatlarining base64 JSON ko'rinishi.
+"""
+
+import json
+import base64
+import datetime
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder vaqtni millisekundgacha qisqartiradi - cursor uchun to'liq aniqlik kerak"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Noto\'g\'ri cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Noto\'g\'ri cursor')
+    return values
+
+
+def _after(ordering, values):
+    """(a, b, c) > (x, y, z) ni har bir maydon yo'nalishini hisobga olib Q ga aylantiradi"""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
+def _row_value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=100):
+    """
+    Bitta sahifa qaytaradi: (rows, next_cursor).
+    ordering - oxirgisi noyob bo'lishi kerak (masalan ['-created_at', '-id']).
+    next_cursor None bo'lsa - oxirgi sahifa.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        try:
+            queryset = queryset.filter(_after(ordering, decode_cursor(cursor, len(ordering))))
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor('Noto\'g\'ri cursor')
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(_row_value(last, field.lstrip('-')) for field in ordering)
+    return rows, next_cursor
+
+
+def keyset_iterator(queryset, ordering, batch_size=1000):
+    """Butun natijani keyset paketlari bilan aylanib chiqadi (eksport uchun)"""
+    cursor = None
+    while True:
+        rows, cursor = keyset_page(queryset, ordering, cursor, batch_size)
+        yield from rows
+        if cursor is None:
+            return
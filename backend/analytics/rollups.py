@@ -0,0 +1,161 @@
+"""
+Kunlik rollup jadvallarini yuritish
+- Yozish paytidagi oshirishlar: yangi foydalanuvchi, video tugatish, test
+  topshirish, faol o'quvchi, video ko'rishlar
+- Har bir oshirish atomik: qator yo'q bo'lsa ignore_conflicts bilan
+  yaratiladi, keyin F() bilan UPDATE - parallel yozishlar yo'qolmaydi
+- backfill: berilgan oraliq uchun xom jadvallardan qayta hisoblash
+"""
+
+import logging
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyStat, DailyVideoStat, DailyActiveUser, SecurityLog
+
+logger = logging.getLogger('analytics')
+
+# Faol foydalanuvchi kuniga bir marta yoziladi
+ACTIVE_MARK_TIMEOUT = 24 * 60 * 60
+
+
+def _increment(model, keys, **amounts):
+    model.objects.bulk_create([model(**keys)], ignore_conflicts=True)
+    model.objects.filter(**keys).update(**{
+        field: F(field) + amount for field, amount in amounts.items()
+    })
+
+
+def _safe(func):
+    """Rollup xatosi asosiy so'rovni buzmasligi kerak"""
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Rollup yozishda xato ({func.__name__}): {e}")
+    wrapper.__name__ = func.__name__
+    return wrapper
+
+
+@_safe
+def record_new_user(day=None):
+    _increment(DailyStat, {'date': day or timezone.localdate()}, new_users=1)
+
+
+@_safe
+def record_quiz_submission(day=None):
+    _increment(DailyStat, {'date': day or timezone.localdate()}, quiz_submissions=1)
+
+
+@_safe
+def record_completion(video_id, day=None):
+    day = day or timezone.localdate()
+    _increment(DailyStat, {'date': day}, completions=1)
+    _increment(DailyVideoStat, {'date': day, 'video_id': video_id}, completions=1)
+
+
+@_safe
+def record_active_user(user_id, day=None):
+    """Heartbeat lar uchun arzon: kesh belgisi bo'lsa bazaga tegilmaydi"""
+    day = day or timezone.localdate()
+    mark = f"rollup:active:{day.isoformat()}:{user_id}"
+    if cache.get(mark):
+        return
+    DailyActiveUser.objects.bulk_create(
+        [DailyActiveUser(date=day, user_id=user_id)], ignore_conflicts=True,
+    )
+    cache.set(mark, 1, ACTIVE_MARK_TIMEOUT)
+
+
+@_safe
+def record_view(video_id, day=None):
+    """Bitta ko'rish: kunlik qator odatda mavjud - bitta UPDATE"""
+    day = day or timezone.localdate()
+    updated = DailyVideoStat.objects.filter(date=day, video_id=video_id).update(views=F('views') + 1)
+    if not updated:
+        _increment(DailyVideoStat, {'date': day, 'video_id': video_id}, views=1)
+
+
+def _day_bounds(start, end):
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, datetime.min.time()), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), datetime.min.time()), tz),
+    )
+
+
+def backfill(start, end):
+    """
+    [start, end] kunlari uchun rollup larni xom jadvallardan qayta quradi.
+    - ko'rishlar: SecurityLog 'video_access' yozuvlari (metadata.video_id)
+    - tugatishlar: VideoProgress.completed (tugatish vaqti saqlanmaydi,
+      last_watched kuni olinadi)
+    - faol o'quvchilar: video_access loglari va last_watched
+    - yangi foydalanuvchilar va testlar: created_at
+    Qaytaradi: yozilgan kunlar soni.
+    """
+    from accounts.models import User
+    from courses.models import Video, VideoProgress, QuizResult
+
+    since, until = _day_bounds(start, end)
+    in_range = {'created_at__gte': since, 'created_at__lt': until}
+
+    def per_day(queryset, field):
+        return {
+            row['day']: row['total'] for row in
+            queryset.annotate(day=TruncDate(field)).values('day').annotate(total=Count('id')).order_by()
+        }
+
+    new_users = per_day(User.objects.filter(**in_range), 'created_at')
+    quizzes = per_day(QuizResult.objects.filter(**in_range), 'created_at')
+    completed = VideoProgress.objects.filter(
+        completed=True, last_watched__gte=since, last_watched__lt=until,
+    )
+    completions = per_day(completed, 'last_watched')
+
+    video_ids = set(Video.objects.values_list('id', flat=True))
+    video_stats = {}
+    for row in completed.annotate(day=TruncDate('last_watched')).values('day', 'video_id').annotate(
+        total=Count('id'),
+    ).order_by():
+        video_stats.setdefault((row['day'], row['video_id']), {'views': 0, 'completions': 0})['completions'] = row['total']
+
+    access_logs = SecurityLog.objects.filter(action=SecurityLog.Action.VIDEO_ACCESS, **in_range)
+    active = set()
+    for row in access_logs.annotate(day=TruncDate('created_at')).values('day', 'user_id', 'metadata').iterator():
+        video_id = (row['metadata'] or {}).get('video_id')
+        if video_id in video_ids:
+            video_stats.setdefault((row['day'], video_id), {'views': 0, 'completions': 0})['views'] += 1
+        if row['user_id']:
+            active.add((row['day'], row['user_id']))
+    for row in VideoProgress.objects.filter(last_watched__gte=since, last_watched__lt=until).annotate(
+        day=TruncDate('last_watched'),
+    ).values('day', 'user_id').distinct().order_by():
+        active.add((row['day'], row['user_id']))
+
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    with transaction.atomic():
+        DailyStat.objects.filter(date__range=(start, end)).delete()
+        DailyVideoStat.objects.filter(date__range=(start, end)).delete()
+        DailyActiveUser.objects.filter(date__range=(start, end)).delete()
+
+        DailyStat.objects.bulk_create([
+            DailyStat(
+                date=day,
+                new_users=new_users.get(day, 0),
+                completions=completions.get(day, 0),
+                quiz_submissions=quizzes.get(day, 0),
+            ) for day in days
+        ])
+        DailyVideoStat.objects.bulk_create([
+            DailyVideoStat(date=day, video_id=video_id, **values)
+            for (day, video_id), values in video_stats.items()
+        ], batch_size=1000)
+        DailyActiveUser.objects.bulk_create([
+            DailyActiveUser(date=day, user_id=user_id) for day, user_id in active
+        ], batch_size=1000)
+    return len(days)
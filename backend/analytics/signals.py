@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from courses.models import QuizResult
+from . import rollups
+
+@receiver(post_save, sender=get_user_model())
+def user_created(sender, instance, created, **kwargs):
+    """Kunlik yangi foydalanuvchilar rollup i"""
+    if created:
+        rollups.record_new_user()
+
+
+@receiver(post_save, sender=QuizResult)
+def quiz_submitted(sender, instance, created, **kwargs):
+    """Kunlik topshirilgan testlar rollup i"""
+    if created:
+        rollups.record_quiz_submission()
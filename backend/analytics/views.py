@@ -2,18 +2,29 @@
 Analytics views - Admin statistika, loglar
 """
 
-from datetime import timedelta
+import re
+import json
+import ipaddress
+from datetime import datetime, timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Count, Sum, Q, F
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery, Sum, Q, F
+from django.db.models.functions import Coalesce
+from django.db.models.fields.json import KT
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from accounts.models import User
 from accounts.permissions import IsAdmin
-from courses.models import Video, VideoProgress
-from analytics.models import SecurityLog
+from courses.models import Video, VideoProgress, QuizResult
+from analytics.models import SecurityLog, DailyStat, DailyVideoStat, DailyActiveUser
 from analytics.serializers import SecurityLogSerializer
+from analytics.pagination import InvalidCursor, keyset_page, keyset_iterator
+
+META_KEY_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,63}$')
 
 
 from django.core.cache import cache
@@ -21,57 +32,89 @@ from django.core.cache import cache
 class DashboardView(APIView):
     """
     Admin dashboard - umumiy statistika
-    GET /api/admin/analytics/
+    GET /api/admin/analytics/?days=7  (1..365, default 7)
+    Davr ko'rsatkichlari kunlik rollup jadvallaridan olinadi (analytics.rollups)
     """
     permission_classes = [IsAuthenticated, IsAdmin]
 
+    DEFAULT_DAYS = 7
+    MAX_DAYS = 365
+
     def get(self, request):
-        cache_key = 'admin_dashboard_stats'
+        try:
+            days = int(request.query_params.get('days', self.DEFAULT_DAYS))
+        except ValueError:
+            days = self.DEFAULT_DAYS
+        days = min(max(days, 1), self.MAX_DAYS)
+
+        cache_key = f'admin_dashboard_stats:{days}'
         cached_data = cache.get(cache_key)
         if cached_data:
             return Response(cached_data)
 
-        now = timezone.now()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
+        week_ago = timezone.now() - timedelta(days=7)
 
-        # Foydalanuvchilar statistikasi
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_blocked=False, is_active=True).count()
-        new_users_week = User.objects.filter(created_at__gte=week_ago).count()
-        blocked_users = User.objects.filter(is_blocked=True).count()
+        # Foydalanuvchilar statistikasi (bitta so'rov)
+        users = User.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_blocked=False, is_active=True)),
+            blocked=Count('id', filter=Q(is_blocked=True)),
+            new_this_week=Count('id', filter=Q(created_at__gte=week_ago)),
+        )
 
-        # Video statistikasi
-        total_videos = Video.objects.count()
-        published_videos = Video.objects.filter(is_published=True).count()
-        total_views = Video.objects.aggregate(total=Sum('views_count'))['total'] or 0
+        # Video statistikasi (bitta so'rov)
+        videos = Video.objects.aggregate(
+            total=Count('id'),
+            published=Count('id', filter=Q(is_published=True)),
+            total_views=Sum('views_count'),
+        )
+        videos['total_views'] = videos['total_views'] or 0
 
-        # Progress statistikasi
+        # Rollup lar: davr va butun tarix bo'yicha
+        period_stats = DailyStat.objects.filter(date__range=(start, today)).aggregate(
+            new_users=Sum('new_users'),
+            completions=Sum('completions'),
+            quiz_submissions=Sum('quiz_submissions'),
+        )
+        # Butun tarix - rollup emas, xom jadvaldan: rollup faqat heartbeat orqali tugatishlarni
+        # yozadi va o'rnatishdan oldingi tarix (backfill dan tashqari) unda yo'q
         total_completions = VideoProgress.objects.filter(completed=True).count()
-        active_learners = VideoProgress.objects.filter(
-            last_watched__gte=week_ago
-        ).values('user').distinct().count()
+        active_learners = DailyActiveUser.objects.filter(
+            date__range=(start, today),
+        ).values('user_id').distinct().count()
 
         # Daraja bo'yicha video taqsimoti
         level_distribution = Video.objects.values('level').annotate(
             count=Count('id'),
         ).order_by('level')
 
-        # Oxirgi 7 kunlik faollik
+        period_videos = DailyVideoStat.objects.filter(date__range=(start, today))
+
+        # Kunlik faollik (ko'rishlar) - bo'sh kunlar 0 bilan
+        views_by_day = dict(
+            period_videos.values_list('date').annotate(total=Sum('views')).order_by()
+        )
         daily_activity = []
-        for i in range(7):
-            day = now - timedelta(days=i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            count = VideoProgress.objects.filter(
-                last_watched__gte=day_start,
-                last_watched__lt=day_end,
-            ).count()
+        for i in range(days):
+            day = today - timedelta(days=i)
             daily_activity.append({
-                'date': day_start.strftime('%Y-%m-%d'),
-                'views': count,
+                'date': day.strftime('%Y-%m-%d'),
+                'views': views_by_day.get(day, 0),
             })
 
+        views_by_level = list(
+            period_videos.values('video__level').annotate(
+                views=Sum('views'), completions=Sum('completions'),
+            ).order_by('video__level')
+        )
+        top_videos_period = list(
+            period_videos.values('video_id', 'video__title_en').annotate(
+                views=Sum('views'),
+            ).order_by('-views')[:5]
+        )
+
         # Eng ko'p ko'rilgan videolar
         top_videos = Video.objects.order_by('-views_count')[:5].values(
             'id', 'title_en', 'views_count', 'level',
@@ -80,24 +123,28 @@ class DashboardView(APIView):
         response_data = {
             'success': True,
             'data': {
-                'users': {
-                    'total': total_users,
-                    'active': active_users,
-                    'new_this_week': new_users_week,
-                    'blocked': blocked_users,
-                },
-                'videos': {
-                    'total': total_videos,
-                    'published': published_videos,
-                    'total_views': total_views,
+                'period': {
+                    'days': days,
+                    'start': start,
+                    'end': today,
+                    'new_users': period_stats['new_users'] or 0,
+                    'completions': period_stats['completions'] or 0,
+                    'quiz_submissions': period_stats['quiz_submissions'] or 0,
+                    'active_learners': active_learners,
                 },
+                'users': users,
+                'videos': videos,
                 'learning': {
                     'total_completions': total_completions,
-                    'active_learners_week': active_learners,
+                    'active_learners_week': active_learners if days == 7 else DailyActiveUser.objects.filter(
+                        date__gt=today - timedelta(days=7),
+                    ).values('user_id').distinct().count(),
                 },
                 'level_distribution': list(level_distribution),
+                'views_by_level': views_by_level,
                 'daily_activity': daily_activity,
                 'top_videos': list(top_videos),
+                'top_videos_period': top_videos_period,
             },
         }
         # Keshga saqlaymiz (5 daqiqaga, ya'ni 300 soniya)
@@ -182,72 +229,225 @@ class UserAnalyticsView(APIView):
 
 class SecurityLogListView(APIView):
     """
-    Admin: Xavfsizlik loglari
+    Admin: Xavfsizlik loglari (keyset paginatsiya)
     GET /api/admin/logs/
+    Filtrlar: action, user_id, ip, since, until (ISO vaqt),
+              meta_key (metadata da kalit bor), meta_value (meta_key qiymati)
+    Sahifalash: limit (default 100, max 500), cursor (javobdagi next_cursor)
+    Eksport: ?export=ndjson - filtrga mos barcha yozuvlar oqim bilan
     """
     permission_classes = [IsAuthenticated, IsAdmin]
 
-    def get(self, request):
-        logs = SecurityLog.objects.select_related('user').all()
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 500
+    ORDERING = ['-created_at', '-id']
+    EXPORT_FIELDS = (
+        'id', 'user_id', 'user__username', 'action', 'ip_address',
+        'user_agent', 'metadata', 'created_at',
+    )
 
-        # Filtrlar
-        action = request.query_params.get('action', '')
+    def _error(self, message):
+        return Response({
+            'success': False,
+            'error': {'message': message},
+        }, status=400)
+
+    def _filter(self, request, logs):
+        """Filtrlangan queryset yoki xato xabari (str) qaytaradi"""
+        params = request.query_params
+
+        action = params.get('action', '')
         if action:
             logs = logs.filter(action=action)
 
-        user_id = request.query_params.get('user_id', '')
+        user_id = params.get('user_id', '')
         if user_id:
+            if not user_id.isdigit():
+                return 'user_id butun son bo\'lishi kerak'
             logs = logs.filter(user_id=user_id)
 
-        # Oxirgi 100 ta log
-        logs = logs[:100]
-        serializer = SecurityLogSerializer(logs, many=True)
+        ip = params.get('ip', '')
+        if ip:
+            try:
+                ipaddress.ip_address(ip)
+            except ValueError:
+                return 'Noto\'g\'ri IP manzil'
+            logs = logs.filter(ip_address=ip)
+
+        for name, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+            value = params.get(name, '')
+            if value:
+                try:
+                    moment = parse_datetime(value) or _parse_day(value)
+                except ValueError:
+                    moment = None
+                if moment is None:
+                    return f'{name} ISO formatda bo\'lishi kerak'
+                if timezone.is_naive(moment):
+                    moment = timezone.make_aware(moment)
+                logs = logs.filter(**{lookup: moment})
+
+        meta_key = params.get('meta_key', '')
+        if meta_key:
+            if not META_KEY_RE.match(meta_key):
+                return 'Noto\'g\'ri meta_key'
+            meta_value = params.get('meta_value')
+            if meta_value is None:
+                logs = logs.filter(metadata__has_key=meta_key)
+            else:
+                # Qiymat matn sifatida solishtiriladi (JSON dagi 5 va "5" bir xil)
+                logs = logs.annotate(meta_match=KT(f'metadata__{meta_key}')).filter(meta_match=meta_value)
+        return logs
+
+    def get(self, request):
+        logs = self._filter(request, SecurityLog.objects.all())
+        if isinstance(logs, str):
+            return self._error(logs)
 
+        if request.query_params.get('export') == 'ndjson':
+            return self._export(logs)
+
+        try:
+            limit = min(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+        limit = max(limit, 1)
+
+        try:
+            page, next_cursor = keyset_page(
+                logs.select_related('user'), self.ORDERING,
+                request.query_params.get('cursor'), limit,
+            )
+        except InvalidCursor as e:
+            return self._error(str(e))
+
+        serializer = SecurityLogSerializer(page, many=True)
         return Response({
             'success': True,
             'data': serializer.data,
             'count': len(serializer.data),
+            'next_cursor': next_cursor,
         })
 
+    def _export(self, logs):
+        """Yozuvlarni NDJSON oqimi sifatida qaytaradi (xotirada to'planmaydi)"""
+        def lines():
+            rows = keyset_iterator(logs.values(*self.EXPORT_FIELDS), self.ORDERING)
+            for row in rows:
+                row['username'] = row.pop('user__username')
+                yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+        response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="security_logs.ndjson"'
+        return response
+
+
+def _parse_day(value):
+    day = parse_date(value)
+    if day is None:
+        return None
+    return datetime.combine(day, datetime.min.time())
+
+
+def _per_user(queryset, aggregate):
+    """Foydalanuvchi bo'yicha korrelyatsiyalangan subquery (JOIN ko'paytirishisiz)"""
+    return Subquery(
+        queryset.filter(user=OuterRef('pk')).order_by().values('user').annotate(
+            value=aggregate,
+        ).values('value')[:1]
+    )
+
 
 class StudentProgressView(APIView):
     """
     Admin: Talabalar o'zlashtirish ko'rsatkichlari
     GET /api/admin/analytics/students/
+    Parametrlar: sort (date_joined, completed_videos, total_watched_seconds,
+                 total_quizzes_taken, avg_quiz_score, last_active, username),
+                 order (asc/desc, default desc), limit (max 500), cursor
+    Barcha ko'rsatkichlar bitta so'rovda hisoblanadi. Sahifalash (keyset) faqat
+    limit yoki cursor berilganda - aks holda barcha talabalar qaytadi.
     """
     permission_classes = [IsAuthenticated, IsAdmin]
 
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 500
+    SORT_FIELDS = {
+        'date_joined': 'date_joined',
+        'completed_videos': 'completed_videos',
+        'total_watched_seconds': 'total_watched_seconds',
+        'total_quizzes_taken': 'total_quizzes_taken',
+        'avg_quiz_score': 'avg_quiz_score',
+        'last_active': 'last_active',
+        'username': 'username',
+    }
+
     def get(self, request):
+        params = request.query_params
+        sort = params.get('sort', 'date_joined')
+        if sort not in self.SORT_FIELDS:
+            return Response({
+                'success': False,
+                'error': {'message': f"sort quyidagilardan biri bo'lishi kerak: {', '.join(self.SORT_FIELDS)}"},
+            }, status=400)
+        prefix = '' if params.get('order') == 'asc' else '-'
+        ordering = [f'{prefix}{self.SORT_FIELDS[sort]}', f'{prefix}id']
+
         students = User.objects.filter(role='student').annotate(
-            total_watched=Count('video_progress', filter=Q(video_progress__completed=True)),
-            total_watched_seconds=Sum('video_progress__watched_seconds'),
-            total_quizzes_taken=Count('quiz_results', distinct=True)
-        ).order_by('-date_joined')
-
-        data = []
-        for s in students:
-            # Quiz average workaround if annotation fails or is complex
-            quizzes = s.quiz_results.all()
-            avg_quiz = 0
-            if quizzes.exists():
-                avg_quiz = sum(q.score_percentage for q in quizzes) / quizzes.count()
-
-            data.append({
-                'id': s.id,
-                'username': s.username,
-                'full_name': s.get_full_name(),
-                'date_joined': s.date_joined,
-                'completed_videos': s.total_watched,
-                'total_watched_seconds': s.total_watched_seconds or 0,
-                'total_quizzes_taken': s.total_quizzes_taken or 0,
-                'avg_quiz_score': round(avg_quiz, 1),
-                'last_active': s.last_login
-            })
+            completed_videos=Coalesce(
+                _per_user(VideoProgress.objects.filter(completed=True), Count('id')), 0,
+            ),
+            total_watched_seconds=Coalesce(
+                _per_user(VideoProgress.objects.all(), Sum('watched_seconds')), 0,
+            ),
+            total_quizzes_taken=Coalesce(
+                _per_user(QuizResult.objects.all(), Count('id')), 0,
+            ),
+            avg_quiz_score=Coalesce(
+                _per_user(QuizResult.objects.all(), Avg('score_percentage')), 0.0,
+                output_field=FloatField(),
+            ),
+            # last_login bo'sh bo'lsa keyset uchun date_joined olinadi
+            last_active=Coalesce('last_login', 'date_joined'),
+        ).values(
+            'id', 'username', 'first_name', 'last_name', 'date_joined', 'last_login', 'last_active',
+            'completed_videos', 'total_watched_seconds', 'total_quizzes_taken', 'avg_quiz_score',
+        )
 
-        return Response({
+        page, next_cursor = students.order_by(*ordering), None
+        if 'limit' in params or 'cursor' in params:
+            try:
+                limit = min(max(int(params.get('limit', self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+            except ValueError:
+                limit = self.DEFAULT_LIMIT
+            try:
+                page, next_cursor = keyset_page(students, ordering, params.get('cursor') or None, limit)
+            except InvalidCursor as e:
+                return Response({
+                    'success': False,
+                    'error': {'message': str(e)},
+                }, status=400)
+
+        data = [{
+            'id': s['id'],
+            'username': s['username'],
+            'full_name': f"{s['first_name']} {s['last_name']}".strip(),
+            'date_joined': s['date_joined'],
+            'completed_videos': s['completed_videos'],
+            'total_watched_seconds': s['total_watched_seconds'],
+            'total_quizzes_taken': s['total_quizzes_taken'],
+            'avg_quiz_score': round(s['avg_quiz_score'], 1),
+            'last_active': s['last_login'],
+        } for s in page]
+
+        response = {
             'success': True,
-            'data': data
-        })
+            'data': data,
+            'count': len(data),
+        }
+        if 'limit' in params or 'cursor' in params:
+            response['next_cursor'] = next_cursor
+        return Response(response)
 
 
 class QuizPerformanceView(APIView):
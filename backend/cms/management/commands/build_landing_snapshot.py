@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from cms.snapshot import publish, snapshot_dir
+
+class Command(BaseCommand):
+    help = 'Landing sahifa snapshotini (JSON, gzip, brotli) qayta tayyorlaydi - deploy dan keyin ishga tushiring'
+
+    def handle(self, *args, **options):
+        version = publish()
+        self.stdout.write(self.style.SUCCESS(f"Landing snapshot {version} -> {snapshot_dir()}"))
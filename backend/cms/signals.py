@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import LandingPageSection
+from .snapshot import publish_safe
+
+@receiver(post_save, sender=LandingPageSection)
+@receiver(post_delete, sender=LandingPageSection)
+def landing_section_changed(sender, instance, **kwargs):
+    """Admin bo'limni o'zgartirganda landing snapshot qayta tayyorlanadi"""
+    transaction.on_commit(publish_safe)
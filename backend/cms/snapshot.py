@@ -0,0 +1,199 @@
+"""
+Landing sahifaning oldindan tayyorlangan (precompiled) snapshoti
+- publish(): ko'rinadigan bo'limlar bir marta JSON ga serializatsiya qilinadi,
+  versiya = tarkib hash i. LANDING_SNAPSHOT_DIR ga yoziladi:
+    landing-<versiya>.json, .json.gz, .json.br (brotli o'rnatilgan bo'lsa)
+    current.json - joriy versiyaga ko'rsatkich (atomik almashtiriladi)
+- Bo'lim o'zgarganda (signal, tranzaksiya commit bo'lgandan keyin) qayta yoziladi
+- Public so'rovlar xotiradan beriladi: har bir jarayon ko'rsatkich faylining
+  mtime ini tekshiradi (bazaga murojaat yo'q) va o'zgargan bo'lsa qayta o'qiydi
+- Fayllar nginx orqali ham to'g'ridan-to'g'ri berilishi mumkin (gzip_static/brotli_static)
+"""
+
+import os
+import glob
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import brotli
+except ImportError:  # ixtiyoriy - bo'lmasa faqat gzip
+    brotli = None
+
+logger = logging.getLogger('cms')
+
+POINTER_NAME = 'current.json'
+# Eski versiyalar (keshlangan versiyali URL lar uchun) shuncha saqlanadi
+KEEP_VERSIONS = 5
+
+ENCODINGS = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+
+def snapshot_dir():
+    return getattr(settings, 'LANDING_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'landing_snapshots'))
+
+
+def _pointer_path(directory):
+    return os.path.join(directory, POINTER_NAME)
+
+
+def _body_path(directory, version):
+    return os.path.join(directory, f'landing-{version}.json')
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def compile_payload():
+    """Javob tanasi - avvalgi ListAPIView javobi bilan bir xil shaklda"""
+    from .models import LandingPageSection
+    from .serializers import LandingPageSectionSerializer
+
+    sections = LandingPageSection.objects.filter(is_visible=True).order_by('order')
+    results = LandingPageSectionSerializer(sections, many=True).data
+    return JSONRenderer().render({
+        'count': len(results),
+        'next': None,
+        'previous': None,
+        'results': results,
+    })
+
+
+def publish(directory=None):
+    """Snapshotni qayta quradi va joriy qiladi; versiyani qaytaradi"""
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    body = compile_payload()
+    version = hashlib.sha256(body).hexdigest()[:16]
+    path = _body_path(directory, version)
+    if not os.path.exists(path):
+        _write_atomic(f'{path}.gz', gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_atomic(f'{path}.br', brotli.compress(body))
+        _write_atomic(path, body)
+    _write_atomic(_pointer_path(directory), json.dumps({'version': version}).encode())
+    _cleanup(directory, version)
+    store.reload()
+    logger.info(f"Landing snapshot yangilandi: {version}")
+    return version
+
+
+def _cleanup(directory, current):
+    bodies = sorted(glob.glob(os.path.join(directory, 'landing-*.json')), key=os.path.getmtime, reverse=True)
+    for path in bodies[KEEP_VERSIONS:]:
+        if path == _body_path(directory, current):
+            continue
+        for suffix in ('', *ENCODINGS.values()):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def publish_safe():
+    """Signal/on_commit uchun - xato admin so'rovini buzmasligi kerak"""
+    try:
+        publish()
+    except Exception as e:
+        logger.error(f"Landing snapshot yozishda xato: {e}")
+
+
+class Snapshot:
+    def __init__(self, version, variants):
+        self.version = version
+        # encoding ('identity', 'gzip', 'br') -> bytes
+        self.variants = variants
+
+
+class SnapshotStore:
+    """Jarayon xotirasidagi joriy snapshot"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._mtime = None
+
+    def _load(self, directory):
+        with open(_pointer_path(directory), 'rb') as f:
+            version = json.loads(f.read())['version']
+        path = _body_path(directory, version)
+        variants = {}
+        with open(path, 'rb') as f:
+            variants['identity'] = f.read()
+        for encoding, suffix in ENCODINGS.items():
+            try:
+                with open(path + suffix, 'rb') as f:
+                    variants[encoding] = f.read()
+            except FileNotFoundError:
+                pass
+        return Snapshot(version, variants)
+
+    def reload(self):
+        with self._lock:
+            self._mtime = None
+
+    def get(self):
+        """Joriy snapshot; fayl bo'lmasa bir marta quriladi"""
+        directory = snapshot_dir()
+        try:
+            mtime = os.stat(_pointer_path(directory)).st_mtime_ns
+        except FileNotFoundError:
+            publish(directory)
+            mtime = os.stat(_pointer_path(directory)).st_mtime_ns
+
+        if mtime != self._mtime or self._snapshot is None:
+            with self._lock:
+                if mtime != self._mtime or self._snapshot is None:
+                    self._snapshot = self._load(directory)
+                    self._mtime = mtime
+        return self._snapshot
+
+
+store = SnapshotStore()
+
+
+def get_snapshot():
+    return store.get()
+
+
+def _quality(params):
+    """';q=0.5' parametrlaridan q qiymati (yo'q yoki noto'g'ri bo'lsa 1)"""
+    for param in params:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                return float(value.strip())
+            except ValueError:
+                return 1.0
+    return 1.0
+
+
+def choose_encoding(accept_encoding, variants):
+    """Accept-Encoding bo'yicha eng kichik mavjud variant (br > gzip > identity); q=0 - rad etilgan"""
+    accepted, refused = set(), set()
+    for part in (accept_encoding or '').split(','):
+        name, *params = part.split(';')
+        name = name.strip().lower()
+        if name:
+            (accepted if _quality(params) > 0 else refused).add(name)
+    for encoding in ENCODINGS:
+        if encoding in refused or encoding not in variants:
+            continue
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return 'identity'
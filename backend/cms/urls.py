@@ -7,5 +7,6 @@ router.register(r'sections', AdminLandingPageViewSet)
 
 urlpatterns = [
     path('landing/', PublicLandingPageView.as_view(), name='public-landing'),
+    path('landing/<str:version>/', PublicLandingPageView.as_view(), name='public-landing-version'),
     path('admin/', include(router.urls)),
 ]
@@ -1,17 +1,55 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from django.shortcuts import redirect
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import viewsets, permissions, generics
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import LandingPageSection
 from .serializers import LandingPageSectionSerializer
+from .snapshot import get_snapshot, choose_encoding
 
-class PublicLandingPageView(generics.ListAPIView):
+# Versiyasiz URL qisqa muddat keshlanadi va ETag bilan qayta tekshiriladi,
+# versiyali URL tarkibi hech qachon o'zgarmaydi
+LANDING_MAX_AGE = 60
+LANDING_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class PublicLandingPageView(APIView):
     """
     Public Endpoint: Get visible Landing Page Sections in order
+    GET /api/cms/landing/            - joriy snapshot (X-Landing-Version sarlavhasi bilan)
+    GET /api/cms/landing/<version>/  - versiyali, abadiy keshlanadigan nusxa
+    Javob oldindan tayyorlangan snapshotdan beriladi (cms.snapshot) - bazaga murojaat yo'q.
     """
     permission_classes = [permissions.AllowAny]
-    serializer_class = LandingPageSectionSerializer
+    # Token tekshiruvi ham bazaga murojaat qiladi; javob foydalanuvchiga bog'liq emas.
+    # Anonim (IP bo'yicha) limit qoladi - GCRA ombori bazaga tegmaydi
+    authentication_classes = []
+
+    def get(self, request, version=None):
+        snapshot = get_snapshot()
+        if version is not None and version != snapshot.version:
+            return redirect('public-landing-version', version=snapshot.version)
+
+        etag = quote_etag(snapshot.version)
+        if version is not None:
+            cache_control = f'public, max-age={LANDING_IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            cache_control = f'public, max-age={LANDING_MAX_AGE}'
 
-    def get_queryset(self):
-        return LandingPageSection.objects.filter(is_visible=True).order_by('order')
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), snapshot.variants)
+            response = HttpResponse(snapshot.variants[encoding], content_type='application/json')
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+            response['Content-Length'] = len(snapshot.variants[encoding])
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        response['Vary'] = 'Accept-Encoding'
+        response['X-Landing-Version'] = snapshot.version
+        return response
 
 class AdminLandingPageViewSet(viewsets.ModelViewSet):
     """
@@ -3,9 +3,12 @@ Django asosiy sozlamalari - Online English Learning Platform
 """
 
 import os
+import sys
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -56,6 +59,7 @@ MIDDLEWARE = [
     'django.middleware.gzip.GZipMiddleware', # Optimizatsiya: Gzip compression
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'config.throttling.RateLimitHeadersMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -157,7 +161,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework sozlamalari
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -169,14 +173,17 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # GCRA - barcha workerlar uchun umumiy holat (config/throttling.py)
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'config.throttling.GCRAThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '30/minute',
         'user': '100/minute',
         'login': '30/minute',
+        'progress': '30/minute',  # heartbeat har 15 soniyada + pauza/seek
+        'stream': '600/minute',  # HLS segmentlar va Range so'rovlari (IP bo'yicha)
+        'quiz': '10/minute',
     },
     'EXCEPTION_HANDLER': 'config.exceptions.custom_exception_handler',
 }
@@ -205,6 +212,12 @@ if not DEBUG:
         r"^https://.*\.vercel\.app$",
     ]
 CORS_ALLOW_CREDENTIALS = True
+# Bo'laklab yuklash sarlavhalari
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset', 'upload-length')
+CORS_EXPOSE_HEADERS = [
+    'Upload-Offset', 'Upload-Length', 'Location',
+    'RateLimit-Limit', 'RateLimit-Remaining', 'RateLimit-Reset', 'RateLimit-Policy', 'Retry-After',
+]
 
 # Xavfsizlik sozlamalari
 if not DEBUG:
@@ -222,9 +235,88 @@ if not DEBUG:
 VIDEO_SIGNING_KEY = os.getenv('VIDEO_SIGNING_KEY', 'change-this-secret')
 VIDEO_URL_EXPIRY = 3600  # 1 soat
 
+# Video uzatish usuli (imzo va ruxsat tekshiruvi har doim Django da)
+# auto     - media S3 da bo'lsa 's3', aks holda 'django'
+# django   - fayl Django orqali (Range / 206)
+# nginx    - X-Accel-Redirect (internal location orqali)
+# sendfile - X-Sendfile (Apache mod_xsendfile / lighttpd)
+# s3       - imzolangan (presigned) S3 URL ga redirect
+VIDEO_STREAM_BACKEND = os.getenv('VIDEO_STREAM_BACKEND', 'auto')
+VIDEO_ACCEL_REDIRECT_PREFIX = os.getenv('VIDEO_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
+# Transcoding navbati (python manage.py transcode_worker)
+TRANSCODE_WORKERS = int(os.getenv('TRANSCODE_WORKERS', '1'))
+TRANSCODE_JOB_MAX_ATTEMPTS = int(os.getenv('TRANSCODE_JOB_MAX_ATTEMPTS', '3'))
+TRANSCODE_JOB_BACKOFF_SECONDS = int(os.getenv('TRANSCODE_JOB_BACKOFF_SECONDS', '60'))  # 60, 120, 240...
+TRANSCODE_JOB_LEASE_SECONDS = int(os.getenv('TRANSCODE_JOB_LEASE_SECONDS', '600'))
+
+# Video progress heartbeatlari bufer orqali yoziladi (soniya / yozuvlar soni).
+# Bufer jarayon xotirasida: worker majburan o'ldirilsa (SIGKILL, gunicorn timeout)
+# oxirgi PROGRESS_FLUSH_INTERVAL soniyadagi watched_seconds yozilmay qoladi - keyingi
+# heartbeat uni tiklaydi. completed=True va yangi qatorlar darhol yoziladi
+PROGRESS_FLUSH_INTERVAL = int(os.getenv('PROGRESS_FLUSH_INTERVAL', '5'))
+PROGRESS_BUFFER_MAX_SIZE = int(os.getenv('PROGRESS_BUFFER_MAX_SIZE', '1000'))
+
+# SecurityLog yozuvlari fon threadda paketlab yoziladi
+SECURITY_LOG_ASYNC = os.getenv('SECURITY_LOG_ASYNC', 'True').lower() == 'true'
+SECURITY_LOG_FLUSH_INTERVAL = float(os.getenv('SECURITY_LOG_FLUSH_INTERVAL', '2'))
+SECURITY_LOG_BATCH_SIZE = int(os.getenv('SECURITY_LOG_BATCH_SIZE', '200'))
+SECURITY_LOG_QUEUE_SIZE = int(os.getenv('SECURITY_LOG_QUEUE_SIZE', '10000'))
+
+# SecurityLog jadvalida saqlanadigan muddat; eskilari arxivga ko'chiriladi
+# (python manage.py archive_security_logs, o'qish: read_security_archive)
+SECURITY_LOG_RETENTION_DAYS = int(os.getenv('SECURITY_LOG_RETENTION_DAYS', '90'))
+SECURITY_LOG_ARCHIVE_DIR = os.getenv('SECURITY_LOG_ARCHIVE_DIR', str(BASE_DIR / 'archives' / 'security_logs'))
+
+# Kesh: REDIS_URL berilsa barcha workerlar uchun umumiy (test kalitlari, kirish
+# konteksti va h.k.), aks holda har bir jarayonning o'z xotirasi
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Kirish konteksti (courses.access) keshi, soniya. Versiya invalidatsiyasi faqat
+# umumiy keshda barcha workerlarga yetadi, shuning uchun Redis siz qisqa muddat
+ACCESS_CACHE_TIMEOUT = int(os.getenv('ACCESS_CACHE_TIMEOUT', '3600' if REDIS_URL else '60'))
+# Kurs ichidagi darslar indeksi (oldingi/keyingi dars) - xuddi shu sababga ko'ra
+LESSON_INDEX_CACHE_TIMEOUT = int(os.getenv('LESSON_INDEX_CACHE_TIMEOUT', '3600' if REDIS_URL else '60'))
+# Test javoblari kaliti (courses.answer_keys) - eskisi bilan baholanmasligi uchun
+ANSWER_KEY_CACHE_TIMEOUT = int(os.getenv('ANSWER_KEY_CACHE_TIMEOUT', '3600' if REDIS_URL else '60'))
+# Ixcham katalog (courses.catalog) - ETag yangilangach eski matn berilmasligi uchun
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '3600' if REDIS_URL else '60'))
+
+# So'rovlar limiti holati: auto (REDIS_URL bo'lsa redis) | redis | sqlite | memory.
+# sqlite - Redis siz bitta serverdagi barcha workerlar uchun umumiy fayl (kod papkasidan
+# tashqarida). Testlar dev server bilan holatni bo'lishmasligi uchun memory ishlatadi
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', 'memory' if TESTING else 'auto')
+THROTTLE_SQLITE_PATH = os.getenv(
+    'THROTTLE_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'english-learning-throttle.sqlite3')
+)
+
+# Autentifikatsiyada foydalanuvchi yozuvi keshda shuncha saqlanadi (soniya).
+# Bloklash/qurilmani uzish barcha workerlarda darhol kuchga kirishi uchun REDIS_URL shart;
+# Redis siz boshqa workerlar o'zgarishni shu TTL gacha ko'rmasligi mumkin
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60'))
+
+# Landing sahifa snapshoti (python manage.py build_landing_snapshot).
+# Bir nechta serverda umumiy diskda bo'lishi shart - boshqa serverlar current.json ni kuzatadi
+LANDING_SNAPSHOT_DIR = os.getenv('LANDING_SNAPSHOT_DIR', str(BASE_DIR / 'landing_snapshots'))
+
 # Fayl yuklash chegaralari
-FILE_UPLOAD_MAX_MEMORY_SIZE = 500 * 1024 * 1024  # 500MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 500 * 1024 * 1024  # 500MB
+# Shundan katta fayllar xotirada emas, vaqtinchalik faylda saqlanadi
+FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Bo'laklab yuklash (/api/admin/uploads/)
+UPLOAD_SESSION_DIR = os.getenv('UPLOAD_SESSION_DIR', str(BASE_DIR / 'upload_sessions'))
+UPLOAD_CHUNK_MAX_SIZE = int(os.getenv('UPLOAD_CHUNK_MAX_SIZE', str(16 * 1024 * 1024)))  # 16MB
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', str(10 * 1024 * 1024 * 1024)))  # 10GB
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', '24'))
 
 # Admin 2FA
 ADMIN_2FA_ENABLED = os.getenv('ADMIN_2FA_ENABLED', 'False').lower() == 'true'
@@ -253,5 +345,6 @@ LOGGING = {
         'accounts': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
         'courses': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
         'analytics': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'cms': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
     },
 }
@@ -0,0 +1,234 @@
+"""
+Umumiy (barcha workerlar uchun) so'rovlar limiti - GCRA (generic cell rate algorithm)
+- Har bir (scope, foydalanuvchi/IP) uchun bitta son saqlanadi: TAT
+  (theoretical arrival time). Limit N/period bo'lsa har bir so'rov TAT ni
+  period/N ga suradi; TAT - period > hozir bo'lsa so'rov rad etiladi.
+  Vaqt oynasidagi so'rovlar ro'yxati yo'q - har bir so'rov O(1).
+- Holat ombori (THROTTLE_STORE):
+    redis  - REDIS_URL dagi Redis, Lua skript bilan atomik (klaster uchun)
+    sqlite - bitta serverdagi workerlar uchun umumiy fayl (THROTTLE_SQLITE_PATH)
+    memory - faqat joriy jarayon ichida (testlar uchun)
+    auto   - REDIS_URL berilsa redis, aks holda sqlite
+- Scope: view.throttle_scope (login, progress, stream, quiz), bo'lmasa user/anon.
+  Limitlar REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] dan olinadi.
+- Javobga RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset / RateLimit-Policy
+  headerlari qo'shiladi (RateLimitHeadersMiddleware), 429 da Retry-After (DRF)
+- Ombor ishlamay qolsa so'rovlar o'tkaziladi (fail open) va log yoziladi
+"""
+
+import math
+import time
+import sqlite3
+import logging
+import threading
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+# KEYS[1] - kalit, ARGV[1] - emission interval, ARGV[2] - period (soniya).
+# Vaqt Redis serverining o'zidan olinadi - workerlar soatlari farqi ta'sir qilmaydi.
+# Natija: {ruxsat (1/0), TAT - hozir}
+GCRA_SCRIPT = """
+redis.replicate_commands()
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - period > now then
+    return {0, tostring(tat - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(new_tat - now)}
+"""
+
+
+def parse_rate(rate):
+    """'100/minute' -> (100, 60)"""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def gcra(tat, now, interval, period):
+    """(ruxsat, yangi TAT) - saqlangan TAT bo'yicha bitta so'rov qarori"""
+    tat = max(tat or 0, now)
+    new_tat = tat + interval
+    if new_tat - period > now:
+        return False, tat
+    return True, new_tat
+
+
+class RedisStore:
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(GCRA_SCRIPT)
+
+    def update(self, key, interval, period):
+        allowed, offset = self.script(keys=[key], args=[interval, period])
+        return bool(allowed), float(offset)
+
+
+class SQLiteStore:
+    """Bitta server uchun: BEGIN IMMEDIATE - workerlar o'rtasida yozish qulfi"""
+
+    # Shuncha yozuvdan keyin muddati o'tgan kalitlar o'chiriladi
+    CLEANUP_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS gcra (key TEXT PRIMARY KEY, tat REAL NOT NULL)')
+            self.local.conn = conn
+            self.local.writes = 0
+        return conn
+
+    def update(self, key, interval, period):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute('SELECT tat FROM gcra WHERE key = ?', (key,)).fetchone()
+            allowed, tat = gcra(row[0] if row else None, now, interval, period)
+            if allowed:
+                conn.execute(
+                    'INSERT INTO gcra (key, tat) VALUES (?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tat = excluded.tat',
+                    (key, tat),
+                )
+                self.local.writes += 1
+                if self.local.writes % self.CLEANUP_EVERY == 0:
+                    conn.execute('DELETE FROM gcra WHERE tat < ?', (now,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, tat - now
+
+
+class MemoryStore:
+    """Jarayon ichidagi lug'at - workerlar o'rtasida umumiy emas (testlar uchun)"""
+
+    def __init__(self):
+        self.tats = {}
+        self.lock = threading.Lock()
+
+    def update(self, key, interval, period):
+        with self.lock:
+            now = time.time()
+            allowed, tat = gcra(self.tats.get(key), now, interval, period)
+            if allowed:
+                self.tats[key] = tat
+        return allowed, tat - now
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = getattr(settings, 'THROTTLE_STORE', 'auto')
+                redis_url = getattr(settings, 'REDIS_URL', None)
+                if backend == 'memory':
+                    _store = MemoryStore()
+                elif backend == 'redis' or (backend == 'auto' and redis_url):
+                    _store = RedisStore(redis_url)
+                else:
+                    _store = SQLiteStore(settings.THROTTLE_SQLITE_PATH)
+    return _store
+
+
+class RateLimit:
+    """Bitta qaror natijasi - javob headerlari uchun"""
+
+    def __init__(self, limit, period, interval, allowed, offset):
+        self.limit = limit
+        self.period = period
+        self.allowed = allowed
+        self.remaining = max(0, min(limit, math.floor((period - offset) / interval + 1e-9)))
+        self.reset = max(0, math.ceil(offset))
+        # Rad etilganda keyingi so'rov qachon o'tadi
+        self.retry_after = max(0.0, offset + interval - period) if not allowed else None
+
+    def headers(self):
+        return {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.reset),
+            'RateLimit-Policy': f'{self.limit};w={self.period}',
+        }
+
+
+class GCRAThrottle(BaseThrottle):
+    """
+    DEFAULT_THROTTLE_CLASSES uchun yagona throttle - har bir so'rov bitta
+    scope bo'yicha hisoblanadi (heartbeat lar user limitini yemaydi)
+    """
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        return 'user' if request.user and request.user.is_authenticated else 'anon'
+
+    def get_cache_key(self, request, scope):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'throttle:{scope}:{ident}'
+
+    def allow_request(self, request, view):
+        self.ratelimit = None
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if not rate:
+            return True
+
+        limit, period = parse_rate(rate)
+        interval = period / limit
+        try:
+            allowed, offset = get_store().update(self.get_cache_key(request, scope), interval, period)
+        except Exception as e:
+            logger.warning(f"Throttle ombori ishlamadi ({scope}): {e}")
+            return True
+
+        self.ratelimit = RateLimit(limit, period, interval, allowed, offset)
+        # Middleware javobga headerlarni qo'shadi
+        request._request.ratelimit = self.ratelimit
+        return allowed
+
+    def wait(self):
+        return self.ratelimit.retry_after if self.ratelimit else None
+
+
+class RateLimitHeadersMiddleware:
+    """GCRAThrottle qarorini RateLimit-* headerlari sifatida qaytaradi"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        ratelimit = getattr(request, 'ratelimit', None)
+        if ratelimit is not None:
+            for name, value in ratelimit.headers().items():
+                response[name] = value
+        return response
@@ -0,0 +1,131 @@
+"""
+Kursga kirish siyosati (AccessPolicy) - video sahifasi va progress uchun umumiy
+gating tekshiruvlari:
+- student faqat ruxsat etilgan kursdagi videoni ko'ra oladi
+- haftaning ruxsat etilgan kunlari (Course.allowed_days)
+- kunlik yangi darslar limiti (Course.daily_limit)
+- kursni to'liq tugatgan student uchun cheklovlar ishlamaydi
+
+(user, course, kun) uchun kontekst bir marta hisoblanib keshda saqlanadi.
+Kesh signallar orqali yangilanadi: VideoProgress yaratilishi/tugatilishi,
+allowed_courses o'zgarishi, kursdagi videolar nashr qilinishi.
+Invalidatsiya faqat umumiy keshda (REDIS_URL) barcha workerlarga yetadi - aks holda
+boshqa workerlarda eskirish ACCESS_CACHE_TIMEOUT (standart 60 soniya) bilan chegaralanadi.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Video, VideoProgress
+
+
+MSG_NOT_ALLOWED = "Bu videoga ruxsatingiz yo'q"
+MSG_DAY_NOT_ALLOWED = "Siz bu kursga bugun kira olmaysiz. Grafikingiz (Ruxsat etilgan kunlar) bo'yicha kuting."
+MSG_DAILY_LIMIT = "Kunlik dars ochish limitingizga yetdingiz ({limit} ta). Yangi darslarni ertaga ko'rishingiz mumkin."
+
+
+def _timeout():
+    return getattr(settings, 'ACCESS_CACHE_TIMEOUT', 60)
+
+
+def _user_version_key(user_id):
+    return f"access:user:{user_id}:v"
+
+
+def _course_version_key(course_id):
+    return f"access:course:{course_id}:v"
+
+
+def _bump(key):
+    """Versiyani oshiradi - shu versiyaga bog'langan barcha kontekstlar eskiradi"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _context_key(user_id, course_id, today):
+    versions = cache.get_many([_user_version_key(user_id), _course_version_key(course_id)])
+    return "access:ctx:{}:{}:{}:{}:{}".format(
+        user_id, course_id, today.isoformat(),
+        versions.get(_user_version_key(user_id), 0),
+        versions.get(_course_version_key(course_id), 0),
+    )
+
+
+def invalidate_user(user_id):
+    """allowed_courses o'zgarganda foydalanuvchining barcha kontekstlari"""
+    _bump(_user_version_key(user_id))
+
+
+def invalidate_course(course_id):
+    """Kursdagi videolar soni o'zgarganda barcha foydalanuvchilar uchun"""
+    _bump(_course_version_key(course_id))
+
+
+def invalidate(user_id, course_id):
+    """Bitta (user, course) konteksti - bugungi kun uchun"""
+    cache.delete(_context_key(user_id, course_id, timezone.localdate()))
+
+
+def compute_context(user, course_id, today):
+    """Kontekstni bazadan hisoblaydi (keshlanmagan holat)"""
+    progress = list(
+        VideoProgress.objects.filter(user=user, video__course_id=course_id)
+        .values_list('video_id', 'completed', 'created_at__date')
+    )
+    return {
+        'allowed': user.allowed_courses.filter(pk=course_id).exists(),
+        'total_videos': Video.objects.filter(course_id=course_id, is_published=True).count(),
+        'completed_videos': sum(1 for _, completed, _ in progress if completed),
+        'unlocked_video_ids': {video_id for video_id, _, _ in progress},
+        'unlocked_today': sum(1 for _, _, created in progress if created == today),
+    }
+
+
+class AccessPolicy:
+    """
+    Foydalanuvchining videoga kirish huquqini tekshiradi.
+    check() rad etish sababini (xabar) yoki ruxsat bo'lsa None qaytaradi.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.is_admin = getattr(user, 'role', 'student') == 'admin'
+
+    def get_context(self, course_id):
+        today = timezone.localdate()
+        key = _context_key(self.user.pk, course_id, today)
+        context = cache.get(key)
+        if context is None:
+            context = compute_context(self.user, course_id, today)
+            cache.set(key, context, _timeout())
+        return context
+
+    def check(self, video):
+        if self.is_admin or not video.course_id:
+            return None
+
+        course = video.course
+        context = self.get_context(course.pk)
+
+        if not context['allowed']:
+            return MSG_NOT_ALLOWED
+
+        # Barcha videolarni ko'rib bo'lgan bo'lsa, limitlar ishlamaydi
+        total = context['total_videos']
+        if total > 0 and context['completed_videos'] >= total:
+            return None
+
+        # Haftaning ruxsat etilgan kunlari
+        allowed_days = [x.strip() for x in (course.allowed_days or '').split(',') if x.strip()]
+        if allowed_days and str(timezone.localdate().weekday()) not in allowed_days:
+            return MSG_DAY_NOT_ALLOWED
+
+        # Kunlik yangi darslar limiti
+        if course.daily_limit > 0 and video.pk not in context['unlocked_video_ids']:
+            if context['unlocked_today'] >= course.daily_limit:
+                return MSG_DAILY_LIMIT.format(limit=course.daily_limit)
+
+        return None
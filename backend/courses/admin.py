@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, Video, Question, Choice, VideoProgress
+from .models import Course, Video, Question, Choice, VideoProgress, TranscodeJob, VideoUpload
 
 class VideoInline(admin.StackedInline):
     model = Video
@@ -27,7 +27,7 @@ class VideoAdmin(admin.ModelAdmin):
     list_display = ('title_en', 'course', 'level', 'views_count', 'processing_status', 'is_published')
     list_filter = ('course', 'level', 'is_published', 'processing_status')
     search_fields = ('title_en', 'course__title_en')
-    readonly_fields = ('duration_seconds', 'video_preview', 'available_qualities')
+    readonly_fields = ('duration_seconds', 'width', 'height', 'video_codec', 'bitrate', 'fps', 'video_preview', 'available_qualities', 'transcode_stats', 'transcode_progress')
     inlines = [QuestionInline]
     
     fieldsets = (
@@ -38,10 +38,10 @@ class VideoAdmin(admin.ModelAdmin):
             'fields': ('video_file', 'thumbnail', 'video_preview')
         }),
         ('Xususiyatlar', {
-            'fields': ('level', 'order_index', 'is_published', 'duration_seconds')
+            'fields': ('level', 'order_index', 'is_published', 'duration_seconds', 'width', 'height', 'video_codec', 'bitrate', 'fps')
         }),
         ('Transcoding (Sifatlar)', {
-            'fields': ('processing_status', 'available_qualities', 'video_360p', 'video_480p', 'video_720p', 'video_1080p')
+            'fields': ('processing_status', 'available_qualities', 'video_360p', 'video_480p', 'video_720p', 'video_1080p', 'transcode_progress', 'transcode_stats')
         }),
     )
 
@@ -69,20 +69,17 @@ class VideoAdmin(admin.ModelAdmin):
     available_qualities.short_description = "Mavjud sifatlar"
 
     def calculate_duration(self, request, queryset):
-        from moviepy.video.io.VideoFileClip import VideoFileClip
+        from .services import probe_video, apply_probe_metadata
         updated = 0
         for video in queryset:
             if video.video_file:
                 try:
-                    clip = VideoFileClip(video.video_file.path)
-                    video.duration_seconds = int(clip.duration)
-                    clip.close()
-                    video.save(update_fields=['duration_seconds'])
+                    apply_probe_metadata(video, probe_video(video.video_file.path))
                     updated += 1
                 except Exception as e:
                     self.message_user(request, f"Error for {video.title_en}: {e}", level='error')
         self.message_user(request, f"{updated} ta video davomiyligi hisoblandi.")
-    calculate_duration.short_description = "Tanlangan videolar davomiyligini hisoblash"
+    calculate_duration.short_description = "Tanlangan videolar davomiyligini hisoblash (ffprobe)"
 
     actions = [calculate_duration]
 
@@ -96,3 +93,17 @@ class VideoProgressAdmin(admin.ModelAdmin):
     list_display = ('user', 'video', 'watched_seconds', 'completed', 'last_watched')
     list_filter = ('completed', 'last_watched')
     search_fields = ('user__username', 'video__title_en')
+
+@admin.register(TranscodeJob)
+class TranscodeJobAdmin(admin.ModelAdmin):
+    list_display = ('video', 'status', 'priority', 'attempts', 'locked_by', 'run_after', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('video__title_en', 'locked_by')
+    readonly_fields = ('locked_by', 'lease_expires_at', 'last_error', 'created_at', 'updated_at')
+
+@admin.register(VideoUpload)
+class VideoUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'created_by', 'status', 'offset', 'size', 'video', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('filename', 'created_by__username')
+    readonly_fields = ('offset', 'size', 'video', 'created_at', 'updated_at')
@@ -0,0 +1,96 @@
+"""
+Test javoblari kaliti (answer key) - har bir video uchun oldindan tayyorlanadi
+- question_id -> (savol turi, to'g'ri javoblar):
+    text                     -> normallashtirilgan javoblar (uz/ru/en) to'plami
+    choice/true_false/multi  -> to'g'ri variant id lari to'plami
+- Kalit keshda saqlanadi (REDIS_URL berilsa barcha workerlar uchun umumiy),
+  savol yoki variant o'zgarganda signal orqali o'chiriladi (courses.signals).
+  Redis siz o'chirish faqat shu workerga yetadi - boshqalarida eskirish
+  ANSWER_KEY_CACHE_TIMEOUT (standart 60 soniya) bilan chegaralanadi
+- Baholash - kalit bo'yicha toza xotiradagi hisob, savol jadvallariga murojaat yo'q
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Video, Question, Choice
+
+
+def _timeout():
+    return getattr(settings, 'ANSWER_KEY_CACHE_TIMEOUT', 60)
+
+
+def _cache_key(video_id):
+    return f"quiz:answer_key:{video_id}"
+
+
+def normalize_answer(value):
+    return str(value).lower().strip()
+
+
+def compile_answer_key(video_id):
+    """Kalitni bazadan quradi (2 ta so'rov); video topilmasa None"""
+    if not Video.objects.filter(pk=video_id).exists():
+        return None
+
+    questions = {}
+    for question_id, question_type, *answers in Question.objects.filter(video_id=video_id).values_list(
+        'id', 'question_type', 'correct_answer_uz', 'correct_answer_ru', 'correct_answer_en',
+    ):
+        if question_type == Question.QuestionType.TEXT:
+            expected = frozenset(normalize_answer(a) for a in answers if a and a.strip())
+        else:
+            expected = set()
+        questions[question_id] = (question_type, expected)
+
+    for question_id, choice_id in Choice.objects.filter(
+        question__video_id=video_id, is_correct=True,
+    ).values_list('question_id', 'id'):
+        question_type, expected = questions[question_id]
+        if question_type != Question.QuestionType.TEXT:
+            expected.add(choice_id)
+
+    return {
+        question_id: (question_type, frozenset(expected))
+        for question_id, (question_type, expected) in questions.items()
+    }
+
+
+def get_answer_key(video_id):
+    """Keshdan kalit; bo'lmasa quriladi va saqlanadi"""
+    key = cache.get(_cache_key(video_id))
+    if key is None:
+        key = compile_answer_key(video_id)
+        if key is not None:
+            cache.set(_cache_key(video_id), key, _timeout())
+    return key
+
+
+def invalidate_answer_key(video_id):
+    cache.delete(_cache_key(video_id))
+
+
+def _is_correct(question_type, expected, answer):
+    if question_type == Question.QuestionType.TEXT:
+        return normalize_answer(answer) in expected
+    if question_type == Question.QuestionType.MULTI_CHOICE:
+        if not isinstance(answer, list):
+            return False
+        try:
+            return set(map(int, answer)) == expected
+        except (ValueError, TypeError):
+            return False
+    try:
+        return int(answer) in expected
+    except (ValueError, TypeError):
+        return False
+
+
+def grade(answer_key, answers):
+    """answers: {"question_id": javob} -> to'g'ri javoblar soni"""
+    correct_count = 0
+    for question_id, (question_type, expected) in answer_key.items():
+        answer = answers.get(str(question_id)) or answers.get(question_id)
+        if answer and _is_correct(question_type, expected, answer):
+            correct_count += 1
+    return correct_count
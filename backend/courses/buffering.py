@@ -0,0 +1,105 @@
+"""
+Write-behind buferlar uchun umumiy asos
+- Yozuvlar jarayon ichida kalit bo'yicha birlashtiriladi (merge)
+- Fon thread har interval soniyada buferni bitta so'rov bilan yozadi (write)
+- Yozish xato bersa yozuvlar buferga qaytariladi
+- Jarayon to'xtaganda (atexit) qolgan bufer yoziladi
+"""
+
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger('courses')
+
+
+class BackgroundBuffer:
+    """
+    Vorislar merge() va write() ni belgilaydi.
+    interval_setting / max_size_setting - settings dagi sozlama nomlari.
+    """
+    name = 'buffer'
+    interval_setting = None
+    max_size_setting = None
+    default_interval = 5
+    default_max_size = 1000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flusher = None
+        atexit.register(self.flush)
+
+    def merge(self, current, value):
+        """Kalit uchun mavjud qiymat (yoki None) va yangi qiymatni birlashtiradi"""
+        raise NotImplementedError
+
+    def write(self, batch):
+        """{kalit: qiymat} ni bazaga yozadi"""
+        raise NotImplementedError
+
+    def _interval(self):
+        return getattr(settings, self.interval_setting or '', self.default_interval)
+
+    def _max_size(self):
+        return getattr(settings, self.max_size_setting or '', self.default_max_size)
+
+    def _ensure_flusher(self):
+        # gunicorn fork qilgandan keyin har bir workerda o'z thread i ishga tushadi
+        if self.flusher and self.flusher.is_alive():
+            return
+        self.flusher = threading.Thread(target=self._run, name=f'{self.name}-flusher', daemon=True)
+        self.flusher.start()
+
+    def _run(self):
+        stopped = threading.Event()
+        while not stopped.wait(self._interval()):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"{self.name} flush error: {e}", exc_info=True)
+
+    def _merge_into(self, pending, items):
+        for key, value in items:
+            pending[key] = self.merge(pending.get(key), value)
+
+    def add(self, key, value):
+        """Yozuvni buferga qo'shadi; bufer to'lsa shu yerning o'zida yoziladi"""
+        with self.lock:
+            self._merge_into(self.pending, [(key, value)])
+            full = len(self.pending) >= self._max_size()
+        self._ensure_flusher()
+        if full:
+            self.flush()
+
+    def peek(self, key):
+        with self.lock:
+            return self.pending.get(key)
+
+    def pop(self, key):
+        with self.lock:
+            return self.pending.pop(key, None)
+
+    def flush(self):
+        """Buferni yozadi va yozilgan kalitlar sonini qaytaradi"""
+        with self.lock:
+            batch, self.pending = self.pending, {}
+        if not batch:
+            return 0
+        # Fon thread o'z DB ulanishini boshqaradi; so'rov threadidagiga tegilmaydi
+        in_flusher = threading.current_thread() is self.flusher
+        if in_flusher:
+            close_old_connections()
+        try:
+            self.write(batch)
+        except Exception:
+            # Yozilmagan yozuvlar keyingi urinishga qaytariladi
+            with self.lock:
+                self._merge_into(self.pending, batch.items())
+            raise
+        finally:
+            if in_flusher:
+                close_old_connections()
+        return len(batch)
@@ -0,0 +1,197 @@
+"""
+Tilga moslangan ixcham katalog (?compact=1&lang=uz|ru|en)
+- Har bir kurs uchun (kurs, til) bo'yicha tayyor dict lar keshlanadi:
+  kursning o'zi va uning nashr qilingan videolari - faqat so'ralgan tildagi
+  title/description (bo'sh bo'lsa uz, keyin en, keyin ru ga qaytiladi)
+- Javobda faqat jonli qiymatlar qo'shiladi: views_count va foydalanuvchi progressi
+- Kurs yoki video o'zgarganda kurs versiyasi oshiriladi (courses.signals).
+  Versiya faqat umumiy keshda (REDIS_URL) barcha workerlarga yetadi - aks holda
+  boshqa workerlarda eskirish CATALOG_CACHE_TIMEOUT (standart 60 soniya) bilan chegaralanadi
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.fields import DateTimeField
+
+from .models import Course, Video, VideoProgress
+
+LANGUAGES = ('uz', 'ru', 'en')
+FALLBACK_LANGUAGES = ('uz', 'en', 'ru')
+
+# Kursga bog'lanmagan videolar uchun
+NO_COURSE = 'none'
+
+# Shu maydonlar o'zgarmasa (transcoding holati, ko'rishlar...) katalog eskirmaydi
+VIDEO_CATALOG_FIELDS = {
+    'title_uz', 'title_ru', 'title_en', 'description_uz', 'description_ru', 'description_en',
+    'level', 'thumbnail', 'duration_seconds', 'order_index', 'is_published', 'course',
+}
+
+_datetime = DateTimeField()
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60)
+
+
+def resolve_lang(value):
+    return value if value in LANGUAGES else 'uz'
+
+
+def localized(obj, field, lang):
+    """So'ralgan til, bo'sh bo'lsa fallback tillar"""
+    for code in (lang, *FALLBACK_LANGUAGES):
+        value = getattr(obj, f'{field}_{code}', '')
+        if value:
+            return value
+    return ''
+
+
+def _file_url(field_file):
+    return field_file.url if field_file else None
+
+
+def _version_key(course_id):
+    return f"catalog:course:{course_id}:v"
+
+
+def _entry_key(course_id, lang, version):
+    return f"catalog:{course_id}:{lang}:{version}"
+
+
+def invalidate_course_catalog(course_id):
+    """Kursning barcha tillardagi katalogi eskiradi"""
+    key = _version_key(course_id or NO_COURSE)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def course_payload(course, lang):
+    return {
+        'id': course.id,
+        'title': localized(course, 'title', lang),
+        'description': localized(course, 'description', lang),
+        'course_type': course.course_type,
+        'custom_course_type': course.custom_course_type,
+        'thumbnail': _file_url(course.thumbnail),
+        'telegram_group_url': course.telegram_group_url,
+        'daily_limit': course.daily_limit,
+        'allowed_days': course.allowed_days,
+        'created_at': _datetime.to_representation(course.created_at),
+    }
+
+
+def video_payload(video, lang, course_title):
+    return {
+        'id': video.id,
+        'title': localized(video, 'title', lang),
+        'description': localized(video, 'description', lang),
+        'level': video.level,
+        'thumbnail': _file_url(video.thumbnail),
+        'duration_seconds': video.duration_seconds,
+        'order_index': video.order_index,
+        'created_at': _datetime.to_representation(video.created_at),
+        'course': video.course_id,
+        'course_title': course_title,
+    }
+
+
+def _build(course_ids, lang):
+    """Bir nechta kurs katalogini 2 ta so'rov bilan quradi"""
+    real_ids = [pk for pk in course_ids if pk != NO_COURSE]
+    entries = {pk: {'course': None, 'videos': {}} for pk in course_ids}
+    for course in Course.objects.filter(pk__in=real_ids):
+        entries[course.pk]['course'] = course_payload(course, lang)
+
+    videos = Video.objects.filter(is_published=True).only(
+        'id', 'course_id', 'level', 'thumbnail', 'duration_seconds', 'order_index', 'created_at',
+        *[f'{field}_{code}' for field in ('title', 'description') for code in LANGUAGES],
+    ).order_by('order_index', 'id')
+    condition = Q(course_id__in=real_ids)
+    if NO_COURSE in entries:
+        condition |= Q(course__isnull=True)
+    videos = videos.filter(condition)
+    for video in videos:
+        entry = entries[video.course_id or NO_COURSE]
+        course_title = entry['course']['title'] if entry['course'] else None
+        entry['videos'][video.id] = video_payload(video, lang, course_title)
+    return entries
+
+
+def get_catalogs(course_ids, lang):
+    """{course_id: {'course': dict, 'videos': {video_id: dict}}} - keshdan, yo'qlari quriladi"""
+    course_ids = list(dict.fromkeys(pk or NO_COURSE for pk in course_ids))
+    if not course_ids:
+        return {}
+    versions = cache.get_many([_version_key(pk) for pk in course_ids])
+    keys = {pk: _entry_key(pk, lang, versions.get(_version_key(pk), 0)) for pk in course_ids}
+    cached = cache.get_many(list(keys.values()))
+
+    catalogs = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in course_ids if pk not in catalogs]
+    if missing:
+        built = _build(missing, lang)
+        cache.set_many({keys[pk]: entry for pk, entry in built.items()}, _timeout())
+        catalogs.update(built)
+    return catalogs
+
+
+def _absolute(request, payload, field='thumbnail'):
+    url = payload.get(field)
+    if url and url.startswith('/'):
+        payload[field] = request.build_absolute_uri(url)
+    return payload
+
+
+def _select(payload, fields):
+    return {name: value for name, value in payload.items() if name in fields} if fields else payload
+
+
+def compact_courses(request, course_ids, lang, fields=None):
+    catalogs = get_catalogs(course_ids, lang)
+    return [
+        _select(_absolute(request, dict(catalogs[pk]['course'])), fields)
+        for pk in course_ids if catalogs[pk]['course']
+    ]
+
+
+def compact_videos(request, rows, lang, fields=None):
+    """
+    rows - bazadan olingan {'id', 'course_id', 'views_count'} lar (tartib saqlanadi).
+    Progress bitta so'rov bilan qo'shiladi.
+    """
+    catalogs = get_catalogs([row['course_id'] for row in rows], lang)
+    progress = {}
+    if rows and (not fields or 'progress' in fields):
+        progress = {
+            item['video_id']: item for item in VideoProgress.objects.filter(
+                user=request.user, video_id__in=[row['id'] for row in rows],
+            ).values('video_id', 'watched_seconds', 'completed')
+        }
+
+    data = []
+    for row in rows:
+        course_key = row['course_id'] or NO_COURSE
+        payload = catalogs[course_key]['videos'].get(row['id'])
+        if payload is None:
+            # Keshlangandan keyin nashr qilingan - kurs katalogini qayta qurish
+            invalidate_course_catalog(row['course_id'])
+            catalogs.update(get_catalogs([row['course_id']], lang))
+            payload = catalogs[course_key]['videos'].get(row['id'])
+            if payload is None:
+                continue
+
+        payload = _absolute(request, dict(payload))
+        payload['views_count'] = row['views_count']
+        item = progress.get(row['id'])
+        duration = payload['duration_seconds']
+        payload['progress'] = {
+            'watched_seconds': item['watched_seconds'],
+            'completed': item['completed'],
+            'progress_percent': min(100, round(item['watched_seconds'] / duration * 100)) if duration else 0,
+        } if item else None
+        data.append(_select(payload, fields))
+    return data
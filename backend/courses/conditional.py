@@ -0,0 +1,126 @@
+"""
+Shartli GET javoblari (ETag / Last-Modified)
+Validator serializatsiyasiz, bitta-ikkita aggregate so'rov bilan hisoblanadi:
+- ro'yxatdagi yozuvlarning Max(updated_at) va soni (o'chirish ham hisobga olinadi)
+- ko'rishlar soni (views_count update() bilan yoziladi, updated_at o'zgarmaydi)
+- foydalanuvchi progressining "watermark"i: Max(last_watched) va soni
+- so'rov parametrlari (lang, fields, search, cursor ...) va foydalanuvchi
+If-None-Match mos kelsa view umuman ishlamaydi - 304 qaytadi.
+"""
+
+import hashlib
+from functools import wraps
+from django.db.models import Count, Max, Q, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from accounts.authentication import allowed_course_ids
+
+from .models import Course, Video, VideoProgress
+
+
+def make_etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def conditional(validators, public=False):
+    """
+    APIView.get uchun dekorator.
+    validators(request, *args, **kwargs) -> (etag, last_modified) yoki None
+    (None - shartli javob qo'llanmaydi, masalan topilmadi/ruxsat yo'q holatlari).
+    Last-Modified faqat ma'lumot uchun: o'chirishlar uni oshirmaydi,
+    shuning uchun 304 faqat ETag bo'yicha beriladi.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            result = validators(request, *args, **kwargs)
+            if result is None:
+                return method(self, request, *args, **kwargs)
+
+            etag, last_modified = result
+            etag = quote_etag(etag)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if last_modified:
+                    response['Last-Modified'] = http_date(last_modified.timestamp())
+            response['ETag'] = etag
+            # Klient har safar qayta tekshiradi (javob o'zi 304 bo'lib arzon)
+            patch_cache_control(response, no_cache=True, **({'public': True} if public else {'private': True}))
+            return response
+        return wrapper
+    return decorator
+
+
+def _allowed_course_ids(user):
+    """Admin uchun None (barcha kurslar), student uchun ruxsat etilgan kurslar id lari"""
+    if user.role == 'admin':
+        return None
+    return allowed_course_ids(user)
+
+
+def _video_state(videos):
+    return videos.aggregate(
+        last=Max('updated_at'),
+        course_last=Max('course__updated_at'),
+        total=Count('id'),
+        views=Sum('views_count'),
+    )
+
+
+def _progress_state(user, **filters):
+    return VideoProgress.objects.filter(user=user, **filters).aggregate(
+        last=Max('last_watched'), total=Count('id'),
+    )
+
+
+def course_list_validators(request):
+    allowed = _allowed_course_ids(request.user)
+    courses = Course.objects.all() if allowed is None else Course.objects.filter(pk__in=allowed)
+    state = courses.aggregate(last=Max('updated_at'), total=Count('id'))
+    etag = make_etag('courses', allowed, state['last'], state['total'], request.get_full_path())
+    return etag, state['last']
+
+
+def course_detail_validators(request, pk):
+    user = request.user
+    allowed = _allowed_course_ids(user)
+    if allowed is not None and pk not in allowed:
+        return None
+    course = Course.objects.filter(pk=pk).values('updated_at').first()
+    if course is None:
+        return None
+
+    videos = _video_state(Video.objects.filter(course_id=pk, is_published=True))
+    progress = _progress_state(user, video__course_id=pk)
+    etag = make_etag(
+        'course', pk, user.pk, course['updated_at'],
+        videos['last'], videos['total'], videos['views'],
+        progress['last'], progress['total'], request.get_full_path(),
+    )
+    return etag, _latest(course['updated_at'], videos['last'], progress['last'])
+
+
+def video_list_validators(request):
+    user = request.user
+    allowed = _allowed_course_ids(user)
+    videos = Video.objects.filter(is_published=True)
+    if allowed is not None:
+        videos = videos.filter(Q(course__in=allowed) | Q(course__isnull=True))
+
+    state = _video_state(videos)
+    progress = _progress_state(user)
+    etag = make_etag(
+        'videos', user.pk, allowed, state['last'], state['course_last'], state['total'],
+        state['views'], progress['last'], progress['total'], request.get_full_path(),
+    )
+    return etag, _latest(state['last'], state['course_last'], progress['last'])
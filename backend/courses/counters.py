@@ -0,0 +1,24 @@
+"""
+Video ko'rishlar hisoblagichi (Video.views_count)
+- Har bir ko'rish bitta atomik UPDATE (views_count = views_count + 1): o'qib-yozish
+  yo'q, shuning uchun parallel ko'rishlar yo'qolmaydi. Qator qulfi faqat shu
+  bitta so'rov davomida ushlanadi (tranzaksiya ochilmaydi)
+- Xotirada bufer yo'q - worker o'ldirilsa ham hech narsa yo'qolmaydi, admin va
+  dashboard bazadagi aniq qiymatni o'qiydi
+- Xuddi shu ko'rish kunlik rollup ga (analytics.DailyVideoStat) ham yoziladi
+"""
+
+from django.db.models import F
+
+from analytics.rollups import record_view
+
+from .models import Video
+
+
+def increment_views(video_id):
+    """Video ochilganda chaqiriladi; video topilsa True"""
+    updated = Video.objects.filter(pk=video_id).update(views_count=F('views_count') + 1)
+    if updated:
+        # Dashboard uchun kunlik video ko'rishlari
+        record_view(video_id)
+    return bool(updated)
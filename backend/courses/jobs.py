@@ -0,0 +1,235 @@
+"""
+Transcoding navbati - DB asosidagi job jadvali (TranscodeJob)
+- enqueue_transcode: videoni navbatga qo'yish
+- claim_next_job: lease bilan jobni egallash (compare-and-swap UPDATE)
+- run_job: transcodingni bajarish, xatoda backoff bilan qayta urinish
+- run_worker: navbatni doimiy tinglovchi worker sikli
+- queue_overview: operatorlar uchun navbat holati va throughput
+"""
+
+import os
+import socket
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Video, TranscodeJob
+from .services import transcode_video
+
+logger = logging.getLogger('courses')
+
+# Progress shuncha soniya yangilanmasa encode "qotib qolgan" deb belgilanadi
+STUCK_AFTER_SECONDS = 120
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def make_worker_id():
+    """host:pid ko'rinishidagi worker identifikatori"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_transcode(video, priority=0):
+    """
+    Videoni transcoding navbatiga qo'yadi. Video uchun faol (queued/running)
+    job bo'lsa yangisi yaratilmaydi, faqat ustuvorligi oshiriladi.
+    """
+    active = TranscodeJob.objects.filter(
+        video=video,
+        status__in=[TranscodeJob.Status.QUEUED, TranscodeJob.Status.RUNNING],
+    ).first()
+    if active:
+        if priority > active.priority:
+            TranscodeJob.objects.filter(pk=active.pk).update(priority=priority)
+        return active
+
+    job = TranscodeJob.objects.create(
+        video=video,
+        priority=priority,
+        max_attempts=_setting('TRANSCODE_JOB_MAX_ATTEMPTS', 3),
+    )
+    Video.objects.filter(pk=video.pk).update(processing_status='pending')
+    return job
+
+
+def claim_next_job(worker_id, lease_seconds=None):
+    """
+    Navbatdagi eng ustuvor jobni egallaydi. Lease muddati o'tgan 'running'
+    joblar (worker o'lib qolgan) ham qayta olinadi.
+    Egallash shartli UPDATE bilan - faqat bitta worker yutadi (SQLite va
+    PostgreSQL da bir xil ishlaydi). Urinish egallashda hisoblanadi: workerni
+    o'ldiradigan job (OOM, segfault) ham max_attempts dan keyin 'failed' bo'ladi.
+    Job bo'lmasa None.
+    """
+    lease_seconds = lease_seconds or _setting('TRANSCODE_JOB_LEASE_SECONDS', 600)
+    now = timezone.now()
+    candidates = TranscodeJob.objects.filter(
+        Q(status=TranscodeJob.Status.QUEUED, run_after__lte=now) |
+        Q(status=TranscodeJob.Status.RUNNING, lease_expires_at__lt=now)
+    ).order_by('-priority', 'run_after', 'id').values('id', 'video_id', 'status', 'lease_expires_at', 'attempts', 'max_attempts')[:10]
+
+    for candidate in candidates:
+        same_state = TranscodeJob.objects.filter(
+            pk=candidate['id'],
+            status=candidate['status'],
+            lease_expires_at=candidate['lease_expires_at'],
+            attempts=candidate['attempts'],
+        )
+        if candidate['attempts'] >= candidate['max_attempts']:
+            # Oxirgi urinishda worker o'lgan - qayta olinmaydi
+            if same_state.update(
+                status=TranscodeJob.Status.FAILED,
+                locked_by='',
+                lease_expires_at=None,
+                last_error="Worker job bajarilayotganda to'xtadi (lease muddati o'tdi)",
+                updated_at=now,
+            ):
+                Video.objects.filter(pk=candidate['video_id']).update(processing_status='failed')
+                logger.error(f"Transcode job {candidate['id']} failed: worker died on attempt {candidate['attempts']}")
+            continue
+
+        claimed = same_state.update(
+            status=TranscodeJob.Status.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_by=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            updated_at=now,
+        )
+        if claimed:
+            return TranscodeJob.objects.select_related('video').get(pk=candidate['id'])
+    return None
+
+
+class _LeaseKeeper(threading.Thread):
+    """Uzoq davom etadigan encode paytida lease ni muntazam uzaytiradi"""
+
+    def __init__(self, job, worker_id, lease_seconds):
+        super().__init__(daemon=True)
+        self.job_id = job.pk
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                TranscodeJob.objects.filter(
+                    pk=self.job_id, locked_by=self.worker_id,
+                    status=TranscodeJob.Status.RUNNING,
+                ).update(lease_expires_at=timezone.now() + timedelta(seconds=self.lease_seconds))
+        finally:
+            # Thread o'z DB ulanishini yopadi
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def run_job(job, worker_id, lease_seconds=None):
+    """
+    Jobni bajaradi (attempts claim_next_job da oshirilgan). Xatoda
+    eksponensial backoff bilan qayta navbatga qo'yiladi; max_attempts dan keyin 'failed'.
+    """
+    lease_seconds = lease_seconds or _setting('TRANSCODE_JOB_LEASE_SECONDS', 600)
+    keeper = _LeaseKeeper(job, worker_id, lease_seconds)
+    keeper.start()
+    try:
+        ok = transcode_video(job.video_id)
+    except Exception as e:
+        logger.error(f"Transcode job {job.pk} crashed: {e}", exc_info=True)
+        ok = False
+    finally:
+        keeper.stop()
+
+    job.refresh_from_db()
+    if job.locked_by != worker_id:
+        # Lease muddati o'tib, job boshqa workerga o'tgan
+        logger.warning(f"Transcode job {job.pk} lease lost by {worker_id}")
+        return ok
+
+    job.locked_by = ''
+    job.lease_expires_at = None
+
+    if ok:
+        job.status = TranscodeJob.Status.DONE
+        job.last_error = ''
+    else:
+        stats = Video.objects.filter(pk=job.video_id).values_list('transcode_stats', flat=True).first() or {}
+        job.last_error = stats.get('error', 'transcode_video failed')
+        if job.attempts >= job.max_attempts:
+            job.status = TranscodeJob.Status.FAILED
+        else:
+            backoff = _setting('TRANSCODE_JOB_BACKOFF_SECONDS', 60) * (2 ** (job.attempts - 1))
+            job.status = TranscodeJob.Status.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=backoff)
+            Video.objects.filter(pk=job.video_id).update(processing_status='pending')
+    job.save()
+    logger.info(f"Transcode job {job.pk} (video {job.video_id}): {job.status}, attempt {job.attempts}")
+    return ok
+
+
+def run_worker(worker_id=None, poll_interval=5, once=False, should_stop=None):
+    """
+    Worker sikli: job olish -> bajarish -> bo'lmasa kutish.
+    once=True bo'lsa navbat bo'shagach chiqadi.
+    """
+    worker_id = worker_id or make_worker_id()
+    should_stop = should_stop or (lambda: False)
+    logger.info(f"Transcode worker started: {worker_id}")
+
+    while not should_stop():
+        close_old_connections()
+        job = claim_next_job(worker_id)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job, worker_id)
+
+    logger.info(f"Transcode worker stopped: {worker_id}")
+
+
+def queue_overview():
+    """
+    Navbat holati: status bo'yicha sonlar, oxirgi soatdagi throughput va
+    bajarilayotgan joblar progressi (qotib qolganlari belgilangan holda).
+    """
+    now = timezone.now()
+    hour_ago = now - timedelta(hours=1)
+
+    counts = dict(
+        TranscodeJob.objects.values_list('status').annotate(total=Count('id')).order_by()
+    )
+    finished = TranscodeJob.objects.filter(updated_at__gte=hour_ago)
+
+    running = []
+    for job in TranscodeJob.objects.filter(status=TranscodeJob.Status.RUNNING).values(
+        'id', 'video_id', 'video__title_en', 'locked_by', 'attempts',
+        'lease_expires_at', 'video__transcode_progress',
+    ):
+        progress = job.pop('video__transcode_progress') or {}
+        updated_at = parse_datetime(progress.get('updated_at') or '')
+        job['progress'] = progress
+        job['stuck'] = bool(
+            (job['lease_expires_at'] and job['lease_expires_at'] < now) or
+            (updated_at and (now - updated_at).total_seconds() > STUCK_AFTER_SECONDS)
+        )
+        running.append(job)
+
+    return {
+        'counts': {status: counts.get(status, 0) for status in TranscodeJob.Status.values},
+        'last_hour': {
+            'done': finished.filter(status=TranscodeJob.Status.DONE).count(),
+            'failed': finished.filter(status=TranscodeJob.Status.FAILED).count(),
+        },
+        'running': running,
+    }
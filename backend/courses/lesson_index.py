@@ -0,0 +1,49 @@
+"""
+Kurs ichidagi nashr qilingan videolarning tartiblangan indeksi
+[(order_index, video_id), ...] - keshda saqlanadi, oldingi/keyingi dars
+id lari bazaga murojaatsiz topiladi. Video nashr qilinganda, tartibi yoki
+kursi o'zgarganda, o'chirilganda signal orqali yangilanadi (courses.signals).
+O'chirish faqat umumiy keshda (REDIS_URL) barcha workerlarga yetadi - aks holda
+boshqa workerlarda eskirish LESSON_INDEX_CACHE_TIMEOUT (standart 60 soniya) bilan chegaralanadi.
+"""
+
+import bisect
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Video
+
+def _timeout():
+    return getattr(settings, 'LESSON_INDEX_CACHE_TIMEOUT', 60)
+
+
+def _cache_key(course_id):
+    return f"lessons:index:{course_id}"
+
+
+def get_course_index(course_id):
+    index = cache.get(_cache_key(course_id))
+    if index is None:
+        index = list(
+            Video.objects.filter(course_id=course_id, is_published=True)
+            .order_by('order_index', 'id').values_list('order_index', 'id')
+        )
+        cache.set(_cache_key(course_id), index, _timeout())
+    return index
+
+
+def invalidate_course_index(course_id):
+    cache.delete(_cache_key(course_id))
+
+
+def neighbours(video):
+    """(prev_video_id, next_video_id) - order_index bo'yicha qat'iy kichik/katta"""
+    if not video.course_id:
+        return None, None
+    index = get_course_index(video.course_id)
+    orders = [order for order, _ in index]
+    lower = bisect.bisect_left(orders, video.order_index)
+    upper = bisect.bisect_right(orders, video.order_index)
+    prev_id = index[lower - 1][1] if lower > 0 else None
+    next_id = index[upper][1] if upper < len(index) else None
+    return prev_id, next_id
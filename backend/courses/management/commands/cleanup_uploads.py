@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from courses.models import VideoUpload
+from courses.uploads import discard_upload, remove_temp_file
+
+class Command(BaseCommand):
+    help = 'Tugallanmagan eski yuklash sessiyalarini va ularning vaqtinchalik fayllarini o\'chiradi'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=settings.UPLOAD_SESSION_TTL_HOURS,
+            help='Shuncha soatdan beri yangilanmagan sessiyalar o\'chiriladi',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = VideoUpload.objects.filter(updated_at__lt=cutoff).exclude(
+            status=VideoUpload.Status.COMPLETED,
+        )
+
+        count = 0
+        for upload in stale:
+            discard_upload(upload)
+            count += 1
+        # Yakunlangan sessiyalardan qolgan fayllar (masalan, S3 ga nusxalangandan keyin)
+        for upload in VideoUpload.objects.filter(status=VideoUpload.Status.COMPLETED, updated_at__lt=cutoff):
+            remove_temp_file(upload)
+
+        deleted, _ = VideoUpload.objects.filter(
+            updated_at__lt=cutoff, status=VideoUpload.Status.ABORTED,
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"{count} ta sessiya bekor qilindi, {deleted} ta yozuv o'chirildi"))
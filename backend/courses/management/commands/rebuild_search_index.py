@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from courses.models import Video, Course
+from courses.search import rebuild_index, get_backend
+
+class Command(BaseCommand):
+    help = 'Video va kurslar qidiruv indeksini noldan qayta quradi'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if backend.vendor is None:
+            self.stdout.write(self.style.WARNING("Bu baza uchun to'liq matnli indeks yo'q - icontains ishlatiladi"))
+            return
+        total = rebuild_index(Video, Course)
+        self.stdout.write(self.style.SUCCESS(f"{total} ta yozuv indekslandi ({backend.vendor})"))
@@ -1,13 +1,14 @@
 from django.core.management.base import BaseCommand
 from courses.models import Video
-from courses.services import transcode_video
+from courses.jobs import enqueue_transcode
 
 class Command(BaseCommand):
-    help = 'Transcode videos that are pending or all videos'
+    help = 'Videolarni transcoding navbatiga qo\'yadi (bajarish: transcode_worker)'
 
     def add_arguments(self, parser):
         parser.add_argument('--all', action='store_true', help='Reprocess all videos')
         parser.add_argument('--id', type=str, help='Process specific video ID')
+        parser.add_argument('--priority', type=int, default=0, help='Job ustuvorligi (katta = birinchi)')
 
     def handle(self, *args, **options):
         if options['id']:
@@ -18,10 +19,10 @@ class Command(BaseCommand):
             # Default: faqat 'pending' bo'lganlar yoki sifatlari yo'qlar
              videos = Video.objects.filter(processing_status='pending')
 
-        self.stdout.write(f"Found {videos.count()} videos to process...")
+        self.stdout.write(f"Found {videos.count()} videos to enqueue...")
 
         for video in videos:
-            self.stdout.write(f"Processing: {video.title} ({video.id})")
-            transcode_video(video.id)
+            job = enqueue_transcode(video, priority=options['priority'])
+            self.stdout.write(f"Queued: {video.title_en} ({video.id}) -> job {job.id}")
             
-        self.stdout.write(self.style.SUCCESS("Barcha vazifalar bajarildi!"))
+        self.stdout.write(self.style.SUCCESS("Barcha videolar navbatga qo'yildi!"))
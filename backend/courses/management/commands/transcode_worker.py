@@ -0,0 +1,64 @@
+"""
+Transcoding worker - navbatdagi (TranscodeJob) videolarni qayta ishlaydi
+Ishlatish: python manage.py transcode_worker --workers 2
+"""
+
+import os
+import signal
+import multiprocessing
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from courses.jobs import run_worker, make_worker_id
+
+_stop = multiprocessing.Event()
+
+
+def _handle_stop(signum, frame):
+    _stop.set()
+
+
+def _worker_process(poll_interval, once):
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(make_worker_id(), poll_interval, once, should_stop=_stop.is_set)
+
+
+class Command(BaseCommand):
+    help = 'Transcoding navbatini bajaruvchi worker(lar)ni ishga tushiradi'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int,
+            default=getattr(settings, 'TRANSCODE_WORKERS', 1),
+            help='Parallel worker jarayonlar soni',
+        )
+        parser.add_argument('--poll-interval', type=float, default=5, help='Navbat bo\'sh bo\'lganda kutish (soniya)')
+        parser.add_argument('--once', action='store_true', help='Navbat bo\'shagach chiqish')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        poll_interval = options['poll_interval']
+        once = options['once']
+
+        signal.signal(signal.SIGTERM, _handle_stop)
+        signal.signal(signal.SIGINT, _handle_stop)
+
+        self.stdout.write(f"Starting {workers} transcode worker(s)...")
+        if workers == 1 or os.name != 'posix':
+            # Bitta jarayon (Windows da ham ishlaydi)
+            run_worker(make_worker_id(), poll_interval, once, should_stop=_stop.is_set)
+        else:
+            # Fork dan oldin ulanishlarni yopamiz - har bir worker o'z ulanishini ochadi
+            connections.close_all()
+            ctx = multiprocessing.get_context('fork')
+            processes = [
+                ctx.Process(target=_worker_process, args=(poll_interval, once))
+                for _ in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+        self.stdout.write(self.style.SUCCESS("Worker(lar) to'xtadi"))
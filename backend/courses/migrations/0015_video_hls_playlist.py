@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_remove_course_weekly_days_limit_course_allowed_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='hls_playlist',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='HLS master playlist'),
+        ),
+    ]
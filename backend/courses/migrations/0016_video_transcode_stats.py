@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_video_hls_playlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='transcode_stats',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Transcoding statistikasi'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_video_transcode_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscodeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Navbatda'), ('running', 'Bajarilmoqda'), ('done', 'Tayyor'), ('failed', 'Xatolik')], default='queued', max_length=10, verbose_name='Holat')),
+                ('priority', models.IntegerField(default=0, help_text='Katta qiymat birinchi bajariladi', verbose_name='Ustuvorlik')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Urinishlar soni')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Maksimal urinishlar')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Bajarish vaqti')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Lease muddati')),
+                ('last_error', models.TextField(blank=True, verbose_name='Oxirgi xato')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcode_jobs', to='courses.video', verbose_name='Video')),
+            ],
+            options={
+                'verbose_name': 'Transcoding vazifasi',
+                'verbose_name_plural': 'Transcoding vazifalari',
+                'db_table': 'transcode_jobs',
+                'ordering': ['-priority', 'created_at'],
+                'indexes': [models.Index(fields=['status', '-priority', 'run_after'], name='transcode_j_status_e0a36c_idx')],
+            },
+        ),
+    ]
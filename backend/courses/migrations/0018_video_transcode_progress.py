@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_transcodejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='transcode_progress',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Transcoding progressi'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:13
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0019_video_probe_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Fayl nomi')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Umumiy hajm (bayt)')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Yuklangan (bayt)')),
+                ('metadata', models.JSONField(blank=True, default=dict, verbose_name="Video ma'lumotlari")),
+                ('status', models.CharField(choices=[('active', 'Yuklanmoqda'), ('completed', 'Yakunlandi'), ('aborted', 'Bekor qilindi')], default='active', max_length=10, verbose_name='Holat')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='video_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Yuklovchi')),
+                ('video', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to='courses.video', verbose_name='Yaratilgan video')),
+            ],
+            options={
+                'verbose_name': 'Video yuklash sessiyasi',
+                'verbose_name_plural': 'Video yuklash sessiyalari',
+                'db_table': 'video_uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
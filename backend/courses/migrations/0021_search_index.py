@@ -0,0 +1,25 @@
+# Qidiruv indeksi (SQLite: FTS5, PostgreSQL: tsvector + pg_trgm) - jadval
+# modelsiz, bazaga xos SQL bilan yaratiladi va mavjud yozuvlar bilan to'ldiriladi
+
+from django.db import migrations
+
+
+def build_index(apps, schema_editor):
+    from courses import search
+    search.rebuild_index(apps.get_model('courses', 'Video'), apps.get_model('courses', 'Course'))
+
+
+def drop_index(apps, schema_editor):
+    from courses import search
+    search.get_backend().drop()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0020_videoupload'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0021_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videoupload',
+            name='status',
+            field=models.CharField(choices=[('active', 'Yuklanmoqda'), ('writing', "Bo'lak yozilmoqda"), ('completing', 'Yakunlanmoqda'), ('completed', 'Yakunlandi'), ('aborted', 'Bekor qilindi')], default='active', max_length=10, verbose_name='Holat'),
+        ),
+    ]
@@ -4,8 +4,9 @@ Video darslari modellari - Video, VideoProgress, Course, Question, Choice
 
 from django.db import models
 from django.conf import settings
-from moviepy.video.io.VideoFileClip import VideoFileClip
+from django.utils import timezone
 import os
+import uuid
 
 class Course(models.Model):
     """Kurs modeli - video darslarni guruhlash uchun"""
@@ -147,6 +148,9 @@ class Video(models.Model):
     video_1440p = models.FileField(upload_to='videos/1440p/', null=True, blank=True, verbose_name='Video 1440p (2K)')
     video_2160p = models.FileField(upload_to='videos/2160p/', null=True, blank=True, verbose_name='Video 2160p (4K)')
 
+    # HLS (adaptiv bitrate) master playlist - MEDIA_ROOT ga nisbatan yo'l
+    hls_playlist = models.CharField(max_length=255, blank=True, default='', verbose_name='HLS master playlist')
+
     # Jarayon holati
     PROCESSING_STATUS = (
         ('pending', 'Kutilmoqda'),
@@ -160,6 +164,10 @@ class Video(models.Model):
         default='pending',
         verbose_name='Transcoding holati'
     )
+    # Transcoding statistikasi: manba (ffprobe), encode vaqti, sifatlar bo'yicha hajm/vaqt
+    transcode_stats = models.JSONField(default=dict, blank=True, verbose_name='Transcoding statistikasi')
+    # Jonli progress: bosqich, foiz, fps, ETA, sifatlar bo'yicha foiz
+    transcode_progress = models.JSONField(default=dict, blank=True, verbose_name='Transcoding progressi')
 
     # Qo'shimcha ma'lumotlar
     duration_seconds = models.PositiveIntegerField(
@@ -167,6 +175,12 @@ class Video(models.Model):
         verbose_name='Davomiyligi (soniya)',
         editable=False 
     )
+    # Fayl metama'lumotlari (ffprobe orqali transcoding jobida to'ldiriladi)
+    width = models.PositiveIntegerField(default=0, editable=False, verbose_name='Kengligi (px)')
+    height = models.PositiveIntegerField(default=0, editable=False, verbose_name='Balandligi (px)')
+    video_codec = models.CharField(max_length=30, blank=True, editable=False, verbose_name='Video kodek')
+    bitrate = models.PositiveIntegerField(default=0, editable=False, verbose_name='Bitreyt (bit/s)')
+    fps = models.FloatField(default=0, editable=False, verbose_name='Kadr tezligi (fps)')
     is_published = models.BooleanField(
         default=True,
         verbose_name='Nashr etilgan',
@@ -188,17 +202,6 @@ class Video(models.Model):
     def __str__(self):
         return self.title_en
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        if self.video_file and (self.duration_seconds == 0 or not self.duration_seconds):
-            try:
-                clip = VideoFileClip(self.video_file.path)
-                self.duration_seconds = int(clip.duration)
-                clip.close()
-                super().save(update_fields=['duration_seconds'])
-            except Exception as e:
-                print(f"Error calculating duration: {e}")
-
     def get_title(self, lang='uz'):
         """Tanlangan tildagi sarlavhani qaytaradi"""
         titles = {
@@ -342,3 +345,108 @@ class QuizResult(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.video.title_en} ({self.score_percentage}%)"
+
+
+class TranscodeJob(models.Model):
+    """
+    Transcoding navbati (DB asosida).
+    Worker jobni lease bilan egallaydi; worker o'lib qolsa lease muddati
+    o'tgach job boshqa worker tomonidan qayta olinadi.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Navbatda'
+        RUNNING = 'running', 'Bajarilmoqda'
+        DONE = 'done', 'Tayyor'
+        FAILED = 'failed', 'Xatolik'
+
+    video = models.ForeignKey(
+        Video,
+        on_delete=models.CASCADE,
+        related_name='transcode_jobs',
+        verbose_name='Video',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name='Holat',
+    )
+    priority = models.IntegerField(default=0, verbose_name='Ustuvorlik', help_text='Katta qiymat birinchi bajariladi')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Urinishlar soni')
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name='Maksimal urinishlar')
+    run_after = models.DateTimeField(default=timezone.now, verbose_name='Bajarish vaqti')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='Worker')
+    lease_expires_at = models.DateTimeField(null=True, blank=True, verbose_name='Lease muddati')
+    last_error = models.TextField(blank=True, verbose_name='Oxirgi xato')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')
+
+    class Meta:
+        db_table = 'transcode_jobs'
+        verbose_name = 'Transcoding vazifasi'
+        verbose_name_plural = 'Transcoding vazifalari'
+        ordering = ['-priority', 'created_at']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.video_id}: {self.get_status_display()} ({self.attempts}/{self.max_attempts})"
+
+
+class VideoUpload(models.Model):
+    """
+    Bo'laklab (chunked), davom ettiriladigan video yuklash sessiyasi.
+    Bo'laklar vaqtinchalik faylga offset bo'yicha yoziladi, oxirida
+    Video yaratiladi. Uzilishdan keyin offset dan davom ettirish mumkin.
+    """
+
+    class Status(models.TextChoices):
+        ACTIVE = 'active', 'Yuklanmoqda'
+        WRITING = 'writing', 'Bo\'lak yozilmoqda'
+        COMPLETING = 'completing', 'Yakunlanmoqda'
+        COMPLETED = 'completed', 'Yakunlandi'
+        ABORTED = 'aborted', 'Bekor qilindi'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='video_uploads',
+        verbose_name='Yuklovchi',
+    )
+    filename = models.CharField(max_length=255, verbose_name='Fayl nomi')
+    size = models.PositiveBigIntegerField(verbose_name='Umumiy hajm (bayt)')
+    offset = models.PositiveBigIntegerField(default=0, verbose_name='Yuklangan (bayt)')
+    metadata = models.JSONField(default=dict, blank=True, verbose_name='Video ma\'lumotlari')
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.ACTIVE,
+        verbose_name='Holat',
+    )
+    video = models.ForeignKey(
+        Video,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='uploads',
+        verbose_name='Yaratilgan video',
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan sana')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')
+
+    class Meta:
+        db_table = 'video_uploads'
+        verbose_name = 'Video yuklash sessiyasi'
+        verbose_name_plural = 'Video yuklash sessiyalari'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def temp_path(self):
+        """Bo'laklar yoziladigan vaqtinchalik fayl"""
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f"{self.id}.part")
@@ -0,0 +1,143 @@
+"""
+VideoProgress heartbeatlari uchun write-behind bufer
+- Har bir (user, video) uchun heartbeatlar jarayon ichida birlashtiriladi
+  (eng katta watched_seconds, completed "yopishqoq")
+- Fon thread har PROGRESS_FLUSH_INTERVAL soniyada buferni bitta UPDATE bilan
+  yozadi: watched_seconds = MAX(eski, yangi), shuning uchun parallel workerlar
+  ham progressni orqaga qaytara olmaydi
+- Yangi (user, video) qatori va completed=True darhol bazaga yoziladi -
+  kunlik limit va kursni tugatish tekshiruvlari kechikmasligi uchun.
+  Tugatish shartli UPDATE (completed=False -> True) bilan aniqlanadi: qator
+  keshi jarayonga xos bo'lsa ham tugatish rollup ga faqat bir marta tushadi
+- Jarayon to'xtaganda (atexit) qolgan bufer yoziladi (buffering.BackgroundBuffer).
+  Bufer jarayon xotirasida: worker SIGKILL / gunicorn timeout bilan o'ldirilsa
+  oxirgi PROGRESS_FLUSH_INTERVAL soniyadagi watched_seconds o'sishlari yo'qoladi.
+  Heartbeat mutlaq pozitsiyani yuboradi, shuning uchun keyingi heartbeat
+  (istalgan workerga) yo'qolganini tiklaydi; tugatish buferga tushmaydi
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from analytics import rollups
+
+from .models import VideoProgress
+from .buffering import BackgroundBuffer
+from . import access
+
+# (user_id, video_id) -> progress qatori pk si keshlanadi
+ROW_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _row_key(user_id, video_id):
+    return f"progress:row:{user_id}:{video_id}"
+
+
+def forget_row(user_id, video_id):
+    """Qator admin tomonidan o'zgartirilganda yoki o'chirilganda"""
+    cache.delete(_row_key(user_id, video_id))
+
+
+class ProgressBuffer(BackgroundBuffer):
+    """Heartbeat buferi: pk -> {'watched_seconds': int, 'completed': bool}"""
+    name = 'progress'
+    interval_setting = 'PROGRESS_FLUSH_INTERVAL'
+    max_size_setting = 'PROGRESS_BUFFER_MAX_SIZE'
+
+    def merge(self, current, value):
+        if current is None:
+            return dict(value)
+        return {
+            'watched_seconds': max(current['watched_seconds'], value['watched_seconds']),
+            'completed': current['completed'] or value['completed'],
+        }
+
+    def write(self, batch):
+        write_rows(batch)
+
+
+def write_rows(batch):
+    """
+    {pk: {'watched_seconds', 'completed'}} ni bitta UPDATE ga aylantiradi.
+    watched_seconds faqat oshadi, completed faqat True ga o'tadi.
+    """
+    completed_pks = [pk for pk, entry in batch.items() if entry['completed']]
+    with transaction.atomic():
+        VideoProgress.objects.filter(pk__in=list(batch)).update(
+            watched_seconds=Greatest(
+                F('watched_seconds'),
+                Case(
+                    *[When(pk=pk, then=Value(entry['watched_seconds'])) for pk, entry in batch.items()],
+                    default=F('watched_seconds'),
+                    output_field=PositiveIntegerField(),
+                ),
+            ),
+            completed=Case(
+                When(pk__in=completed_pks, then=Value(True)),
+                default=F('completed'),
+            ),
+            last_watched=timezone.now(),
+        )
+
+
+buffer = ProgressBuffer()
+
+
+def _get_row(user, video):
+    """
+    (user, video) uchun progress qatorini keshdan oladi, bo'lmasa yaratadi.
+    Qaytaradi: (row, created) - row = {'pk', 'watched_seconds', 'completed'}
+    """
+    key = _row_key(user.pk, video.pk)
+    row = cache.get(key)
+    if row is not None:
+        return row, False
+    progress, created = VideoProgress.objects.get_or_create(user=user, video=video)
+    row = {
+        'pk': progress.pk,
+        'watched_seconds': progress.watched_seconds,
+        'completed': progress.completed,
+    }
+    cache.set(key, row, ROW_CACHE_TIMEOUT)
+    return row, created
+
+
+def record_heartbeat(user, video, watched_seconds, completed=False):
+    """
+    Heartbeatni qabul qiladi va foydalanuvchiga ko'rinadigan holatni qaytaradi.
+    Oddiy heartbeat buferga tushadi; completed=True bo'lsa bufer shu qator
+    uchun darhol bazaga yoziladi va kirish keshi yangilanadi.
+    """
+    row, _ = _get_row(user, video)
+    rollups.record_active_user(user.pk)
+    row['watched_seconds'] = max(row['watched_seconds'], watched_seconds)
+    newly_completed = completed and not row['completed']
+    row['completed'] = row['completed'] or completed
+
+    if newly_completed:
+        pending = buffer.pop(row['pk']) or {}
+        watched = max(row['watched_seconds'], pending.get('watched_seconds', 0))
+        # Faqat qatorni haqiqatda o'zgartirgan so'rov tugatishni hisoblaydi
+        changed = VideoProgress.objects.filter(pk=row['pk'], completed=False).update(
+            completed=True,
+            watched_seconds=Greatest(F('watched_seconds'), Value(watched)),
+            last_watched=timezone.now(),
+        )
+        if changed:
+            if video.course_id:
+                access.invalidate(user.pk, video.course_id)
+            rollups.record_completion(video.pk)
+        else:
+            # Boshqa worker allaqachon tugatgan - faqat progress yoziladi
+            write_rows({row['pk']: {'watched_seconds': watched, 'completed': True}})
+    else:
+        buffer.add(row['pk'], {
+            'watched_seconds': row['watched_seconds'],
+            'completed': row['completed'],
+        })
+
+    cache.set(_row_key(user.pk, video.pk), row, ROW_CACHE_TIMEOUT)
+    return row
@@ -0,0 +1,335 @@
+"""
+Video va kurslar bo'yicha ko'p tilli to'liq matnli qidiruv
+- Hujjat: uz/ru/en sarlavhalar (yuqori vazn) va tavsiflar
+- SQLite: FTS5 jadvali (bm25 reyting, prefiks "so'z*"), xato yozilgan so'zlar
+  fts5vocab lug'atidan eng yaqin term bilan almashtiriladi
+- PostgreSQL: tsvector ('simple' konfiguratsiya - o'zbek tili uchun lug'at yo'q)
+  GIN indeks bilan, prefiks 'so'z:*', xatolarga chidamlilik pg_trgm orqali
+- Boshqa bazalar yoki indeks yo'q bo'lsa: icontains (eski xatti-harakat)
+Indeks signal orqali har saqlashda yangilanadi (courses.signals),
+to'liq qayta qurish: python manage.py rebuild_search_index
+"""
+
+import re
+import difflib
+import logging
+import unicodedata
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+logger = logging.getLogger('courses')
+
+SEARCH_TABLE = 'search_index'
+VOCAB_TABLE = 'search_index_vocab'
+
+# Qidiruvdan qaytadigan eng ko'p id (reyting bo'yicha)
+MAX_RESULTS = 1000
+# Xatoga chidamlilik: difflib / pg_trgm o'xshashlik chegarasi
+FUZZY_CUTOFF = 0.75
+TRIGRAM_THRESHOLD = 0.4
+
+TITLE_FIELDS = ('title_uz', 'title_ru', 'title_en')
+BODY_FIELDS = ('description_uz', 'description_ru', 'description_en')
+
+# O'zbek lotin yozuvidagi apostrof variantlari: o', g', ʻ, ’, `
+APOSTROPHES_RE = re.compile(r"['‘’ʻʼ`]")
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_text(text):
+    """Hujjat va so'rov uchun bir xil normallashtirish"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = APOSTROPHES_RE.sub('', text)
+    return text.replace('ё', 'е')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize_text(text))
+
+
+def build_document(obj):
+    """Model obyektidan (tarixiy modellar ham) indekslanadigan matn"""
+    title = ' '.join(getattr(obj, f, '') or '' for f in TITLE_FIELDS)
+    body = ' '.join(getattr(obj, f, '') or '' for f in BODY_FIELDS)
+    return normalize_text(title), normalize_text(body)
+
+
+# ===================== BACKENDS =====================
+
+# Indeks jadvali mavjudligi jarayon ichida bir marta tekshiriladi: (vendor, baza nomi) -> bool
+_availability = {}
+
+
+def _connection_key():
+    return connection.vendor, connection.settings_dict.get('NAME')
+
+
+def forget_availability():
+    """Indeks jadvali yaratilganda yoki o'chirilganda"""
+    _availability.clear()
+
+
+class FallbackBackend:
+    """FTS mavjud bo'lmaganda - oddiy icontains filtri"""
+    vendor = None
+
+    def available(self):
+        """Har saqlash/qidiruvda katalog so'rovi bo'lmasligi uchun keshlangan"""
+        key = _connection_key()
+        if key not in _availability:
+            _availability[key] = self.check_available()
+        return _availability[key]
+
+    def check_available(self):
+        return True
+
+    def create(self):
+        pass
+
+    def drop(self):
+        pass
+
+    def upsert(self, kind, obj):
+        pass
+
+    def delete(self, kind, obj_id):
+        pass
+
+    def search(self, kind, query, limit=MAX_RESULTS):
+        return None
+
+
+class SQLiteBackend(FallbackBackend):
+    vendor = 'sqlite'
+
+    def check_available(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [SEARCH_TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    def create(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                "kind UNINDEXED, obj_id UNINDEXED, title, body, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({SEARCH_TABLE}, 'row')"
+            )
+        forget_availability()
+
+    def drop(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {VOCAB_TABLE}")
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+        forget_availability()
+
+    def upsert(self, kind, obj):
+        title, body = build_document(obj)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND obj_id = %s", [kind, obj.pk])
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (kind, obj_id, title, body) VALUES (%s, %s, %s, %s)",
+                [kind, obj.pk, title, body],
+            )
+
+    def delete(self, kind, obj_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND obj_id = %s", [kind, obj_id])
+
+    def _correct(self, cursor, tokens):
+        """Lug'atda yo'q so'zlarni eng yaqin term bilan almashtiradi"""
+        corrected = []
+        for token in tokens:
+            cursor.execute(f"SELECT 1 FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s LIMIT 1",
+                           [token, token + '￿'])
+            if cursor.fetchone():
+                corrected.append(token)
+                continue
+            # Faqat bosh harfi bir xil termlar orasidan qidiramiz
+            cursor.execute(f"SELECT term FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s",
+                           [token[0], token[0] + '￿'])
+            candidates = [row[0] for row in cursor.fetchall()]
+            match = difflib.get_close_matches(token, candidates, n=1, cutoff=FUZZY_CUTOFF)
+            corrected.append(match[0] if match else token)
+        return corrected
+
+    def _match(self, cursor, kind, tokens, limit):
+        expression = ' AND '.join(f'"{token}"*' for token in tokens)
+        cursor.execute(
+            f"SELECT obj_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND kind = %s "
+            f"ORDER BY bm25({SEARCH_TABLE}, 0, 0, 10.0, 1.0) LIMIT %s",
+            [expression, kind, limit],
+        )
+        return [int(row[0]) for row in cursor.fetchall()]
+
+    def search(self, kind, query, limit=MAX_RESULTS):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with connection.cursor() as cursor:
+            ids = self._match(cursor, kind, tokens, limit)
+            if not ids:
+                corrected = self._correct(cursor, tokens)
+                if corrected != tokens:
+                    ids = self._match(cursor, kind, corrected, limit)
+        return ids
+
+
+class PostgresBackend(FallbackBackend):
+    vendor = 'postgresql'
+
+    def check_available(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [SEARCH_TABLE])
+            return cursor.fetchone()[0] is not None
+
+    def create(self):
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                "kind varchar(16) NOT NULL, obj_id bigint NOT NULL, "
+                "title text NOT NULL, body text NOT NULL, "
+                "document tsvector NOT NULL, "
+                "PRIMARY KEY (kind, obj_id))"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx "
+                f"ON {SEARCH_TABLE} USING GIN (document)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_title_trgm_idx "
+                f"ON {SEARCH_TABLE} USING GIN (title gin_trgm_ops)"
+            )
+        forget_availability()
+
+    def drop(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+        forget_availability()
+
+    def upsert(self, kind, obj):
+        title, body = build_document(obj)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (kind, obj_id, title, body, document) "
+                "VALUES (%s, %s, %s, %s, "
+                "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'D')) "
+                "ON CONFLICT (kind, obj_id) DO UPDATE SET "
+                "title = EXCLUDED.title, body = EXCLUDED.body, document = EXCLUDED.document",
+                [kind, obj.pk, title, body, title, body],
+            )
+
+    def delete(self, kind, obj_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND obj_id = %s", [kind, obj_id])
+
+    def search(self, kind, query, limit=MAX_RESULTS):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        tsquery = ' & '.join(f"{token}:*" for token in tokens)
+        text = ' '.join(tokens)
+        # "%s <% title" operatori GIN (gin_trgm_ops) indeksidan foydalanadi, chegara
+        # faqat shu tranzaksiya uchun o'rnatiladi; word_similarity() faqat tartiblashda
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(TRIGRAM_THRESHOLD)],
+            )
+            cursor.execute(
+                f"SELECT obj_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) AS q "
+                "WHERE kind = %s AND (document @@ q OR %s <%% title) "
+                "ORDER BY ts_rank(document, q) + word_similarity(%s, title) DESC LIMIT %s",
+                [tsquery, kind, text, text, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, FallbackBackend)()
+
+
+# ===================== API =====================
+
+def index_object(kind, obj):
+    """Saqlangan obyektni indeksga yozadi (signal orqali)"""
+    try:
+        backend = get_backend()
+        if backend.available():
+            backend.upsert(kind, obj)
+    except Exception as e:
+        logger.error(f"Qidiruv indeksini yangilashda xato ({kind} {obj.pk}): {e}")
+
+
+def unindex_object(kind, obj_id):
+    try:
+        backend = get_backend()
+        if backend.available():
+            backend.delete(kind, obj_id)
+    except Exception as e:
+        logger.error(f"Qidiruv indeksidan o'chirishda xato ({kind} {obj_id}): {e}")
+
+
+def rebuild_index(video_model, course_model):
+    """Indeksni noldan quradi; indekslangan obyektlar sonini qaytaradi"""
+    backend = get_backend()
+    backend.drop()
+    backend.create()
+    total = 0
+    for kind, model in (('video', video_model), ('course', course_model)):
+        for obj in model.objects.only('pk', *TITLE_FIELDS, *BODY_FIELDS).iterator():
+            backend.upsert(kind, obj)
+            total += 1
+    return total
+
+
+NO_RANK = Value(0, output_field=IntegerField())
+
+
+def _icontains(fields, query):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+    return condition
+
+
+def apply_search(queryset, kind, query, fields=TITLE_FIELDS + BODY_FIELDS):
+    """
+    queryset ni qidiruv natijasi bilan filtrlaydi va reyting bo'yicha
+    tartiblaydi (search_rank annotatsiyasi, 0 - eng mos).
+    FTS mavjud bo'lmasa fields bo'yicha icontains ishlatiladi.
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    backend = get_backend()
+    ids = None
+    try:
+        if backend.available():
+            ids = backend.search(kind, query)
+    except Exception as e:
+        logger.error(f"Qidiruvda xato, icontains ishlatiladi: {e}")
+        ids = None
+
+    if ids is None:
+        return queryset.filter(_icontains(fields, query)).annotate(search_rank=NO_RANK)
+    if not ids:
+        return queryset.none().annotate(search_rank=NO_RANK)
+    ranking = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    # search_rank - cursor paginatsiya uchun ham tartiblash maydoni
+    return queryset.filter(pk__in=ids).annotate(search_rank=ranking).order_by('search_rank')
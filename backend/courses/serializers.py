@@ -4,6 +4,27 @@ Courses serializers - Video va progress uchun serializerlar
 
 from rest_framework import serializers
 from .models import Course, Video, VideoProgress, Question, Choice
+from .lesson_index import neighbours
+
+
+def parse_fields(value):
+    """?fields=id,title,progress -> ['id', 'title', 'progress'] (bo'sh bo'lsa None)"""
+    fields = [name.strip() for name in (value or '').split(',') if name.strip()]
+    return fields or None
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldset: fields=[...] berilsa faqat shu maydonlar serializatsiya qilinadi.
+    Noma'lum nomlar e'tiborsiz qoldiriladi.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 class ChoiceSerializer(serializers.ModelSerializer):
@@ -126,7 +147,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         return instance
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Kurs serializer"""
     title = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
@@ -152,21 +173,27 @@ class CourseSerializer(serializers.ModelSerializer):
         return obj.get_description(lang)
 
 
-class VideoListSerializer(serializers.ModelSerializer):
+class VideoListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Video ro'yxat serializer (qisqacha ma'lumot)"""
+    title = serializers.SerializerMethodField()
     progress = serializers.SerializerMethodField()
     course_title = serializers.SerializerMethodField()
 
     class Meta:
         model = Video
         fields = [
-            'id', 'title_uz', 'title_ru', 'title_en',
+            'id', 'title', 'title_uz', 'title_ru', 'title_en',
             'description_uz', 'description_ru', 'description_en',
             'level', 'thumbnail', 'duration_seconds',
             'views_count', 'order_index', 'is_published',
             'created_at', 'progress', 'course_title', 'course'
         ]
 
+    def get_title(self, obj):
+        request = self.context.get('request')
+        lang = request.query_params.get('lang', 'uz') if request else 'uz'
+        return obj.get_title(lang)
+
     def get_progress(self, obj):
         """Joriy foydalanuvchining progressini qaytaradi (Optimized)"""
         # 1. Agar viewda prefetch_related qilingan bo'lsa (user_progress list)
@@ -225,6 +252,7 @@ class VideoDetailSerializer(serializers.ModelSerializer):
     next_video_id = serializers.SerializerMethodField()
     prev_video_id = serializers.SerializerMethodField()
     telegram_group_url = serializers.SerializerMethodField()
+    hls_available = serializers.SerializerMethodField()
 
     class Meta:
         model = Video
@@ -237,47 +265,46 @@ class VideoDetailSerializer(serializers.ModelSerializer):
             'questions', 'next_video_id', 'prev_video_id', 'course',
             'telegram_group_url',
             'video_360p', 'video_480p', 'video_720p', 'video_1080p',
-            'video_1440p', 'video_2160p'
+            'video_1440p', 'video_2160p', 'hls_available'
         ]
 
+    def get_hls_available(self, obj):
+        return bool(obj.hls_playlist)
+
     def get_telegram_group_url(self, obj):
         if obj.course:
             return obj.course.telegram_group_url
         return None
 
     def get_progress(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                progress = VideoProgress.objects.get(user=request.user, video=obj)
-                return {
-                    'watched_seconds': progress.watched_seconds,
-                    'completed': progress.completed,
-                    'progress_percent': progress.progress_percent,
-                }
-            except VideoProgress.DoesNotExist:
-                pass
+        # View da prefetch qilingan bo'lsa (user_progress) - qo'shimcha so'rov yo'q
+        if hasattr(obj, 'user_progress'):
+            progress = obj.user_progress[0] if obj.user_progress else None
+        else:
+            request = self.context.get('request')
+            progress = None
+            if request and request.user.is_authenticated:
+                progress = VideoProgress.objects.filter(user=request.user, video=obj).first()
+        if progress:
+            return {
+                'watched_seconds': progress.watched_seconds,
+                'completed': progress.completed,
+                'progress_percent': progress.progress_percent,
+            }
         return None
 
+    def _neighbours(self, obj):
+        # Keshlangan kurs indeksidan, har bir video uchun bir marta
+        cached = getattr(self, '_lesson_neighbours', None)
+        if cached is None or cached[0] != obj.pk:
+            self._lesson_neighbours = cached = (obj.pk, neighbours(obj))
+        return cached[1]
+
     def get_next_video_id(self, obj):
-        if not obj.course:
-            return None
-        next_vid = Video.objects.filter(
-            course=obj.course, 
-            order_index__gt=obj.order_index,
-            is_published=True
-        ).order_by('order_index').first()
-        return next_vid.id if next_vid else None
+        return self._neighbours(obj)[1]
 
     def get_prev_video_id(self, obj):
-        if not obj.course:
-            return None
-        prev_vid = Video.objects.filter(
-            course=obj.course, 
-            order_index__lt=obj.order_index,
-            is_published=True
-        ).order_by('-order_index').first()
-        return prev_vid.id if prev_vid else None
+        return self._neighbours(obj)[0]
 
 
 class AdminVideoSerializer(serializers.ModelSerializer):
@@ -288,6 +315,8 @@ class AdminVideoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Video
         fields = '__all__'
+        # Transcoding worker i yozadigan maydonlar - admin tahrirlashi ularni buzmasligi kerak
+        read_only_fields = ['transcode_progress', 'transcode_stats', 'hls_playlist']
 
     def get_total_views(self, obj):
         return obj.views_count
@@ -1,103 +1,466 @@
 import os
+import json
+import time
+import shutil
+import threading
 import subprocess
+from collections import deque
 from django.conf import settings
+from django.utils import timezone
 from .models import Video
 
+# HLS segment uzunligi (soniya). Barcha sifatlarda keyframe shu oraliqda
+# majburan qo'yiladi, shunda segmentlar bir-biriga mos keladi va player
+# sifatni segment chegarasida almashtira oladi.
+HLS_SEGMENT_SECONDS = 6
+HLS_AUDIO_BITRATE = 128000
+
+# Progressni bazaga yozish oralig'i (soniya) - har bir ffmpeg qatorida emas
+PROGRESS_WRITE_INTERVAL = 2
+
+# Sifatlar zinasi (scale=-2:height aspect ratio saqlash uchun, -2 ffmpeg talabi)
+QUALITY_LADDER = [
+    {'name': '360p', 'height': 360, 'bitrate': '800k', 'field': 'video_360p'},
+    {'name': '480p', 'height': 480, 'bitrate': '1500k', 'field': 'video_480p'},
+    {'name': '720p', 'height': 720, 'bitrate': '3000k', 'field': 'video_720p'},
+    {'name': '1080p', 'height': 1080, 'bitrate': '5000k', 'field': 'video_1080p'},
+    {'name': '1440p', 'height': 1440, 'bitrate': '8000k', 'field': 'video_1440p'},
+    {'name': '2160p', 'height': 2160, 'bitrate': '14000k', 'field': 'video_2160p'},
+]
+
+
+def _bitrate_to_bps(bitrate):
+    """'800k' -> 800000"""
+    bitrate = bitrate.lower()
+    if bitrate.endswith('k'):
+        return int(float(bitrate[:-1]) * 1000)
+    if bitrate.endswith('m'):
+        return int(float(bitrate[:-1]) * 1000000)
+    return int(bitrate)
+
+
+class ProgressReporter:
+    """
+    Transcoding progressini Video.transcode_progress ga yozadi.
+    Yozuvlar PROGRESS_WRITE_INTERVAL dan tez-tez bo'lmaydi (throttle),
+    bosqich o'zgarganda yoki force=True bo'lsa darhol yoziladi.
+    """
+
+    def __init__(self, video_id, rendition_names):
+        self.video_id = video_id
+        self.started = time.monotonic()
+        self.last_write = 0
+        self.state = {
+            'stage': 'probing',
+            'percent': 0,
+            'fps': None,
+            'speed': None,
+            'eta_seconds': None,
+            'renditions': {name: 0 for name in rendition_names},
+            'started_at': timezone.now().isoformat(),
+            'updated_at': None,
+        }
+
+    def update(self, stage=None, percent=None, fps=None, speed=None,
+               renditions=None, force=False):
+        if stage and stage != self.state['stage']:
+            self.state['stage'] = stage
+            force = True
+        if percent is not None:
+            percent = round(min(max(percent, 0), 100), 1)
+            self.state['percent'] = percent
+            self.state['eta_seconds'] = self._eta(percent)
+        if fps is not None:
+            self.state['fps'] = fps
+        if speed is not None:
+            self.state['speed'] = speed
+        if renditions:
+            self.state['renditions'].update(renditions)
+        if force or time.monotonic() - self.last_write >= PROGRESS_WRITE_INTERVAL:
+            self.flush()
+
+    def _eta(self, percent):
+        """Qolgan vaqt: o'tgan vaqt va foiz nisbatidan"""
+        elapsed = time.monotonic() - self.started
+        if percent <= 0:
+            return None
+        return int(elapsed * (100 - percent) / percent)
+
+    def flush(self):
+        self.state['updated_at'] = timezone.now().isoformat()
+        self.last_write = time.monotonic()
+        Video.objects.filter(pk=self.video_id).update(transcode_progress=dict(self.state))
+
+
+def _parse_progress_number(value):
+    try:
+        return float(str(value).rstrip('x'))
+    except (TypeError, ValueError):
+        return None
+
+
+def run_ffmpeg_with_progress(command, duration, on_progress):
+    """
+    ffmpeg ni '-progress pipe:1' bilan ishga tushiradi va chiqishni oqim
+    sifatida o'qiydi. on_progress(percent, fps, speed) har bir blokda
+    chaqiriladi. stderr ning oxirgi qatorlari xato xabariga qo'shiladi.
+    """
+    command = [command[0], '-progress', 'pipe:1', '-nostats'] + command[1:]
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, bufsize=1,
+    )
+    stderr_tail = deque(maxlen=30)
+    reader = threading.Thread(
+        target=lambda: stderr_tail.extend(line.rstrip() for line in process.stderr),
+        daemon=True,
+    )
+    reader.start()
+
+    block = {}
+    for line in process.stdout:
+        key, _, value = line.strip().partition('=')
+        block[key] = value
+        if key != 'progress':
+            continue
+        out_time = _parse_progress_number(block.get('out_time_us'))
+        percent = None
+        if value == 'end':
+            percent = 100
+        elif out_time is not None and duration:
+            percent = out_time / 1000000 / duration * 100
+        on_progress(
+            percent,
+            _parse_progress_number(block.get('fps')),
+            _parse_progress_number(block.get('speed')),
+        )
+        block = {}
+
+    returncode = process.wait()
+    reader.join(timeout=5)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command[0], stderr='\n'.join(stderr_tail))
+
+
+def package_hls(video, renditions, progress=None):
+    """
+    Tayyor MP4 sifatlarni HLS (fMP4 segmentlar) ga qayta o'raydi
+    (qayta kodlashsiz, -c copy) va master playlist yozadi.
+    renditions: [{'name': '360p', 'bitrate': '800k', 'path': '/abs/360p.mp4'}, ...]
+    Natija: media/videos/hls/<video_id>/master.m3u8
+    """
+    if not renditions:
+        return None
+
+    relative_dir = f"videos/hls/{video.id}"
+    hls_dir = os.path.join(settings.MEDIA_ROOT, 'videos', 'hls', str(video.id))
+    # Qayta transcoding bo'lsa eski segmentlarni tozalaymiz
+    shutil.rmtree(hls_dir, ignore_errors=True)
+    os.makedirs(hls_dir, exist_ok=True)
+
+    variants = []
+    for r in renditions:
+        variant_dir = os.path.join(hls_dir, r['name'])
+        os.makedirs(variant_dir, exist_ok=True)
+        started = time.monotonic()
+        command = [
+            'ffmpeg', '-i', r['path'],
+            '-c', 'copy',
+            '-f', 'hls',
+            '-hls_time', str(HLS_SEGMENT_SECONDS),
+            '-hls_playlist_type', 'vod',
+            '-hls_segment_type', 'fmp4',
+            '-hls_fmp4_init_filename', 'init.mp4',
+            '-hls_segment_filename', os.path.join(variant_dir, 'seg_%05d.m4s'),
+            '-y',
+            os.path.join(variant_dir, 'index.m3u8'),
+        ]
+        try:
+            subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as e:
+            print(f"Error packaging HLS {r['name']}: {e}")
+            shutil.rmtree(variant_dir, ignore_errors=True)
+            continue
+        r['package_seconds'] = round(time.monotonic() - started, 3)
+        variants.append(r)
+        if progress:
+            progress.update(renditions={r['name']: 100})
+
+    if not variants:
+        shutil.rmtree(hls_dir, ignore_errors=True)
+        return None
+
+    lines = ['#EXTM3U', '#EXT-X-VERSION:7', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for r in sorted(variants, key=lambda v: _bitrate_to_bps(v['bitrate'])):
+        bandwidth = _bitrate_to_bps(r['bitrate']) + HLS_AUDIO_BITRATE
+        lines.append(f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth}")
+        lines.append(f"{r['name']}/index.m3u8")
+
+    with open(os.path.join(hls_dir, 'master.m3u8'), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    print(f"HLS packaging completed for video {video.id}: {len(variants)} variants")
+    return f"{relative_dir}/master.m3u8"
+
+def _parse_frame_rate(value):
+    """'30000/1001' -> 29.97"""
+    try:
+        num, _, den = (value or '0/1').partition('/')
+        return round(float(num) / float(den or 1), 3)
+    except (ValueError, ZeroDivisionError):
+        return 0
+
+
+def probe_video(path):
+    """
+    ffprobe orqali video metama'lumotlarini oladi (JSON).
+    Qaytaradi: width, height, duration, codec, bitrate, fps
+    """
+    command = [
+        'ffprobe', '-v', 'error',
+        '-print_format', 'json',
+        '-show_format', '-show_streams',
+        path,
+    ]
+    result = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    data = json.loads(result.stdout or b'{}')
+
+    video_stream = next(
+        (st for st in data.get('streams', []) if st.get('codec_type') == 'video'), {}
+    )
+    fmt = data.get('format', {})
+    return {
+        'width': int(video_stream.get('width') or 0),
+        'height': int(video_stream.get('height') or 0),
+        'duration': float(fmt.get('duration') or video_stream.get('duration') or 0),
+        'codec': video_stream.get('codec_name', ''),
+        'bitrate': int(fmt.get('bit_rate') or video_stream.get('bit_rate') or 0),
+        'fps': _parse_frame_rate(video_stream.get('avg_frame_rate')),
+    }
+
+
+def apply_probe_metadata(video, source):
+    """
+    ffprobe natijasini Video ga yozadi (duration, o'lcham, kodek, bitreyt, fps).
+    Encode tugashini kutmasdan darhol saqlanadi.
+    """
+    if not source:
+        return
+    fields = {
+        'width': source.get('width') or 0,
+        'height': source.get('height') or 0,
+        'video_codec': (source.get('codec') or '')[:30],
+        'bitrate': source.get('bitrate') or 0,
+        'fps': source.get('fps') or 0,
+    }
+    if source.get('duration'):
+        fields['duration_seconds'] = int(source['duration'])
+    for name, value in fields.items():
+        setattr(video, name, value)
+    Video.objects.filter(pk=video.pk).update(**fields)
+
+
+def select_ladder(source_height):
+    """
+    Asl videodan katta bo'lmagan sifatlarni tanlaydi (upscale qilinmaydi).
+    Balandlik noma'lum bo'lsa butun zina qaytadi.
+    """
+    if not source_height:
+        return list(QUALITY_LADDER)
+    return [q for q in QUALITY_LADDER if q['height'] <= source_height]
+
+
+def build_transcode_command(source_path, ladder, output_paths):
+    """
+    Bitta ffmpeg chaqiruvi: manba bir marta decode qilinadi, split filtri
+    orqali har bir sifat uchun alohida scale + libx264 chiqish.
+    """
+    count = len(ladder)
+    labels = ''.join(f'[v{i}]' for i in range(count))
+    graph = [f"[0:v]split={count}{labels}"]
+    for i, q in enumerate(ladder):
+        graph.append(f"[v{i}]scale=-2:{q['height']}[out{i}]")
+
+    command = ['ffmpeg', '-i', source_path, '-filter_complex', ';'.join(graph)]
+    for i, q in enumerate(ladder):
+        # -b:v BITRATE -> video sifati, -c:a aac -> audio kadeki
+        # -force_key_frames -> HLS segmentlari uchun keyframelar bir xil oraliqda
+        command += [
+            '-map', f'[out{i}]',
+            '-map', '0:a:0?',
+            '-c:v', 'libx264',
+            '-b:v', q['bitrate'],
+            '-force_key_frames', f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+            '-c:a', 'aac',
+            '-y',
+            output_paths[i],
+        ]
+    return command
+
+
+def _update_video(video, **fields):
+    """
+    Faqat transcoding maydonlarini yozadi (.update) - encode davomida flush qilingan
+    views_count yoki admin tahrirlari eski nusxa bilan ustidan yozilmaydi,
+    Video post_save signallari ishlamaydi
+    """
+    for name, value in fields.items():
+        setattr(video, name, value)
+    Video.objects.filter(pk=video.pk).update(**fields)
+
+
+def encode_renditions(source_path, ladder, output_paths, duration, progress):
+    """
+    Avval barcha sifatlar bitta chaqiruvda (split). U yiqilsa har bir sifat
+    alohida qayta urinib ko'riladi - bitta sifat xatosi qolganlarini yiqitmaydi.
+    Muvaffaqiyatli kodlangan sifatlar indekslarini qaytaradi.
+    """
+    def on_progress(percent, fps, speed):
+        # Bitta decode - barcha sifatlar bir xil tezlikda oldinga siljiydi
+        per_rendition = None
+        if percent is not None:
+            per_rendition = {q['name']: round(percent, 1) for q in ladder}
+        progress.update('encoding', percent, fps, speed, renditions=per_rendition)
+
+    command = build_transcode_command(source_path, ladder, output_paths)
+    try:
+        run_ffmpeg_with_progress(command, duration, on_progress)
+        return list(range(len(ladder)))
+    except subprocess.CalledProcessError as e:
+        if len(ladder) == 1:
+            raise
+        print(f"Single-pass encode failed, retrying renditions one by one: {e}")
+        error = e
+
+    encoded = []
+    for i, q in enumerate(ladder):
+        def on_single_progress(percent, fps, speed, name=q['name']):
+            per_rendition = {name: round(percent, 1)} if percent is not None else None
+            progress.update('encoding', percent, fps, speed, renditions=per_rendition)
+
+        try:
+            command = build_transcode_command(source_path, [q], [output_paths[i]])
+            run_ffmpeg_with_progress(command, duration, on_single_progress)
+            encoded.append(i)
+        except subprocess.CalledProcessError as e:
+            print(f"Error generating {q['name']}: {e}")
+            error = e
+    if not encoded:
+        raise error
+    return encoded
+
+
 def transcode_video(video_id):
     """
     Video faylini turli sifatlarga o'tkazish (Transcoding).
-    FFmpeg talab qilinadi.
+    FFmpeg/FFprobe talab qilinadi. Barcha sifatlar bitta ffmpeg
+    chaqiruvida kodlanadi (xatoda har biri alohida); asl videodan katta
+    sifatlar tashlab ketiladi. Video ga faqat transcoding maydonlari yoziladi.
+    Muvaffaqiyatli bo'lsa True, aks holda False qaytaradi.
     """
     try:
         video = Video.objects.get(id=video_id)
-        video.processing_status = 'processing'
-        video.save()
+        _update_video(video, processing_status='processing')
         
         source_path = video.video_file.path
-        base_dir = os.path.dirname(source_path)
         filename = os.path.basename(source_path)
         name_without_ext = os.path.splitext(filename)[0]
-        
-        # Sifatlar va ularning sozlamalari
-        # (scale=-2:height aspect ratio saqlash uchun, -2 ffmpeg talabi)
-        qualities = [
-            {'name': '360p', 'height': 360, 'bitrate': '800k', 'field': 'video_360p'},
-            {'name': '480p', 'height': 480, 'bitrate': '1500k', 'field': 'video_480p'},
-            {'name': '720p', 'height': 720, 'bitrate': '3000k', 'field': 'video_720p'},
-            {'name': '1080p', 'height': 1080, 'bitrate': '5000k', 'field': 'video_1080p'},
-        ]
-        
-        # 1440p va 2160p ni faqat asl video yetarli sifatda bo'lsa qo'shamiz
-        # Hozircha oddiylik uchun har doim urinib ko'ramiz yoki keyinroq logic qo'shamiz
-        # Keling, user so'ragan barcha formatlarni qo'shamiz
-        qualities.extend([
-            {'name': '1440p', 'height': 1440, 'bitrate': '8000k', 'field': 'video_1440p'},
-            {'name': '2160p', 'height': 2160, 'bitrate': '14000k', 'field': 'video_2160p'},
-        ])
+        stats = {}
 
         print(f"Starting transcoding for video {video_id}: {filename}")
-        
-        for q in qualities:
-            output_filename = f"{name_without_ext}_{q['name']}.mp4"
-            output_subdir = os.path.join(base_dir, q['name']) # videos/360p/
-            
-            # Sub-papka yaratish (masalan: media/videos/360p/)
-            # Modelda upload_to='videos/360p/' ko'rsatilgan, lekin u fayl yuklanganda ishlaydi.
-            # Biz bu yerda qo'lda yasaymiz.
-            # Yaxshisi, barcha sifatlarni bitta papkada yoki modeldagi kabi alohida papkalarda saqlash.
-            # Model strukturasiga moslashamiz: videos/360p/fayl.mp4
-            
-            # Absolute path to media/videos/{quality}/
+
+        # 1. Manbani tekshirish va sifatlar zinasini tanlash
+        started = time.monotonic()
+        try:
+            source = probe_video(source_path)
+        except (subprocess.CalledProcessError, FileNotFoundError, ValueError) as e:
+            print(f"ffprobe failed, using full ladder: {e}")
+            source = {}
+        stats['probe_seconds'] = round(time.monotonic() - started, 3)
+        stats['source'] = source
+        apply_probe_metadata(video, source)
+
+        ladder = select_ladder(source.get('height'))
+        progress = ProgressReporter(video_id, [q['name'] for q in ladder])
+        progress.flush()
+        if not ladder:
+            print(f"Source is below {QUALITY_LADDER[0]['name']}, keeping original only")
+
+        # 2. Bitta decode - barcha sifatlar
+        output_paths = []
+        for q in ladder:
+            # Model strukturasiga moslashamiz: media/videos/360p/fayl_360p.mp4
             quality_dir = os.path.join(settings.MEDIA_ROOT, 'videos', q['name'])
             os.makedirs(quality_dir, exist_ok=True)
-            
-            output_path = os.path.join(quality_dir, output_filename)
-             
-            # FFmpeg buyrug'i
-            # -vf scale=-2:HEIGHT -> balandlikni belgilash, enini avtomatik hisoblash
-            # -c:v libx264 -> videoni H.264 kadeki bilan kodlash
-            # -b:v BITRATE -> video sifati
-            # -c:a aac -> audio kadeki
-            # -y -> mavjud faylni so'roqsiz almashtirish
-            command = [
-                'ffmpeg', '-i', source_path,
-                '-vf', f"scale=-2:{q['height']}",
-                '-c:v', 'libx264',
-                '-b:v', q['bitrate'],
-                '-c:a', 'aac',
-                '-y',
-                output_path
-            ]
-            
+            output_paths.append(os.path.join(quality_dir, f"{name_without_ext}_{q['name']}.mp4"))
+
+        renditions = []
+        if ladder:
+            started = time.monotonic()
             try:
-                subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                
-                # Modelga nisbiy yo'lni saqlash (media rootdan keyingi qism)
-                relative_path = f"videos/{q['name']}/{output_filename}"
-                
-                # Field nomini dinamik aniqlab qiymat beramiz
-                setattr(video, q['field'], relative_path)
-                print(f"Generated {q['name']} version")
-                
-            except subprocess.CalledProcessError as e:
-                print(f"Error generating {q['name']}: {e}")
-                # Xatolik bo'lsa ham davom etamiz (balki kichikroq sifat o'xshar)
-                continue
+                encoded = encode_renditions(source_path, ladder, output_paths, source.get('duration'), progress)
             except FileNotFoundError:
-                 print("FFmpeg not found! Please install FFmpeg and add it to PATH.")
-                 video.processing_status = 'failed'
-                 video.save()
-                 return
+                print("FFmpeg not found! Please install FFmpeg and add it to PATH.")
+                _update_video(
+                    video, processing_status='failed',
+                    transcode_stats={**stats, 'error': 'FFmpeg not found'},
+                )
+                return False
+            encode_seconds = time.monotonic() - started
+            stats['encode_seconds'] = round(encode_seconds, 3)
+            if source.get('duration'):
+                # Yuklangan har bir daqiqa uchun sarflangan vaqt
+                stats['encode_seconds_per_minute'] = round(encode_seconds / (source['duration'] / 60), 3)
+
+            for i in encoded:
+                q, output_path = ladder[i], output_paths[i]
+                renditions.append({
+                    'name': q['name'],
+                    'height': q['height'],
+                    'bitrate': q['bitrate'],
+                    'path': output_path,
+                    'size_bytes': os.path.getsize(output_path),
+                })
+                print(f"Generated {q['name']} version")
+
+        # Modelga nisbiy yo'lni saqlash; tanlanmagan sifatlar tozalanadi
+        produced = {r['name'] for r in renditions}
+        fields = {
+            q['field']: f"videos/{q['name']}/{name_without_ext}_{q['name']}.mp4" if q['name'] in produced else None
+            for q in QUALITY_LADDER
+        }
+
+        # 3. Adaptiv bitrate (HLS) paketlash
+        progress.update('packaging')
+        fields['hls_playlist'] = package_hls(video, renditions, progress) or ''
 
-        video.processing_status = 'completed'
-        video.save()
+        stats['renditions'] = {
+            r['name']: {key: value for key, value in r.items() if key not in ('name', 'path')}
+            for r in renditions
+        }
+        progress.update('done', 100)
+        _update_video(
+            video, **fields,
+            transcode_stats=stats,
+            transcode_progress=progress.state,
+            processing_status='completed',
+            updated_at=timezone.now(),
+        )
         print(f"Transcoding completed for video {video_id}")
+        return True
 
     except Exception as e:
         print(f"Critical error: {e}")
         try:
-            video = Video.objects.get(id=video_id)
-            video.processing_status = 'failed'
-            video.save()
+            video = Video.objects.only('id', 'transcode_stats', 'transcode_progress').get(id=video_id)
+            error = str(e)
+            if getattr(e, 'stderr', None):
+                error = f"{error}\n{e.stderr}"
+            _update_video(
+                video, processing_status='failed',
+                transcode_stats={**video.transcode_stats, 'error': error[-2000:]},
+                transcode_progress={**video.transcode_progress, 'stage': 'failed'},
+            )
         except:
             pass
+        return False
@@ -1,19 +1,155 @@
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Video
-from .services import transcode_video
-import threading
+from .models import Video, VideoProgress, Course, Question, Choice
+from .jobs import enqueue_transcode
+from . import access, progress_buffer, search
+from .lesson_index import invalidate_course_index
+from .catalog import invalidate_course_catalog, VIDEO_CATALOG_FIELDS
+from .answer_keys import invalidate_answer_key
 
 @receiver(post_save, sender=Video)
 def video_post_save(sender, instance, created, **kwargs):
     """
-    Video yuklangandan keyin avtomatik transcodingni boshlash.
-    Jarayonni alohida thread'da bajaramiz, user kutib qolmasligi uchun.
+    Video yuklangandan keyin transcodingni navbatga qo'yish.
+    Jarayonni alohida worker (python manage.py transcode_worker) bajaradi,
+    web jarayon band bo'lmaydi va job worker o'lsa ham yo'qolmaydi.
     """
     if created and instance.video_file:
-        # Agar video yangi yaratilgan bo'lsa va fayli bo'lsa
-        # Main threadni band qilmaslik uchun threading ishlatamiz
-        # Production uchun Celery afzal, lekin bu yerda oddiy yechim
-        thread = threading.Thread(target=transcode_video, args=(instance.id,))
-        thread.daemon = True
-        thread.start()
+        enqueue_transcode(instance)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def video_access_changed(sender, instance, **kwargs):
+    """Kursdagi nashr qilingan videolar soni o'zgarishi mumkin - kirish keshi eskiradi"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'is_published', 'course'} & set(update_fields):
+        return
+    if instance.course_id:
+        access.invalidate_course(instance.course_id)
+
+
+@receiver(pre_save, sender=Video)
+def video_course_moved(sender, instance, **kwargs):
+    """Video boshqa kursga ko'chirilsa eski kursning keshlari ham eskiradi"""
+    update_fields = kwargs.get('update_fields')
+    if not instance.pk or (update_fields is not None and 'course' not in update_fields):
+        return
+    old_course_id = Video.objects.filter(pk=instance.pk).values_list('course_id', flat=True).first()
+    if old_course_id and old_course_id != instance.course_id:
+        access.invalidate_course(old_course_id)
+        invalidate_course_index(old_course_id)
+        invalidate_course_catalog(old_course_id)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def lesson_index_changed(sender, instance, **kwargs):
+    """Oldingi/keyingi dars indeksi: nashr holati, tartib yoki kurs o'zgarganda"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'is_published', 'order_index', 'course'} & set(update_fields):
+        return
+    if instance.course_id:
+        invalidate_course_index(instance.course_id)
+
+
+@receiver(post_save, sender=VideoProgress)
+@receiver(post_delete, sender=VideoProgress)
+def progress_access_changed(sender, instance, **kwargs):
+    """
+    Yangi dars ochilganda yoki tugatilganda kirish konteksti yangilanadi.
+    Faqat watched_seconds o'zgargan heartbeat lar keshga tegmaydi.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'completed' not in update_fields:
+        return
+    progress_buffer.forget_row(instance.user_id, instance.video_id)
+    course_id = Video.objects.filter(pk=instance.video_id).values_list('course_id', flat=True).first()
+    if course_id:
+        access.invalidate(instance.user_id, course_id)
+
+
+@receiver(m2m_changed, sender=get_user_model().allowed_courses.through)
+def allowed_courses_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Foydalanuvchiga kurs berilganda/olinganda"""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        access.invalidate_user(instance.pk)
+    elif pk_set:
+        # course.allowed_users orqali o'zgartirilgan
+        for user_id in pk_set:
+            access.invalidate_user(user_id)
+    else:
+        access.invalidate_course(instance.pk)
+
+
+SEARCH_FIELDS = set(search.TITLE_FIELDS + search.BODY_FIELDS)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_save, sender=Course)
+def search_index_saved(sender, instance, **kwargs):
+    """Qidiruv indeksini yangilash - matn maydonlariga tegmagan saqlashlar o'tkazib yuboriladi"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+    search.index_object('video' if sender is Video else 'course', instance)
+
+
+@receiver(post_delete, sender=Video)
+@receiver(post_delete, sender=Course)
+def search_index_deleted(sender, instance, **kwargs):
+    search.unindex_object('video' if sender is Video else 'course', instance.pk)
+
+
+def _invalidate_answer_key_on_commit(video_id):
+    # Commit dan keyin - parallel topshirish eski kalitni qayta keshlab qo'ymasligi uchun
+    if video_id:
+        transaction.on_commit(lambda: invalidate_answer_key(video_id))
+
+
+@receiver(pre_save, sender=Question)
+def question_moved(sender, instance, **kwargs):
+    """Savol boshqa videoga ko'chirilsa eski videoning kaliti ham eskiradi"""
+    if instance.pk:
+        old_video_id = Question.objects.filter(pk=instance.pk).values_list('video_id', flat=True).first()
+        if old_video_id and old_video_id != instance.video_id:
+            _invalidate_answer_key_on_commit(old_video_id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    _invalidate_answer_key_on_commit(instance.video_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    # Savol bilan birga o'chirilgan bo'lsa, kalitni savol signali yangilaydi
+    video_id = Question.objects.filter(pk=instance.question_id).values_list('video_id', flat=True).first()
+    _invalidate_answer_key_on_commit(video_id)
+
+
+@receiver(post_delete, sender=Video)
+def video_answer_key_deleted(sender, instance, **kwargs):
+    invalidate_answer_key(instance.pk)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def video_catalog_changed(sender, instance, **kwargs):
+    """Ixcham katalog (courses.catalog) - kursning barcha tillari"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not VIDEO_CATALOG_FIELDS & set(update_fields):
+        return
+    invalidate_course_catalog(instance.course_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_catalog_changed(sender, instance, **kwargs):
+    invalidate_course_catalog(instance.pk)
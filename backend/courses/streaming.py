@@ -0,0 +1,341 @@
+"""
+Video fayllarni HTTP Range (206 Partial Content) bilan uzatish
+- Range sarlavhasini tahlil qilish (bitta va bir nechta diapazon)
+- If-Range (ETag / Last-Modified) tekshiruvi
+- Bitta diapazon FileResponse orqali beriladi, shunda WSGI server
+  (masalan gunicorn) os.sendfile bilan zero-copy uzatishi mumkin
+- Offload rejimlari: nginx (X-Accel-Redirect), Apache/lighttpd (X-Sendfile),
+  S3 (imzolangan URL ga redirect)
+"""
+
+import os
+import re
+import uuid
+import mimetypes
+from functools import lru_cache
+from urllib.parse import quote
+from django.conf import settings
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse,
+)
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_SPEC_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+# Bitta so'rovdagi diapazonlar soni chegarasi (suiiste'mollikdan himoya)
+MAX_RANGES = 16
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def parse_range_header(header, size):
+    """
+    'Range: bytes=...' sarlavhasini [(start, end), ...] ro'yxatiga aylantiradi.
+    None - sarlavha yo'q yoki noto'g'ri (butun fayl qaytariladi),
+    [] - hech bir diapazon qoniqtirilmaydi (416).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+
+    parts = [p for p in spec.split(',') if p.strip()]
+    if not parts or len(parts) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for part in parts:
+        match = RANGE_SPEC_RE.match(part)
+        if not match:
+            return None
+        first, last = match.groups()
+        if not first:
+            # Suffix diapazon: oxirgi N bayt
+            if not last:
+                return None
+            length = int(last)
+            if length == 0 or size == 0:
+                continue
+            ranges.append((max(size - length, 0), size - 1))
+            continue
+
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    return _coalesce_ranges(ranges)
+
+
+def _coalesce_ranges(ranges):
+    """Ustma-ust tushgan yoki yonma-yon diapazonlarni birlashtiradi"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def make_etag(stat_result):
+    """Fayl hajmi va o'zgartirilgan vaqtidan kuchli ETag yasaydi"""
+    return f'"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    If-Range sarlavhasi bo'lmasa yoki validator mos kelsa True.
+    Mos kelmasa Range e'tiborsiz qoldiriladi va butun fayl yuboriladi.
+    """
+    value = request.META.get('HTTP_IF_RANGE', '').strip()
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        # Zaif ETag hech qachon mos kelmaydi (RFC 7233, 3.2)
+        return value == etag
+    parsed = parse_http_date_safe(value)
+    return parsed is not None and parsed == int(last_modified)
+
+
+class FileRangeReader:
+    """
+    Fayldan faqat berilgan oraliqni o'qiydigan o'ram.
+    fileno() saqlanadi - server sendfile ishlatsa, joriy pozitsiyadan
+    Content-Length bayt yuboradi.
+    """
+
+    def __init__(self, fileobj, start, length):
+        self.fileobj = fileobj
+        self.fileobj.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.fileobj.fileno()
+
+    def close(self):
+        self.fileobj.close()
+
+
+def _multipart_stream(file_path, parts, closing):
+    """multipart/byteranges tanasini bo'laklab uzatadi"""
+    with open(file_path, 'rb') as f:
+        for header, start, end in parts:
+            yield header
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+            yield b'\r\n'
+    yield closing
+
+
+def build_file_response(request, file_path, content_type=None):
+    """
+    Faylni Range so'roviga mos ravishda qaytaradi:
+    200 (butun fayl), 206 (bitta yoki bir nechta diapazon) yoki 416.
+    """
+    stat_result = os.stat(file_path)
+    size = stat_result.st_size
+    etag = make_etag(stat_result)
+
+    if not content_type:
+        content_type, _ = mimetypes.guess_type(file_path)
+        content_type = content_type or 'video/mp4'
+
+    ranges = None
+    if if_range_matches(request, etag, stat_result.st_mtime):
+        ranges = parse_range_header(request.META.get('HTTP_RANGE', ''), size)
+
+    if ranges is None:
+        response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+
+    elif not ranges:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        length = end - start + 1
+        response = FileResponse(
+            FileRangeReader(open(file_path, 'rb'), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    else:
+        boundary = uuid.uuid4().hex
+        parts = []
+        total = 0
+        for start, end in ranges:
+            header = (
+                f'--{boundary}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+            ).encode()
+            parts.append((header, start, end))
+            total += len(header) + (end - start + 1) + 2
+        closing = f'--{boundary}--\r\n'.encode()
+        total += len(closing)
+
+        response = StreamingHttpResponse(
+            _multipart_stream(file_path, parts, closing),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = str(total)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat_result.st_mtime)
+    return response
+
+
+# ===================== OFFLOAD (X-Accel-Redirect / X-Sendfile / S3) =====================
+
+# Sifat nomi -> Video modelidagi maydon
+VIDEO_QUALITY_FIELDS = {
+    '360p': 'video_360p',
+    '480p': 'video_480p',
+    '720p': 'video_720p',
+    '1080p': 'video_1080p',
+    '1440p': 'video_1440p',
+    '2160p': 'video_2160p',
+}
+
+STREAM_BACKENDS = ('django', 'nginx', 'sendfile', 's3')
+
+
+def _is_s3_storage(storage):
+    return type(storage).__module__.startswith('storages.backends.s3')
+
+
+def get_stream_backend(storage):
+    """
+    settings.VIDEO_STREAM_BACKEND bo'yicha uzatish usulini tanlaydi.
+    'auto' - fayl S3 da bo'lsa 's3', aks holda 'django'.
+    """
+    backend = getattr(settings, 'VIDEO_STREAM_BACKEND', 'auto')
+    if backend == 'auto' or backend not in STREAM_BACKENDS:
+        return 's3' if _is_s3_storage(storage) else 'django'
+    return backend
+
+
+def _file_available(field_file):
+    """Lokal fayl diskda bormi; masofaviy storage uchun bazaga ishonamiz"""
+    if _is_s3_storage(field_file.storage):
+        return True
+    try:
+        return os.path.exists(field_file.path)
+    except (NotImplementedError, ValueError):
+        return False
+
+
+def resolve_video_file(video, res=''):
+    """
+    So'ralgan sifatdagi faylni qaytaradi. Sifat yo'q yoki hali tayyor
+    bo'lmasa original video_file ishlatiladi. Fayl umuman bo'lmasa None.
+    """
+    field_name = VIDEO_QUALITY_FIELDS.get(res)
+    if field_name:
+        candidate = getattr(video, field_name)
+        if candidate and _file_available(candidate):
+            return candidate
+    return video.video_file or None
+
+
+@lru_cache(maxsize=1)
+def _presigning_storage():
+    """Imzolangan URL lar uchun alohida S3 storage (boto3 klienti qayta ishlatiladi)"""
+    from storages.backends.s3boto3 import S3Boto3Storage
+    return S3Boto3Storage(
+        querystring_auth=True,
+        querystring_expire=settings.VIDEO_URL_EXPIRY,
+    )
+
+
+def build_stream_response(request, field_file):
+    """
+    Video faylni tanlangan backend orqali qaytaradi.
+    Lokal fayl diskda topilmasa None qaytadi.
+    """
+    backend = get_stream_backend(field_file.storage)
+
+    if backend == 's3':
+        return HttpResponseRedirect(_presigning_storage().url(field_file.name))
+
+    file_path = field_file.path
+    if not os.path.exists(file_path):
+        return None
+    return serve_local_file(request, file_path, field_file.name, backend)
+
+
+def serve_local_file(request, file_path, name, backend='django'):
+    """
+    Diskdagi faylni qaytaradi: Django (Range/206), nginx (X-Accel-Redirect)
+    yoki X-Sendfile orqali. name - MEDIA_ROOT ga nisbatan yo'l.
+    """
+    if backend not in ('nginx', 'sendfile'):
+        return build_file_response(request, file_path)
+
+    content_type, _ = mimetypes.guess_type(file_path)
+    response = HttpResponse(content_type=content_type or 'video/mp4')
+    if backend == 'nginx':
+        # nginx: location /protected-media/ { internal; alias /path/to/media/; }
+        prefix = settings.VIDEO_ACCEL_REDIRECT_PREFIX.rstrip('/')
+        response['X-Accel-Redirect'] = f"{prefix}/{quote(name)}"
+    else:
+        response['X-Sendfile'] = file_path
+    return response
+
+
+# ===================== HLS =====================
+
+HLS_NAME_RE = re.compile(r'^(?:[\w-]+/)?[\w-]+\.(m3u8|m4s|mp4)$')
+HLS_URI_ATTR_RE = re.compile(r'URI="([^"]+)"')
+
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/iso.segment', '.m4s')
+
+
+def is_valid_hls_name(name):
+    """Faqat playlist/segment nomlariga ruxsat (../ kabi yo'llar rad etiladi)"""
+    return bool(HLS_NAME_RE.match(name or ''))
+
+
+def sign_playlist(content, query):
+    """
+    Playlistdagi har bir URI ga imzo parametrlarini qo'shadi, shunda
+    segment so'rovlari ham xuddi shu HMAC tekshiruvidan o'tadi.
+    """
+    def with_query(uri):
+        separator = '&' if '?' in uri else '?'
+        return f"{uri}{separator}{query}"
+
+    lines = []
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith('#'):
+            line = with_query(stripped)
+        elif stripped.startswith('#') and 'URI="' in stripped:
+            line = HLS_URI_ATTR_RE.sub(lambda m: f'URI="{with_query(m.group(1))}"', stripped)
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
@@ -1,3 +1,471 @@
-from django.test import TestCase
+import os
+import shutil
+import subprocess
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from accounts.models import User
+from accounts.utils import generate_signed_video_url
+from analytics.models import DailyVideoStat
+from config.throttling import (
+    MemoryStore, RateLimit, RateLimitHeadersMiddleware, SQLiteStore, gcra, parse_rate,
+)
+from .models import Course, Video, Question, Choice, VideoProgress, VideoUpload
+from .services import package_hls
+from .streaming import MAX_RANGES, build_file_response, parse_range_header
+from .uploads import WRITE_LEASE
+
+
+@override_settings(SECURITY_LOG_ASYNC=False)
+class VideoDetailQueryBudgetTest(TestCase):
+    """VideoDetailView so'rovlar soni savollar soniga bog'liq bo'lmasligi kerak"""
+
+    # video+kurs, savollar, variantlar, progress, security log,
+    # ko'rishlar (video va kunlik rollup UPDATE)
+    QUERY_BUDGET = 7
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='student', role='student')
+        self.course = Course.objects.create(title_uz='Kurs')
+        self.user.allowed_courses.add(self.course)
+        self.videos = [
+            Video.objects.create(title_uz=f'Dars {i}', course=self.course, order_index=i, is_published=True)
+            for i in range(3)
+        ]
+        VideoProgress.objects.create(user=self.user, video=self.videos[1], watched_seconds=10)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_questions(self, video, count):
+        for i in range(count):
+            question = Question.objects.create(video=video, text_uz=f'Savol {i}')
+            for j in range(4):
+                Choice.objects.create(question=question, text_uz=f'Variant {j}', is_correct=j == 0)
+
+    def get_detail(self, video):
+        url = f'/api/videos/{video.pk}/'
+        # Kirish konteksti va dars indeksi keshini isitish
+        self.client.get(url)
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data['data']
+
+    def get_neighbours(self, video):
+        data = self.client.get(f'/api/videos/{video.pk}/').data['data']
+        return data['prev_video_id'], data['next_video_id']
+
+    def test_query_count_is_constant(self):
+        self.add_questions(self.videos[0], 1)
+        self.add_questions(self.videos[1], 20)
+
+        few = self.get_detail(self.videos[0])
+        many = self.get_detail(self.videos[1])
+
+        self.assertEqual(len(few['questions']), 1)
+        self.assertEqual(len(many['questions']), 20)
+        self.assertEqual(len(many['questions'][0]['choices']), 4)
+        self.assertEqual(many['progress']['watched_seconds'], 10)
+
+    def test_neighbours_follow_publication(self):
+        self.assertEqual(self.get_neighbours(self.videos[1]), (self.videos[0].pk, self.videos[2].pk))
+
+        self.videos[2].is_published = False
+        self.videos[2].save()
+        self.assertEqual(self.get_neighbours(self.videos[1]), (self.videos[0].pk, None))
+
+    def test_views_are_counted_in_database(self):
+        for expected in range(1, 4):
+            data = self.client.get(f'/api/videos/{self.videos[0].pk}/').data['data']
+            self.assertEqual(data['views_count'], expected)
+        self.videos[0].refresh_from_db()
+        self.assertEqual(self.videos[0].views_count, 3)
+        stat = DailyVideoStat.objects.get(video=self.videos[0])
+        self.assertEqual(stat.views, 3)
+
+
+@skipUnless(shutil.which('ffmpeg'), 'ffmpeg o\'rnatilmagan')
+@override_settings(SECURITY_LOG_ASYNC=False)
+class HLSPackagingTest(TestCase):
+    """Qisqa klip HLS ga o'raladi va imzolangan playlist/segmentlar beriladi"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        clip = os.path.join(self.media_root, 'clip_360p.mp4')
+        subprocess.run([
+            'ffmpeg', '-v', 'error', '-y',
+            '-f', 'lavfi', '-i', 'testsrc=duration=3:size=640x360:rate=25',
+            '-f', 'lavfi', '-i', 'sine=frequency=440:duration=3',
+            '-c:v', 'libx264', '-g', '25', '-c:a', 'aac', '-shortest', clip,
+        ], check=True)
+
+        self.video = Video.objects.create(title_uz='HLS', is_published=True)
+        self.playlist = package_hls(self.video, [{'name': '360p', 'bitrate': '800k', 'path': clip}])
+        token = generate_signed_video_url(self.video.pk, 1, settings.VIDEO_SIGNING_KEY)
+        self.query = f"expires={token['expires']}&signature={token['signature']}&user_id=1"
+        self.client = APIClient()
+
+    def get(self, name, query=None):
+        return self.client.get(f'/api/videos/{self.video.pk}/hls/{name}?{query or self.query}')
+
+    def uris(self, response):
+        lines = response.content.decode().splitlines()
+        uris = [line for line in lines if line and not line.startswith('#')]
+        uris += [line.split('URI="')[1].split('"')[0] for line in lines if 'URI="' in line]
+        return uris
+
+    def test_packaged_playlists_are_signed(self):
+        self.assertEqual(self.playlist, f'videos/hls/{self.video.pk}/master.m3u8')
+
+        master = self.get('master.m3u8')
+        self.assertEqual(master.status_code, 200)
+        self.assertEqual(self.uris(master), [f'360p/index.m3u8?{self.query}'])
+
+        variant = self.get('360p/index.m3u8')
+        self.assertEqual(variant.status_code, 200)
+        uris = self.uris(variant)
+        self.assertTrue(uris)
+        for uri in uris:
+            self.assertTrue(uri.endswith(f'?{self.query}'), uri)
+
+        segment = uris[0].split('?')[0]
+        response = self.get(f'360p/{segment}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_bad_signature_is_rejected(self):
+        bad = self.query.replace('signature=', 'signature=0')
+        self.assertEqual(self.get('master.m3u8', bad).status_code, 403)
+        self.assertEqual(self.get('360p/index.m3u8', bad).status_code, 403)
+
+
+class RangeHeaderParseTest(SimpleTestCase):
+    """parse_range_header: None - butun fayl, [] - 416"""
+
+    SIZE = 1000
+
+    def parse(self, header):
+        return parse_range_header(header, self.SIZE)
+
+    def test_missing_or_invalid_header_means_full_file(self):
+        for header in ('', 'items=0-10', 'bytes=', 'bytes=abc', 'bytes=-', 'bytes=20-10'):
+            self.assertIsNone(self.parse(header), header)
+
+    def test_single_ranges(self):
+        self.assertEqual(self.parse('bytes=0-99'), [(0, 99)])
+        self.assertEqual(self.parse('bytes=900-'), [(900, 999)])
+        # Fayl oxiridan keyingi end qirqiladi
+        self.assertEqual(self.parse('bytes=950-5000'), [(950, 999)])
+
+    def test_suffix_ranges(self):
+        self.assertEqual(self.parse('bytes=-100'), [(900, 999)])
+        self.assertEqual(self.parse('bytes=-5000'), [(0, 999)])
+        self.assertEqual(self.parse('bytes=-0'), [])
+
+    def test_unsatisfiable(self):
+        self.assertEqual(self.parse('bytes=1000-'), [])
+        self.assertEqual(self.parse('bytes=1000-1200, 2000-'), [])
+        self.assertEqual(parse_range_header('bytes=0-', 0), [])
+
+    def test_multiple_ranges_are_coalesced(self):
+        self.assertEqual(self.parse('bytes=500-599, 0-99'), [(0, 99), (500, 599)])
+        self.assertEqual(self.parse('bytes=0-99, 50-149, 150-199'), [(0, 199)])
+        self.assertEqual(self.parse('bytes=0-9, 2000-3000'), [(0, 9)])
+
+    def test_too_many_ranges_are_ignored(self):
+        header = 'bytes=' + ', '.join(f'{i * 10}-{i * 10 + 1}' for i in range(MAX_RANGES + 1))
+        self.assertIsNone(self.parse(header))
+
+
+class FileRangeResponseTest(SimpleTestCase):
+    """build_file_response: 200 / 206 / multipart 206 / 416 va If-Range"""
+
+    def setUp(self):
+        self.content = bytes(range(256)) * 4
+        fd, self.path = tempfile.mkstemp(suffix='.mp4')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.content)
+        self.addCleanup(os.remove, self.path)
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        response = build_file_response(self.factory.get('/', **headers), self.path)
+        self.addCleanup(response.close)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_without_range_returns_whole_file(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_single_range(self):
+        response, body = self.get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 100-199/1024')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(body, self.content[100:200])
+
+    def test_suffix_and_end_past_eof(self):
+        response, body = self.get(HTTP_RANGE='bytes=-24')
+        self.assertEqual(response['Content-Range'], 'bytes 1000-1023/1024')
+        self.assertEqual(body, self.content[1000:])
+
+        response, body = self.get(HTTP_RANGE='bytes=1000-99999')
+        self.assertEqual(response['Content-Range'], 'bytes 1000-1023/1024')
+        self.assertEqual(body, self.content[1000:])
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get(HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_multiple_ranges(self):
+        response, body = self.get(HTTP_RANGE='bytes=0-9, 500-509')
+        self.assertEqual(response.status_code, 206)
+        boundary = response['Content-Type'].split('boundary=')[1]
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges'))
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertEqual(body, (
+            f'--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 0-9/1024\r\n\r\n'.encode()
+            + self.content[0:10] + b'\r\n'
+            + f'--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 500-509/1024\r\n\r\n'.encode()
+            + self.content[500:510] + b'\r\n'
+            + f'--{boundary}--\r\n'.encode()
+        ))
+
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        response, _ = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+        # Mos kelmagan yoki zaif ETag - Range e'tiborsiz, butun fayl
+        for value in ('"other"', f'W/{etag}'):
+            response, body = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=value)
+            self.assertEqual(response.status_code, 200, value)
+            self.assertEqual(body, self.content)
+
+        last_modified = http_date(os.stat(self.path).st_mtime)
+        response, _ = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+        response, _ = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+
+
+class GCRATest(SimpleTestCase):
+    """config.throttling: GCRA hisobi, omborlar va RateLimit headerlari"""
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('30/minute'), (30, 60))
+        self.assertEqual(parse_rate('5/s'), (5, 1))
+        self.assertEqual(parse_rate('100/hour'), (100, 3600))
+        self.assertEqual(parse_rate('1000/day'), (1000, 86400))
+
+    def test_burst_then_one_per_interval(self):
+        # 10/minute: interval 6 soniya, ketma-ket 10 ta so'rov o'tadi
+        interval, period, now = 6.0, 60, 1000.0
+        tat = None
+        for _ in range(10):
+            allowed, tat = gcra(tat, now, interval, period)
+            self.assertTrue(allowed)
+        self.assertEqual(tat, now + period)
+
+        allowed, rejected_tat = gcra(tat, now, interval, period)
+        self.assertFalse(allowed)
+        self.assertEqual(rejected_tat, tat)
+
+        # Bitta interval o'tgach - yana bitta
+        self.assertTrue(gcra(tat, now + interval, interval, period)[0])
+        self.assertFalse(gcra(tat, now + interval - 0.01, interval, period)[0])
+        # Uzoq tanaffusdan keyin TAT hozirgi vaqtdan boshlanadi
+        self.assertEqual(gcra(tat, now + 1000, interval, period), (True, now + 1000 + interval))
+
+    def check_store(self, store):
+        key = f'test:{uuid.uuid4().hex}'
+        results = [store.update(key, 6.0, 60) for _ in range(11)]
+        self.assertEqual([allowed for allowed, _ in results], [True] * 10 + [False])
+        self.assertAlmostEqual(results[0][1], 6.0, places=1)
+        self.assertAlmostEqual(results[9][1], 60.0, places=1)
+        # Rad etilgan so'rov TAT ni surmaydi
+        self.assertAlmostEqual(results[10][1], 60.0, places=1)
+        # Boshqa kalit alohida hisoblanadi
+        self.assertTrue(store.update(f'{key}:other', 6.0, 60)[0])
+
+    def test_memory_store(self):
+        self.check_store(MemoryStore())
+
+    def test_sqlite_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.check_store(SQLiteStore(os.path.join(directory, 'throttle.sqlite3')))
+
+    def test_ratelimit_headers(self):
+        first = RateLimit(10, 60, 6.0, True, 6.0)
+        self.assertEqual(first.headers(), {
+            'RateLimit-Limit': '10',
+            'RateLimit-Remaining': '9',
+            'RateLimit-Reset': '6',
+            'RateLimit-Policy': '10;w=60',
+        })
+        self.assertIsNone(first.retry_after)
+
+        last = RateLimit(10, 60, 6.0, True, 60.0)
+        self.assertEqual(last.remaining, 0)
+        self.assertEqual(last.reset, 60)
+
+        rejected = RateLimit(10, 60, 6.0, False, 57.5)
+        self.assertEqual(rejected.remaining, 0)
+        self.assertEqual(rejected.reset, 58)
+        self.assertAlmostEqual(rejected.retry_after, 3.5)
+
+
+class GCRAThrottleViewTest(SimpleTestCase):
+    """Throttle view ga ulanganda: 429, Retry-After va RateLimit-* headerlari"""
+
+    class QuizView(APIView):
+        authentication_classes = []
+        permission_classes = []
+        throttle_scope = 'quiz'
+
+        def get(self, request):
+            return Response({'success': True})
+
+    def test_limit_and_headers(self):
+        view = RateLimitHeadersMiddleware(self.QuizView.as_view())
+        limit, _ = parse_rate(api_settings.DEFAULT_THROTTLE_RATES['quiz'])
+
+        responses = [view(RequestFactory().get('/', REMOTE_ADDR='192.0.2.10')) for _ in range(limit + 1)]
+        self.assertEqual([r.status_code for r in responses], [200] * limit + [429])
+        self.assertEqual(responses[0]['RateLimit-Limit'], str(limit))
+        self.assertEqual(responses[0]['RateLimit-Remaining'], str(limit - 1))
+        self.assertEqual(responses[limit - 1]['RateLimit-Remaining'], '0')
+        self.assertEqual(responses[limit]['RateLimit-Remaining'], '0')
+        self.assertGreater(int(responses[limit]['Retry-After']), 0)
+
+        # Boshqa IP ning limiti alohida
+        other = view(RequestFactory().get('/', REMOTE_ADDR='192.0.2.11'))
+        self.assertEqual(other.status_code, 200)
+
+
+@override_settings(SECURITY_LOG_ASYNC=False, UPLOAD_CHUNK_MAX_SIZE=8, UPLOAD_MAX_SIZE=1024)
+class ChunkedUploadTest(TestCase):
+    """Bo'laklab yuklash: Upload-Offset protokoli, 409/413 va yakunlash"""
+
+    CONTENT = b'0123456789abcdef'
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        paths = override_settings(
+            MEDIA_ROOT=self.media_root, UPLOAD_SESSION_DIR=os.path.join(self.media_root, 'sessions'),
+        )
+        paths.enable()
+        self.addCleanup(paths.disable)
+
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.post('/api/admin/uploads/', {
+            'filename': 'lesson.mp4', 'size': len(self.CONTENT), 'title': 'Dars',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Upload-Offset'], '0')
+        self.assertEqual(response['Upload-Length'], str(len(self.CONTENT)))
+        self.url = response['Location']
+        self.upload = VideoUpload.objects.get(pk=response.data['data']['id'])
+
+    def send(self, offset, data):
+        return self.client.patch(
+            self.url, data, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def complete(self):
+        return self.client.post(f'{self.url}complete/', {}, format='json')
+
+    def test_create_validation(self):
+        for body, code in (
+            ({'size': 10}, 400),
+            ({'filename': 'a.mp4', 'size': 'x'}, 400),
+            ({'filename': 'a.mp4', 'size': 0}, 400),
+            ({'filename': 'a.mp4', 'size': 2048}, 413),
+        ):
+            self.assertEqual(self.client.post('/api/admin/uploads/', body, format='json').status_code, code, body)
+
+    def test_offset_protocol(self):
+        response = self.send(0, self.CONTENT[:8])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], '8')
+
+        # Takroriy (eskirgan) offset - 409 va joriy offset qaytadi
+        response = self.send(0, self.CONTENT[:8])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '8')
+        self.assertEqual(self.send(12, self.CONTENT[12:]).status_code, 409)
+
+        self.assertEqual(self.client.get(self.url)['Upload-Offset'], '8')
+        self.assertEqual(self.complete().status_code, 409)
+
+        # Bo'lak chegarasi va e'lon qilingan hajmdan oshish
+        self.assertEqual(self.send(8, b'x' * 9).status_code, 413)
+        self.assertEqual(self.client.patch(
+            self.url, b'x', content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='abc',
+        ).status_code, 400)
+
+        response = self.send(8, self.CONTENT[8:])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], str(len(self.CONTENT)))
+        self.assertEqual(self.send(16, b'x').status_code, 413)
+
+    def test_chunk_is_refused_while_another_is_written(self):
+        VideoUpload.objects.filter(pk=self.upload.pk).update(status=VideoUpload.Status.WRITING)
+        self.assertEqual(self.send(0, self.CONTENT[:8]).status_code, 409)
+
+        # Yozayotgan jarayon o'lgan - muddat o'tgach sessiya qayta egallanadi
+        VideoUpload.objects.filter(pk=self.upload.pk).update(
+            updated_at=timezone.now() - WRITE_LEASE - timedelta(seconds=1),
+        )
+        response = self.send(0, self.CONTENT[:8])
+        self.assertEqual(response.status_code, 200)
+        self.upload.refresh_from_db()
+        self.assertEqual((self.upload.status, self.upload.offset), (VideoUpload.Status.ACTIVE, 8))
+
+    def test_complete_creates_one_video(self):
+        self.send(0, self.CONTENT[:8])
+        self.send(8, self.CONTENT[8:])
+
+        response = self.complete()
+        self.assertEqual(response.status_code, 201)
+        video = Video.objects.get(pk=response.data['data']['id'])
+        self.assertEqual(video.title_uz, 'Dars')
+        with video.video_file.open('rb') as f:
+            self.assertEqual(f.read(), self.CONTENT)
+        self.assertFalse(os.path.exists(self.upload.temp_path))
+
+        self.assertEqual(self.complete().status_code, 409)
+        self.assertEqual(self.client.delete(self.url).status_code, 409)
+        self.assertEqual(Video.objects.count(), 1)
+
+    def test_delete_discards_session(self):
+        self.send(0, self.CONTENT[:8])
+        self.assertEqual(self.client.delete(self.url).status_code, 200)
+        self.assertFalse(os.path.exists(self.upload.temp_path))
+        self.assertEqual(self.send(8, self.CONTENT[8:]).status_code, 409)
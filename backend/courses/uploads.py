@@ -0,0 +1,176 @@
+"""
+Bo'laklab (chunked), davom ettiriladigan video yuklash (tus protokoliga o'xshash)
+- create_upload: sessiya ochish, vaqtinchalik fayl yaratish
+- write_chunk: so'rov tanasini offset dan boshlab diskka oqim bilan yozish
+  (xotirada faqat STREAM_CHUNK_SIZE bayt turadi). Yozishdan oldin sessiya
+  shartli UPDATE bilan egallanadi (active -> writing) - bir vaqtda faqat bitta
+  bo'lak yoziladi
+- claim_completion: active -> completing; ikki marta complete qilinsa ham
+  faqat bitta Video yaratiladi
+- open_upload_file: tayyor faylni Video.video_file ga beriladigan File sifatida ochish
+- discard_upload: sessiyani bekor qilish va vaqtinchalik faylni o'chirish
+"""
+
+import os
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import VideoUpload
+from .streaming import STREAM_CHUNK_SIZE
+
+logger = logging.getLogger('courses')
+
+# Bo'lak yozayotgan jarayon o'lib qolsa, sessiya shuncha vaqtdan keyin qayta egallanadi
+WRITE_LEASE = timedelta(minutes=15)
+
+
+class UploadError(Exception):
+    """Yuklash so'rovi xatosi - HTTP status kodi bilan"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class UploadedSessionFile(File):
+    """
+    Tayyor vaqtinchalik fayl. temporary_file_path() bor bo'lgani uchun
+    FileSystemStorage faylni nusxalamasdan ko'chiradi (rename), S3 storage
+    esa uni bo'laklab (multipart) yuklaydi.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def create_upload(user, filename, size, metadata=None):
+    """Yangi yuklash sessiyasini ochadi va bo'sh vaqtinchalik fayl yaratadi"""
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError('filename majburiy')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size butun son bo\'lishi kerak')
+    if size <= 0:
+        raise UploadError('size musbat bo\'lishi kerak')
+    if size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(
+            f"Fayl hajmi chegaradan katta ({settings.UPLOAD_MAX_SIZE} bayt)",
+            status_code=413,
+        )
+
+    upload = VideoUpload.objects.create(
+        created_by=user,
+        filename=filename,
+        size=size,
+        metadata=metadata or {},
+    )
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    open(upload.temp_path, 'wb').close()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    stream dan length baytni offset pozitsiyasiga yozadi va yangi offset ni
+    qaytaradi. Avval sessiya shartli UPDATE bilan egallanadi (offset mos va
+    holat active) - bir vaqtda kelgan ikkita bo'lakdan faqat bittasi faylga
+    yozadi, ikkinchisi 409 oladi.
+    Ulanish uzilsa yetib kelgan qism saqlanadi; mijoz HEAD bilan offset ni
+    bilib, davom ettiradi.
+    """
+    if upload.status not in (VideoUpload.Status.ACTIVE, VideoUpload.Status.WRITING):
+        raise UploadError('Yuklash sessiyasi yopilgan', status_code=409)
+    if offset != upload.offset:
+        raise UploadError('Upload-Offset mos emas', status_code=409)
+    if length <= 0:
+        raise UploadError('Bo\'sh bo\'lak')
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(
+            f"Bo'lak hajmi chegaradan katta ({settings.UPLOAD_CHUNK_MAX_SIZE} bayt)",
+            status_code=413,
+        )
+    if offset + length > upload.size:
+        raise UploadError('Bo\'lak e\'lon qilingan hajmdan oshib ketadi', status_code=413)
+    if not os.path.exists(upload.temp_path):
+        raise UploadError('Vaqtinchalik fayl topilmadi', status_code=410)
+
+    now = timezone.now()
+    claimed = VideoUpload.objects.filter(
+        Q(status=VideoUpload.Status.ACTIVE)
+        | Q(status=VideoUpload.Status.WRITING, updated_at__lt=now - WRITE_LEASE),
+        pk=upload.pk, offset=offset,
+    ).update(status=VideoUpload.Status.WRITING, updated_at=now)
+    if not claimed:
+        raise UploadError('Upload-Offset mos emas yoki boshqa bo\'lak yozilmoqda', status_code=409)
+
+    written = 0
+    try:
+        with open(upload.temp_path, 'r+b') as f:
+            f.seek(offset)
+            while written < length:
+                data = stream.read(min(STREAM_CHUNK_SIZE, length - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+    finally:
+        # Yozilgan qism (uzilishda ham) offset ga qo'shiladi va sessiya bo'shatiladi
+        new_offset = offset + written
+        released = VideoUpload.objects.filter(
+            pk=upload.pk, offset=offset, status=VideoUpload.Status.WRITING,
+        ).update(status=VideoUpload.Status.ACTIVE, offset=new_offset, updated_at=timezone.now())
+
+    if not released:
+        # Yozish paytida sessiya bekor qilingan
+        raise UploadError('Yuklash sessiyasi yopilgan', status_code=409)
+    upload.offset = new_offset
+    upload.status = VideoUpload.Status.ACTIVE
+    return new_offset
+
+
+def claim_completion(upload):
+    """active -> completing; boshqa so'rov allaqachon yakunlayotgan bo'lsa False"""
+    claimed = VideoUpload.objects.filter(
+        pk=upload.pk, status=VideoUpload.Status.ACTIVE, offset=upload.size,
+    ).update(status=VideoUpload.Status.COMPLETING, updated_at=timezone.now())
+    if claimed:
+        upload.status = VideoUpload.Status.COMPLETING
+    return bool(claimed)
+
+
+def release_completion(upload):
+    """Video yaratilmadi (validatsiya xatosi) - sessiya qayta active"""
+    VideoUpload.objects.filter(pk=upload.pk, status=VideoUpload.Status.COMPLETING).update(
+        status=VideoUpload.Status.ACTIVE, updated_at=timezone.now(),
+    )
+    upload.status = VideoUpload.Status.ACTIVE
+
+
+def open_upload_file(upload):
+    """To'liq yuklangan faylni storage ga saqlash uchun ochadi"""
+    if upload.offset != upload.size:
+        raise UploadError('Fayl hali to\'liq yuklanmagan', status_code=409)
+    if not os.path.exists(upload.temp_path):
+        raise UploadError('Vaqtinchalik fayl topilmadi', status_code=410)
+    return UploadedSessionFile(open(upload.temp_path, 'rb'), name=upload.filename)
+
+
+def remove_temp_file(upload):
+    try:
+        os.remove(upload.temp_path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_upload(upload):
+    """Sessiyani bekor qiladi va diskdagi qismni o'chiradi"""
+    VideoUpload.objects.filter(pk=upload.pk).update(status=VideoUpload.Status.ABORTED)
+    upload.status = VideoUpload.Status.ABORTED
+    remove_temp_file(upload)
@@ -5,8 +5,10 @@ Courses API URLs
 from django.urls import path
 from .views import (
     VideoListView, VideoDetailView,
-    VideoStreamView, VideoProgressView,
+    VideoStreamView, VideoHLSView, VideoProgressView,
     AdminVideoListCreateView, AdminVideoDetailView,
+    AdminVideoProgressView, AdminTranscodeQueueView,
+    AdminVideoUploadCreateView, AdminVideoUploadDetailView, AdminVideoUploadCompleteView,
     CourseListView, CourseDetailView,
     AdminCourseListCreateView, AdminCourseDetailView,
     AdminQuestionListCreateView, AdminQuestionDetailView,
@@ -22,12 +24,18 @@ urlpatterns = [
     path('videos/', VideoListView.as_view(), name='video-list'),
     path('videos/<int:pk>/', VideoDetailView.as_view(), name='video-detail'),
     path('videos/<int:pk>/stream/', VideoStreamView.as_view(), name='video-stream'),
+    path('videos/<int:pk>/hls/<path:name>', VideoHLSView.as_view(), name='video-hls'),
     path('videos/<int:pk>/progress/', VideoProgressView.as_view(), name='video-progress'),
     path('videos/<int:pk>/quiz/', QuizSubmissionView.as_view(), name='video-quiz-submit'),
 
     # Admin endpoints
     path('admin/videos/', AdminVideoListCreateView.as_view(), name='admin-video-list'),
     path('admin/videos/<int:pk>/', AdminVideoDetailView.as_view(), name='admin-video-detail'),
+    path('admin/videos/<int:pk>/progress/', AdminVideoProgressView.as_view(), name='admin-video-progress'),
+    path('admin/transcode/queue/', AdminTranscodeQueueView.as_view(), name='admin-transcode-queue'),
+    path('admin/uploads/', AdminVideoUploadCreateView.as_view(), name='admin-upload-create'),
+    path('admin/uploads/<uuid:pk>/', AdminVideoUploadDetailView.as_view(), name='admin-upload-detail'),
+    path('admin/uploads/<uuid:pk>/complete/', AdminVideoUploadCompleteView.as_view(), name='admin-upload-complete'),
     
     path('admin/courses/', AdminCourseListCreateView.as_view(), name='admin-course-list'),
     path('admin/courses/<int:pk>/', AdminCourseDetailView.as_view(), name='admin-course-detail'),
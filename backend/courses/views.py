@@ -4,17 +4,20 @@ Courses views - Video darslar va progress boshqarish
 
 import os
 import logging
-import mimetypes
 from django.conf import settings
-from django.http import FileResponse, Http404
+from urllib.parse import urlencode
+from django.http import Http404, HttpResponse
+from django.urls import reverse
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
-from django.db.models import Q
+from django.db.models import F, Q
 
-from .models import Video, VideoProgress, Course, Question, Choice, QuizResult
+from .models import (
+    Video, VideoProgress, Course, Question, Choice, QuizResult, TranscodeJob, VideoUpload,
+)
 from .serializers import (
     VideoListSerializer,
     VideoDetailSerializer,
@@ -24,7 +27,39 @@ from .serializers import (
     QuestionSerializer,
     ChoiceSerializer,
 )
+from .serializers import parse_fields
+from .access import AccessPolicy
+from .conditional import (
+    conditional, course_list_validators, course_detail_validators, video_list_validators,
+)
+from . import search as search_index
+from .counters import increment_views
+from .progress_buffer import record_heartbeat
+from .answer_keys import get_answer_key, grade
+from . import catalog
+from .jobs import queue_overview
+from .uploads import (
+    UploadError,
+    create_upload,
+    write_chunk,
+    open_upload_file,
+    claim_completion,
+    release_completion,
+    remove_temp_file,
+    discard_upload,
+)
+from .streaming import (
+    VIDEO_QUALITY_FIELDS,
+    resolve_video_file,
+    build_stream_response,
+    serve_local_file,
+    is_valid_hls_name,
+    sign_playlist,
+)
+from accounts.models import User
 from accounts.permissions import IsAdmin, IsNotBlocked
+from accounts.authentication import allowed_course_ids, invalidate_user_auth
+from analytics.pagination import InvalidCursor, keyset_page
 from accounts.utils import (
     log_security_event,
     generate_signed_video_url,
@@ -33,35 +68,143 @@ from accounts.utils import (
 
 logger = logging.getLogger('courses')
 
+# Ro'yxatlar uchun opt-in cursor paginatsiya (limit yoki cursor berilganda)
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 200
+
+VIDEO_ORDERING = ['level', 'order_index', 'id']
+COURSE_ORDERING = ['-created_at', '-id']
+COURSE_VIDEO_ORDERING = ['order_index', 'id']
+SEARCH_ORDERING = ['search_rank', 'id']
+
+
+def _is_paginated(request):
+    return 'limit' in request.query_params or 'cursor' in request.query_params
+
+
+def _paginate(request, queryset, ordering):
+    """
+    limit/cursor berilmasa (queryset, None) - eski javob shakli.
+    Aks holda keyset sahifa: (rows, next_cursor). InvalidCursor ko'tarishi mumkin.
+    """
+    params = request.query_params
+    if not _is_paginated(request):
+        return queryset.order_by(*ordering), None
+    try:
+        limit = min(max(int(params.get('limit', LIST_DEFAULT_LIMIT)), 1), LIST_MAX_LIMIT)
+    except ValueError:
+        limit = LIST_DEFAULT_LIMIT
+    return keyset_page(queryset, ordering, params.get('cursor') or None, limit)
+
+
+def _sparse_videos(videos, fields):
+    """fields berilganda so'ralmagan og'ir matn maydonlari bazadan o'qilmaydi"""
+    if not fields:
+        return videos
+    deferred = [f for f in search_index.BODY_FIELDS if f not in fields]
+    if 'title' not in fields:
+        deferred += [f for f in search_index.TITLE_FIELDS if f not in fields]
+    if 'course_title' not in fields:
+        videos = videos.select_related(None)
+    return videos.defer(*deferred) if deferred else videos
+
+
+def _with_user_progress(videos, request, fields):
+    """Joriy foydalanuvchi progressini oldindan yuklash (progress so'ralgan bo'lsa)"""
+    if fields and 'progress' not in fields:
+        return videos
+    from django.db.models import Prefetch
+    return videos.prefetch_related(
+        Prefetch(
+            'progress_records',
+            queryset=VideoProgress.objects.filter(user=request.user),
+            to_attr='user_progress'
+        )
+    )
+
+
+def _compact_lang(request):
+    """?compact=1 bo'lsa ixcham katalog tili (lang, default uz), aks holda None"""
+    if request.query_params.get('compact', '').lower() not in ('1', 'true'):
+        return None
+    return catalog.resolve_lang(request.query_params.get('lang'))
+
+
+VIDEO_ROW_FIELDS = ('id', 'course_id', 'views_count')
+
+
+def _video_rows(videos, ordering):
+    """Ixcham javob uchun faqat id, kurs va jonli ko'rishlar soni (tartib maydonlari bilan)"""
+    names = dict.fromkeys([*VIDEO_ROW_FIELDS, *(field.lstrip('-') for field in ordering)])
+    return videos.select_related(None).values(*names)
+
+
+def _invalid_cursor(e):
+    return Response({
+        'success': False,
+        'error': {'message': str(e)}
+    }, status=status.HTTP_400_BAD_REQUEST)
+
 
 class CourseListView(APIView):
     """
     Kurslar ro'yxati
     GET /api/courses/
+    Parametrlar: search, fields (id,title,...), limit, cursor (javobdagi next_cursor),
+                 compact=1&lang=uz|ru|en - faqat bitta tildagi keshlangan ixcham ko'rinish
     """
     permission_classes = [IsAuthenticated, IsNotBlocked]
 
+    @conditional(course_list_validators)
     def get(self, request):
         # Admin barcha kurslarni ko'radi, student faqat ruxsat etilganlarini
         if request.user.role == 'admin':
-            courses = Course.objects.all().order_by('-created_at')
+            courses = Course.objects.all()
         else:
-            courses = request.user.allowed_courses.all().order_by('-created_at')
-        serializer = CourseSerializer(courses, many=True, context={'request': request})
-        return Response({
+            courses = request.user.allowed_courses.all()
+
+        ordering = COURSE_ORDERING
+        search = request.query_params.get('search', '')
+        if search:
+            courses = search_index.apply_search(courses, 'course', search)
+            ordering = SEARCH_ORDERING
+
+        lang = _compact_lang(request)
+        fields = parse_fields(request.query_params.get('fields'))
+        if lang:
+            courses = courses.values('id', *(field.lstrip('-') for field in ordering))
+        try:
+            courses, next_cursor = _paginate(request, courses, ordering)
+        except InvalidCursor as e:
+            return _invalid_cursor(e)
+
+        if lang:
+            data = catalog.compact_courses(request, [row['id'] for row in courses], lang, fields)
+        else:
+            data = CourseSerializer(
+                courses, many=True, context={'request': request}, fields=fields,
+            ).data
+        response = {
             'success': True,
-            'data': serializer.data,
-            'count': courses.count()
-        })
+            'data': data,
+            'count': len(data),
+        }
+        if _is_paginated(request):
+            response['next_cursor'] = next_cursor
+        return Response(response)
 
 
 class CourseDetailView(APIView):
     """
     Kurs tafsiloti va uning videolari
     GET /api/courses/<id>/
+    Parametrlar: fields (kurs maydonlari), video_fields (videolar maydonlari),
+                 limit, cursor (videolar bo'yicha, javobdagi next_cursor),
+                 compact=1&lang=uz|ru|en
     """
     permission_classes = [IsAuthenticated, IsNotBlocked]
 
+    @conditional(course_detail_validators)
     def get(self, request, pk):
         try:
             course = Course.objects.get(pk=pk)
@@ -73,52 +216,61 @@ class CourseDetailView(APIView):
 
         # Student faqat ruxsat etilgan kurslarini ko'ra oladi
         if request.user.role != 'admin':
-            if not request.user.allowed_courses.filter(pk=pk).exists():
+            if course.pk not in allowed_course_ids(request.user):
                 return Response({
                     'success': False,
                     'error': {'message': 'Bu kursga ruxsatingiz yo\'q'}
                 }, status=status.HTTP_403_FORBIDDEN)
 
-        course_data = CourseSerializer(course, context={'request': request}).data
-        
-        # Kursga tegishli videolar
-        videos = Video.objects.filter(course=course, is_published=True).select_related('course').order_by('order_index')
-        
-        if request.user.is_authenticated:
-            from django.db.models import Prefetch
-            videos = videos.prefetch_related(
-                Prefetch(
-                    'progress_records',
-                    queryset=VideoProgress.objects.filter(user=request.user),
-                    to_attr='user_progress'
-                )
-            )
+        lang = _compact_lang(request)
+        fields = parse_fields(request.query_params.get('fields'))
+        video_fields = parse_fields(request.query_params.get('video_fields'))
+        videos = Video.objects.filter(course=course, is_published=True).select_related('course')
+        if lang:
+            videos = _video_rows(videos, COURSE_VIDEO_ORDERING)
+        else:
+            videos = _with_user_progress(_sparse_videos(videos, video_fields), request, video_fields)
 
-        video_serializer = VideoListSerializer(videos, many=True, context={'request': request})
-        
-        course_data['videos'] = video_serializer.data
-        
-        return Response({
+        try:
+            videos, next_cursor = _paginate(request, videos, COURSE_VIDEO_ORDERING)
+        except InvalidCursor as e:
+            return _invalid_cursor(e)
+
+        if lang:
+            course_data = catalog.compact_courses(request, [course.pk], lang, fields)[0]
+            course_data['videos'] = catalog.compact_videos(request, list(videos), lang, video_fields)
+        else:
+            course_data = CourseSerializer(course, context={'request': request}, fields=fields).data
+            course_data['videos'] = VideoListSerializer(
+                videos, many=True, context={'request': request}, fields=video_fields,
+            ).data
+
+        response = {
             'success': True,
             'data': course_data
-        })
+        }
+        if _is_paginated(request):
+            response['next_cursor'] = next_cursor
+        return Response(response)
 
 
 class VideoListView(APIView):
     """
     Video darslar ro'yxati (faqat nashr etilganlar)
     GET /api/videos/
+    Parametrlar: course, level, search, fields (masalan id,title,duration_seconds,progress),
+                 limit, cursor (javobdagi next_cursor), compact=1&lang=uz|ru|en
     """
     permission_classes = [IsAuthenticated, IsNotBlocked]
 
+    @conditional(video_list_validators)
     def get(self, request):
         videos = Video.objects.filter(is_published=True).select_related('course')
 
         # Student faqat ruxsat etilgan kurslardagi videolarni ko'ra oladi
         if request.user.role != 'admin':
-            allowed_course_ids = request.user.allowed_courses.values_list('id', flat=True)
             videos = videos.filter(
-                Q(course__in=allowed_course_ids) | Q(course__isnull=True)
+                Q(course__in=allowed_course_ids(request.user)) | Q(course__isnull=True)
             )
 
         # Kurs bo'yicha filtr
@@ -131,37 +283,41 @@ class VideoListView(APIView):
         if level and level in dict(Video.Level.choices):
             videos = videos.filter(level=level)
 
-        # Qidiruv
+        # Qidiruv (to'liq matnli indeks, reyting bo'yicha tartiblanadi)
+        ordering = VIDEO_ORDERING
         search = request.query_params.get('search', '')
         if search:
-            videos = videos.filter(
-                Q(title_uz__icontains=search) |
-                Q(title_ru__icontains=search) |
-                Q(title_en__icontains=search) |
-                Q(description_uz__icontains=search) |
-                Q(description_ru__icontains=search) |
-                Q(description_en__icontains=search)
-            )
+            videos = search_index.apply_search(videos, 'video', search)
+            ordering = SEARCH_ORDERING
 
-        if request.user.is_authenticated:
-            from django.db.models import Prefetch
-            videos = videos.prefetch_related(
-                Prefetch(
-                    'progress_records',
-                    queryset=VideoProgress.objects.filter(user=request.user),
-                    to_attr='user_progress'
-                )
-            )
+        lang = _compact_lang(request)
+        fields = parse_fields(request.query_params.get('fields'))
+        if lang:
+            videos = _video_rows(videos, ordering)
+        else:
+            videos = _with_user_progress(_sparse_videos(videos, fields), request, fields)
 
-        serializer = VideoListSerializer(
-            videos, many=True,
-            context={'request': request},
-        )
-        return Response({
+        try:
+            videos, next_cursor = _paginate(request, videos, ordering)
+        except InvalidCursor as e:
+            return _invalid_cursor(e)
+
+        if lang:
+            data = catalog.compact_videos(request, list(videos), lang, fields)
+        else:
+            data = VideoListSerializer(
+                videos, many=True,
+                context={'request': request},
+                fields=fields,
+            ).data
+        response = {
             'success': True,
-            'data': serializer.data,
-            'count': videos.count(),
-        })
+            'data': data,
+            'count': len(data),
+        }
+        if _is_paginated(request):
+            response['next_cursor'] = next_cursor
+        return Response(response)
 
 
 class VideoDetailView(APIView):
@@ -172,65 +328,36 @@ class VideoDetailView(APIView):
     permission_classes = [IsAuthenticated, IsNotBlocked]
 
     def get(self, request, pk):
+        # Bitta prefetch rejasi: video+kurs, savollar, variantlar, progress -
+        # savollar soniga bog'liq bo'lmagan o'zgarmas so'rovlar soni
+        from django.db.models import Prefetch
+        videos = Video.objects.select_related('course').prefetch_related(
+            Prefetch('questions', queryset=Question.objects.prefetch_related('choices')),
+            Prefetch(
+                'progress_records',
+                queryset=VideoProgress.objects.filter(user=request.user),
+                to_attr='user_progress'
+            ),
+        )
         try:
-            video = Video.objects.get(pk=pk, is_published=True)
+            video = videos.get(pk=pk, is_published=True)
         except Video.DoesNotExist:
             return Response({
                 'success': False,
                 'error': {'message': 'Video topilmadi'},
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Student faqat ruxsat etilgan kursdagi videoni ko'ra oladi
-        if request.user.role != 'admin' and video.course:
-            if not request.user.allowed_courses.filter(pk=video.course_id).exists():
-                return Response({
-                    'success': False,
-                    'error': {'message': 'Bu videoga ruxsatingiz yo\'q'},
-                }, status=status.HTTP_403_FORBIDDEN)
+        # Kurs ruxsati, ruxsat etilgan kunlar va kunlik limit
+        denied = AccessPolicy(request.user).check(video)
+        if denied:
+            return Response({
+                'success': False,
+                'error': {'message': denied},
+            }, status=status.HTTP_403_FORBIDDEN)
 
-        # Limit tekshiruvlari
-        # Limit tekshiruvlari
-        if getattr(request.user, 'role', 'student') != 'admin' and video.course:
-            course = video.course
-            from django.utils import timezone
-            today = timezone.now().date()
-            
-            total_videos = course.videos.filter(is_published=True).count()
-            completed_videos = request.user.video_progress.filter(video__course=course, completed=True).count()
-            
-            # 1. Agar barcha videolarni ko'rib bo'lgan bo'lsa, limit ishlamaydi (Cheksiz kirish ruxsat etiladi)
-            if total_videos > 0 and completed_videos >= total_videos:
-                pass
-            else:
-                # 2. Haftaning ruxsat etilgan kunlari tekshiruvi
-                allowed_days_str = getattr(course, 'allowed_days', '0,1,2,3,4,5,6')
-                if allowed_days_str:
-                    allowed = [x.strip() for x in allowed_days_str.split(',') if x.strip()]
-                    if allowed and str(today.weekday()) not in allowed:
-                        from calendar import day_name
-                        return Response({
-                            'success': False,
-                            'error': {'message': "Siz bu kursga bugun kira olmaysiz. Grafikingiz (Ruxsat etilgan kunlar) bo'yicha kuting."},
-                        }, status=status.HTTP_403_FORBIDDEN)
-
-                # 3. Kunlik darslar (yangi videolar) limiti
-                if getattr(course, 'daily_limit', 0) > 0:
-                    already_unlocked = request.user.video_progress.filter(video_id=video.id).exists()
-                    if not already_unlocked:
-                        unlocked_today = request.user.video_progress.filter(
-                            created_at__date=today,
-                            video__course=course
-                        ).count()
-                        
-                        if unlocked_today >= course.daily_limit:
-                            return Response({
-                                'success': False,
-                                'error': {'message': f"Kunlik dars ochish limitingizga yetdingiz ({course.daily_limit} ta). Yangi darslarni ertaga ko'rishingiz mumkin."},
-                            }, status=status.HTTP_403_FORBIDDEN)
-
-        # Ko'rishlar sonini oshirish
-        video.views_count += 1
-        video.save(update_fields=['views_count'])
+        # Ko'rishlar soni bitta atomik UPDATE bilan oshiriladi
+        if increment_views(video.pk):
+            video.views_count += 1
 
         # Imzolangan URL yaratish
         signed = generate_signed_video_url(
@@ -257,78 +384,74 @@ class VideoDetailView(APIView):
         })
 
 
+def _verify_stream_signature(request, pk):
+    """
+    Stream so'rovidagi imzoni (expires, signature, user_id) tekshiradi.
+    Xato bo'lsa Response qaytaradi, aks holda None.
+    """
+    expires = request.query_params.get('expires', '')
+    signature = request.query_params.get('signature', '')
+    user_id = request.query_params.get('user_id', '')
+
+    if not all([expires, signature, user_id]):
+        return Response({
+            'success': False,
+            'error': {'message': 'Noto\'g\'ri so\'rov parametrlari'},
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if not verify_video_signature(
+        pk, user_id, expires, signature,
+        settings.VIDEO_SIGNING_KEY,
+    ):
+        return Response({
+            'success': False,
+            'error': {'message': 'Video URL muddati o\'tgan yoki noto\'g\'ri'},
+        }, status=status.HTTP_403_FORBIDDEN)
+    return None
+
+
 class VideoStreamView(APIView):
     """
-    Himoyalangan video stream
+    Himoyalangan video stream (HTTP Range / 206 qo'llab-quvvatlanadi)
     GET /api/videos/<id>/stream/?expires=...&signature=...&user_id=...
     """
     permission_classes = [AllowAny]
+    throttle_scope = 'stream'
 
     def get(self, request, pk):
-        # Parametrlarni tekshirish
-        expires = request.query_params.get('expires', '')
-        signature = request.query_params.get('signature', '')
-        user_id = request.query_params.get('user_id', '')
-
-        if not all([expires, signature, user_id]):
-            return Response({
-                'success': False,
-                'error': {'message': 'Noto\'g\'ri so\'rov parametrlari'},
-            }, status=status.HTTP_400_BAD_REQUEST)
-
         try:
-            # Imzoni tekshirish
-            if not verify_video_signature(
-                pk, user_id, expires, signature,
-                settings.VIDEO_SIGNING_KEY,
-            ):
-                return Response({
-                    'success': False,
-                    'error': {'message': 'Video URL muddati o\'tgan yoki noto\'g\'ri'},
-                }, status=status.HTTP_403_FORBIDDEN)
+            # Parametrlar va imzoni tekshirish
+            error = _verify_stream_signature(request, pk)
+            if error:
+                return error
 
             # User ID tekshiruvi (imzo orqali)
             # Auth header bo'lmagani uchun request.user yo'q bo'lishi mumkin
             # Imzo to'g'ri bo'lsa, demak URL server tomonidan berilgan
 
             try:
-                video = Video.objects.get(pk=pk)
+                video = Video.objects.only(
+                    'id', 'video_file', *VIDEO_QUALITY_FIELDS.values()
+                ).get(pk=pk)
             except Video.DoesNotExist:
                 raise Http404
 
-            # Resolution (sifat) parametrini olish
-            res = request.query_params.get('res', '')
-            file_path = None
-            
-            if res == '360p' and video.video_360p: file_path = video.video_360p.path
-            elif res == '480p' and video.video_480p: file_path = video.video_480p.path
-            elif res == '720p' and video.video_720p: file_path = video.video_720p.path
-            elif res == '1080p' and video.video_1080p: file_path = video.video_1080p.path
-            
-            # Agar sifat topilmasa yoki fayl hali tayyor bo'lmasa, originalni ishlatish
-            if not file_path or not os.path.exists(file_path):
-                if not video.video_file:
-                     return Response({
-                        'success': False,
-                        'error': {'message': 'Video fayl yuklanmagan'},
-                    }, status=status.HTTP_404_NOT_FOUND)
-                file_path = video.video_file.path
-
-            if not os.path.exists(file_path):
+            # Resolution (sifat) parametri; topilmasa original ishlatiladi
+            field_file = resolve_video_file(video, request.query_params.get('res', ''))
+            if not field_file:
                 return Response({
                     'success': False,
-                    'error': {'message': 'Video fayl serverda topilmadi'},
+                    'error': {'message': 'Video fayl yuklanmagan'},
                 }, status=status.HTTP_404_NOT_FOUND)
 
-            # Video faylni stream qilish
-            content_type, _ = mimetypes.guess_type(file_path)
-            if not content_type:
-                content_type = 'video/mp4'
+            # Video faylni stream qilish: Django (Range/206), nginx, X-Sendfile yoki S3
+            response = build_stream_response(request, field_file)
+            if response is None:
+                return Response({
+                    'success': False,
+                    'error': {'message': 'Video fayl serverda topilmadi'},
+                }, status=status.HTTP_404_NOT_FOUND)
 
-            response = FileResponse(
-                open(file_path, 'rb'),
-                content_type=content_type,
-            )
             # Yuklab olishni bloklash
             response['Content-Disposition'] = 'inline'
             # response['X-Content-Type-Options'] = 'nosniff' # Olib tashlandi, ba'zan player bloklaydi
@@ -343,16 +466,73 @@ class VideoStreamView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class VideoHLSView(APIView):
+    """
+    Imzolangan HLS (adaptiv bitrate) playlist va segmentlar
+    GET /api/videos/<id>/hls/master.m3u8?expires=...&signature=...&user_id=...
+    GET /api/videos/<id>/hls/<sifat>/index.m3u8 | init.mp4 | seg_00001.m4s
+    Playlistlardagi URI larga xuddi shu imzo qo'shiladi.
+    """
+    permission_classes = [AllowAny]
+    throttle_scope = 'stream'
+
+    def get(self, request, pk, name):
+        try:
+            error = _verify_stream_signature(request, pk)
+            if error:
+                return error
+
+            # Segmentlar yo'li video ID dan aniqlanadi - bazaga so'rov yo'q
+            file_path = os.path.join(settings.MEDIA_ROOT, 'videos', 'hls', str(pk), name)
+            if not is_valid_hls_name(name) or not os.path.exists(file_path):
+                return Response({
+                    'success': False,
+                    'error': {'message': 'HLS fayl topilmadi'},
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            if name.endswith('.m3u8'):
+                with open(file_path) as f:
+                    content = f.read()
+                query = urlencode({
+                    key: request.query_params.get(key)
+                    for key in ('expires', 'signature', 'user_id')
+                })
+                response = HttpResponse(
+                    sign_playlist(content, query),
+                    content_type='application/vnd.apple.mpegurl',
+                )
+                response['Cache-Control'] = 'no-store'
+                return response
+
+            response = serve_local_file(
+                request, file_path, f"videos/hls/{pk}/{name}",
+                getattr(settings, 'VIDEO_STREAM_BACKEND', 'django'),
+            )
+            response['Cache-Control'] = 'private, max-age=3600'
+            return response
+
+        except Exception as e:
+            logger.error(f"HLS stream error: {str(e)}", exc_info=True)
+            return Response({
+                'success': False,
+                'error': {'message': 'Video yuklashda server xatoligi'},
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class VideoProgressView(APIView):
     """
     Video ko'rish progressini yangilash
     POST /api/videos/<id>/progress/
     """
     permission_classes = [IsAuthenticated, IsNotBlocked]
+    throttle_scope = 'progress'
 
     def post(self, request, pk):
         try:
-            video = Video.objects.get(pk=pk)
+            video = Video.objects.select_related('course').only(
+                'id', 'duration_seconds', 'course_id',
+                'course__id', 'course__allowed_days', 'course__daily_limit',
+            ).get(pk=pk)
         except Video.DoesNotExist:
             return Response({
                 'success': False,
@@ -362,75 +542,44 @@ class VideoProgressView(APIView):
         serializer = VideoProgressSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Limit tekshiruvlari
-        # Limit tekshiruvlari
-        if getattr(request.user, 'role', 'student') != 'admin' and video.course:
-            course = video.course
-            from django.utils import timezone
-            today = timezone.now().date()
-            
-            total_videos = course.videos.filter(is_published=True).count()
-            completed_videos = request.user.video_progress.filter(video__course=course, completed=True).count()
-            
-            if total_videos > 0 and completed_videos >= total_videos:
-                pass
-            else:
-                allowed_days_str = getattr(course, 'allowed_days', '0,1,2,3,4,5,6')
-                if allowed_days_str:
-                    allowed = [x.strip() for x in allowed_days_str.split(',') if x.strip()]
-                    if allowed and str(today.weekday()) not in allowed:
-                        return Response({
-                            'success': False,
-                            'error': {'message': "Siz bu kursga bugun kira olmaysiz. Grafikingiz bo'yicha kuting."},
-                        }, status=status.HTTP_403_FORBIDDEN)
-
-                if getattr(course, 'daily_limit', 0) > 0:
-                    already_unlocked = request.user.video_progress.filter(video_id=video.id).exists()
-                    if not already_unlocked:
-                        unlocked_today = request.user.video_progress.filter(
-                            created_at__date=today,
-                            video__course=course
-                        ).count()
-                        if unlocked_today >= course.daily_limit:
-                            return Response({
-                                'success': False,
-                                'error': {'message': f"Kunlik dars ochish limitingizga yetdingiz ({course.daily_limit} ta)."},
-                            }, status=status.HTTP_403_FORBIDDEN)
-
-        progress, created = VideoProgress.objects.get_or_create(
-            user=request.user,
-            video=video,
+        denied = AccessPolicy(request.user).check(video)
+        if denied:
+            return Response({
+                'success': False,
+                'error': {'message': denied},
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        # Heartbeat buferga tushadi, completed darhol yoziladi
+        progress = record_heartbeat(
+            request.user, video,
+            serializer.validated_data.get('watched_seconds', 0),
+            serializer.validated_data.get('completed', False),
         )
 
-        # Faqat oldinga yangilash (orqaga qaytmasin)
-        new_seconds = serializer.validated_data.get('watched_seconds', 0)
-        if new_seconds > progress.watched_seconds:
-            progress.watched_seconds = new_seconds
-
-        if serializer.validated_data.get('completed', False):
-            progress.completed = True
-
-        progress.save()
-
         # Update user streak
         from datetime import date, timedelta
         user = request.user
         today = date.today()
-        
+
         if user.last_activity_date != today:
-            if user.last_activity_date == today - timedelta(days=1):
-                user.daily_streak += 1
-            elif user.last_activity_date is None or user.last_activity_date < today - timedelta(days=1):
-                user.daily_streak = 1
-            user.last_activity_date = today
-            user.save(update_fields=['daily_streak', 'last_activity_date'])
+            # request.user keshdan bo'lishi mumkin - zanjir shartli UPDATE bilan
+            # bazadagi joriy qiymat bo'yicha bir marta yangilanadi
+            users = User.objects.filter(pk=user.pk)
+            updated = users.filter(last_activity_date=today - timedelta(days=1)).update(
+                daily_streak=F('daily_streak') + 1, last_activity_date=today,
+            ) or users.exclude(last_activity_date=today).update(
+                daily_streak=1, last_activity_date=today,
+            )
+            if updated:
+                invalidate_user_auth(user.pk)
 
+        duration = video.duration_seconds
         return Response({
             'success': True,
             'data': {
-                'watched_seconds': progress.watched_seconds,
-                'completed': progress.completed,
-                'progress_percent': progress.progress_percent,
+                'watched_seconds': progress['watched_seconds'],
+                'completed': progress['completed'],
+                'progress_percent': min(100, round(progress['watched_seconds'] / duration * 100)) if duration else 0,
             },
         })
 
@@ -442,12 +591,13 @@ class QuizSubmissionView(APIView):
     Body: { "answers": { "question_id": choice_id, ... } }
     """
     permission_classes = [IsAuthenticated, IsNotBlocked]
+    throttle_scope = 'quiz'
 
     def post(self, request, pk):
         try:
-            try:
-                video = Video.objects.get(pk=pk)
-            except Video.DoesNotExist:
+            # Oldindan tayyorlangan kalit (kesh) - savol jadvallari o'qilmaydi
+            answer_key = get_answer_key(pk)
+            if answer_key is None:
                 return Response({
                     'success': False, 
                     'error': {'message': 'Video topilmadi'}
@@ -460,58 +610,20 @@ class QuizSubmissionView(APIView):
                     'error': {'message': 'Javoblar yo\'q'}
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Optimize: Fetch questions with choices in one go
-            questions = video.questions.prefetch_related('choices').all()
-            total_questions = len(questions)
+            total_questions = len(answer_key)
             if total_questions == 0:
                  return Response({
                     'success': False, 
                     'error': {'message': 'Bu videoda testlar yo\'q'}
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            correct_count = 0
-            for q in questions:
-                user_answer = answers.get(str(q.id)) or answers.get(q.id)
-                
-                if not user_answer: continue
-
-                if q.question_type == Question.QuestionType.TEXT:
-                    # Text input comparison (case-insensitive)
-                    correct_ans = [
-                        (q.correct_answer_uz or '').lower().strip(),
-                        (q.correct_answer_ru or '').lower().strip(),
-                        (q.correct_answer_en or '').lower().strip()
-                    ]
-                    correct_ans = [mid for mid in correct_ans if mid]
-                    
-                    if str(user_answer).lower().strip() in correct_ans:
-                        correct_count += 1
-                
-                elif q.question_type == Question.QuestionType.MULTI_CHOICE:
-                    if isinstance(user_answer, list) and user_answer:
-                        correct_choice_ids = set(c.id for c in q.choices.all() if c.is_correct)
-                        try:
-                            user_selected_ids = set(map(int, user_answer))
-                            if user_selected_ids == correct_choice_ids:
-                                correct_count += 1
-                        except (ValueError, TypeError):
-                            pass
-
-                else:
-                    try:
-                        user_choice_id = int(user_answer)
-                        selected_choice = next((c for c in q.choices.all() if c.id == user_choice_id), None)
-                        if selected_choice and selected_choice.is_correct:
-                            correct_count += 1
-                    except (ValueError, TypeError):
-                        pass
-
+            correct_count = grade(answer_key, answers)
             score_percent = round((correct_count / total_questions) * 100, 1)
             passed = score_percent >= 70
 
             result = QuizResult.objects.create(
                 user=request.user,
-                video=video,
+                video_id=pk,
                 correct_answers=correct_count,
                 total_questions=total_questions,
                 score_percentage=score_percent,
@@ -538,6 +650,16 @@ class QuizSubmissionView(APIView):
 # ===================== ADMIN VIDEO VIEWS =====================
 
 
+def _apply_text_fallbacks(data):
+    """title/description berilgan bo'lsa, yo'q tillar uchun shu qiymat ishlatiladi"""
+    for field in ('title', 'description'):
+        if field in data:
+            for lang in ('en', 'uz', 'ru'):
+                if f'{field}_{lang}' not in data:
+                    data[f'{field}_{lang}'] = data[field]
+    return data
+
+
 class AdminVideoListCreateView(APIView):
     """
     Admin: Videolar ro'yxati va yangi video yuklash
@@ -555,10 +677,8 @@ class AdminVideoListCreateView(APIView):
 
         search = request.query_params.get('search', '')
         if search:
-            videos = videos.filter(
-                Q(title_uz__icontains=search) |
-                Q(title_ru__icontains=search) |
-                Q(title_en__icontains=search)
+            videos = search_index.apply_search(
+                videos, 'video', search, fields=search_index.TITLE_FIELDS,
             )
 
         course_id = request.query_params.get('course') or request.query_params.get('course_id')
@@ -579,16 +699,7 @@ class AdminVideoListCreateView(APIView):
     def post(self, request):
         from django.db import transaction
         with transaction.atomic():
-            data = request.data.copy()
-            # Fallback logic for title and description
-            if 'title' in data:
-                if 'title_en' not in data: data['title_en'] = data['title']
-                if 'title_uz' not in data: data['title_uz'] = data['title']
-                if 'title_ru' not in data: data['title_ru'] = data['title']
-            if 'description' in data:
-                if 'description_en' not in data: data['description_en'] = data['description']
-                if 'description_uz' not in data: data['description_uz'] = data['description']
-                if 'description_ru' not in data: data['description_ru'] = data['description']
+            data = _apply_text_fallbacks(request.data.copy())
 
             # Auto-publish: yangi video yuklananda avtomatik nashr qilinadi
             data['is_published'] = True
@@ -745,6 +856,251 @@ class AdminVideoDetailView(APIView):
         })
 
 
+class AdminVideoUploadCreateView(APIView):
+    """
+    Admin: Bo'laklab yuklash sessiyasini ochish (tus protokoliga o'xshash)
+    POST /api/admin/uploads/
+    Body: {"filename": "...", "size": <bayt>, "title": "...", "course": 1, ...}
+    Javob Location sarlavhasida sessiya manzili va chunk_size qaytadi.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        metadata = {
+            key: value for key, value in request.data.items()
+            if key not in ('filename', 'size', 'video_file')
+        }
+        try:
+            upload = create_upload(
+                request.user,
+                request.data.get('filename'),
+                request.data.get('size') or request.headers.get('Upload-Length'),
+                metadata,
+            )
+        except UploadError as e:
+            return Response({
+                'success': False,
+                'error': {'message': e.message},
+            }, status=e.status_code)
+
+        logger.info(f"Admin {request.user.username} yuklash sessiyasini ochdi: {upload.filename} ({upload.size} bayt)")
+        response = Response({
+            'success': True,
+            'data': _upload_data(upload),
+        }, status=status.HTTP_201_CREATED)
+        response['Location'] = reverse('admin-upload-detail', args=[upload.pk])
+        return _with_upload_headers(response, upload)
+
+
+def _upload_data(upload):
+    return {
+        'id': str(upload.pk),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'status': upload.status,
+        'chunk_size': settings.UPLOAD_CHUNK_MAX_SIZE,
+        'video_id': upload.video_id,
+    }
+
+
+def _with_upload_headers(response, upload):
+    response['Upload-Offset'] = str(upload.offset)
+    response['Upload-Length'] = str(upload.size)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _get_upload(pk):
+    upload = VideoUpload.objects.filter(pk=pk).first()
+    if not upload:
+        return None, Response({
+            'success': False,
+            'error': {'message': 'Yuklash sessiyasi topilmadi'},
+        }, status=status.HTTP_404_NOT_FOUND)
+    return upload, None
+
+
+class AdminVideoUploadDetailView(APIView):
+    """
+    Admin: Yuklash sessiyasi
+    GET/HEAD /api/admin/uploads/<id>/  - joriy offset (Upload-Offset sarlavhasi)
+    PATCH    /api/admin/uploads/<id>/  - bo'lak yuborish
+             Sarlavhalar: Upload-Offset: <offset>,
+             Content-Type: application/offset+octet-stream; tana - xom baytlar
+    DELETE   /api/admin/uploads/<id>/  - sessiyani bekor qilish
+    Tana hech qachon to'liq xotiraga o'qilmaydi - diskka oqim bilan yoziladi.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    parser_classes = [JSONParser]
+
+    def get(self, request, pk):
+        upload, error = _get_upload(pk)
+        if error:
+            return error
+        return _with_upload_headers(Response({
+            'success': True,
+            'data': _upload_data(upload),
+        }), upload)
+
+    def patch(self, request, pk):
+        upload, error = _get_upload(pk)
+        if error:
+            return error
+
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': {'message': 'Upload-Offset sarlavhasi noto\'g\'ri'},
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # request.data ga tegilmaydi - DRF tanani parse qilmaydi
+            write_chunk(upload, offset, request.stream, length)
+        except UploadError as e:
+            upload.refresh_from_db(fields=['offset', 'status'])
+            return _with_upload_headers(Response({
+                'success': False,
+                'error': {'message': e.message},
+            }, status=e.status_code), upload)
+
+        return _with_upload_headers(Response({
+            'success': True,
+            'data': _upload_data(upload),
+        }), upload)
+
+    def delete(self, request, pk):
+        upload, error = _get_upload(pk)
+        if error:
+            return error
+        if upload.status in (VideoUpload.Status.COMPLETED, VideoUpload.Status.COMPLETING):
+            return Response({
+                'success': False,
+                'error': {'message': 'Yakunlangan sessiyani bekor qilib bo\'lmaydi'},
+            }, status=status.HTTP_409_CONFLICT)
+        discard_upload(upload)
+        return Response({
+            'success': True,
+            'message': 'Yuklash bekor qilindi',
+        })
+
+
+class AdminVideoUploadCompleteView(APIView):
+    """
+    Admin: To'liq yuklangan fayldan Video yaratish
+    POST /api/admin/uploads/<id>/complete/
+    Body (ixtiyoriy): sessiya ochilganda berilgan ma'lumotlarni almashtiradi.
+    Video saqlangach post_save signali transcoding ni navbatga qo'yadi.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    parser_classes = [JSONParser]
+
+    def post(self, request, pk):
+        from django.db import transaction
+        upload, error = _get_upload(pk)
+        if error:
+            return error
+        if upload.status != VideoUpload.Status.ACTIVE:
+            return Response({
+                'success': False,
+                'error': {'message': 'Yuklash sessiyasi yopilgan'},
+                'data': _upload_data(upload),
+            }, status=status.HTTP_409_CONFLICT)
+
+        try:
+            video_file = open_upload_file(upload)
+        except UploadError as e:
+            return _with_upload_headers(Response({
+                'success': False,
+                'error': {'message': e.message},
+            }, status=e.status_code), upload)
+
+        # Shartli o'tish (active -> completing) - takroriy complete ikkinchi Video yaratmaydi
+        if not claim_completion(upload):
+            video_file.close()
+            upload.refresh_from_db(fields=['offset', 'status'])
+            return Response({
+                'success': False,
+                'error': {'message': 'Yuklash sessiyasi yopilgan yoki yakunlanmoqda'},
+                'data': _upload_data(upload),
+            }, status=status.HTTP_409_CONFLICT)
+
+        data = _apply_text_fallbacks({**upload.metadata, **request.data})
+        data['is_published'] = True
+        data['video_file'] = video_file
+
+        try:
+            with transaction.atomic():
+                serializer = AdminVideoSerializer(data=data)
+                serializer.is_valid(raise_exception=True)
+                video = serializer.save()
+                upload.status = VideoUpload.Status.COMPLETED
+                upload.video = video
+                upload.save(update_fields=['status', 'video', 'updated_at'])
+        except Exception:
+            release_completion(upload)
+            raise
+        finally:
+            video_file.close()
+        remove_temp_file(upload)
+
+        log_security_event(
+            request.user, 'video_upload', request,
+            {'video_id': video.id, 'title': video.title_en, 'upload_id': str(upload.pk)},
+        )
+        logger.info(f"Admin {request.user.username} yangi video yukladi (chunked): {video.title_en}")
+
+        return Response({
+            'success': True,
+            'data': AdminVideoSerializer(video).data,
+            'message': 'Video muvaffaqiyatli yuklandi',
+        }, status=status.HTTP_201_CREATED)
+
+
+class AdminVideoProgressView(APIView):
+    """
+    Admin: Transcoding progressi (polling uchun yengil endpoint)
+    GET /api/admin/videos/<id>/progress/
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, pk):
+        video = Video.objects.filter(pk=pk).values(
+            'id', 'processing_status', 'transcode_progress',
+        ).first()
+        if not video:
+            return Response({
+                'success': False,
+                'error': {'message': 'Video topilmadi'},
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        video['job'] = TranscodeJob.objects.filter(video_id=pk).order_by('-created_at').values(
+            'id', 'status', 'attempts', 'max_attempts', 'run_after', 'last_error',
+        ).first()
+        return Response({
+            'success': True,
+            'data': video,
+        })
+
+
+class AdminTranscodeQueueView(APIView):
+    """
+    Admin: Transcoding navbati holati (throughput, qotib qolgan encodelar)
+    GET /api/admin/transcode/queue/
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response({
+            'success': True,
+            'data': queue_overview(),
+        })
+
+
 # ===================== ADMIN COURSE VIEWS =====================
 
 class AdminCourseListCreateView(APIView):